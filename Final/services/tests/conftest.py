@@ -0,0 +1,12 @@
+import pytest # type: ignore
+
+class FakeClock:
+    """Time source for the clock= parameters; tests move it by setting now."""
+    def __init__(self, now=1000.0):
+        self.now = now
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
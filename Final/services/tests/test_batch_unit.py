@@ -0,0 +1,100 @@
+import json
+import pytest # type: ignore
+import sqlite3
+from unittest.mock import patch, Mock
+from youtube_parser.batch import BATCH_ENDPOINT, BatchProcessor, LocalBatchProcessor, batch_request_line
+from youtube_parser.recipe_cache import RecipeCache
+from youtube_parser.recipe_gen import RecipeGenerator
+from youtube_parser.type import TranscriptPayload
+from youtube_parser.usage import UsageTracker
+
+def completion(content):
+    return {"choices": [{"message": {"content": content}}]}
+
+def fake_complete(body):
+    prompt = body["messages"][1]["content"]
+    if "broken" in prompt:
+        return completion('{"title": "Broken"}')
+    if "outage" in prompt:
+        raise RuntimeError("Service unavailable")
+    return completion('{"title": "Pasta", "ingredients": [], "steps": [{"step_number": 1, "description": "Boil"}]}')
+
+@pytest.fixture
+def recipe_generator():
+    with patch('openai.OpenAI'):
+        return RecipeGenerator("test_key", recipe_cache=RecipeCache(sqlite3.connect(":memory:", check_same_thread=False)))
+
+def test_batch_request_line():
+    line = json.loads(batch_request_line("video1", {"model": "gpt-3.5-turbo"}))
+    assert line == {"custom_id": "video1", "method": "POST", "url": BATCH_ENDPOINT, "body": {"model": "gpt-3.5-turbo"}}
+
+def test_write_batch_file(recipe_generator, tmp_path):
+    path = tmp_path / "job.jsonl"
+    keys, left_out = recipe_generator.write_batch_file([
+        TranscriptPayload(video_id="video1", text="boil the water. "),
+        TranscriptPayload(video_id="video1", text="boil the water. "),
+    ], path)
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["custom_id"] for line in lines] == ["video1"]
+    assert "boil the water" in lines[0]["body"]["messages"][1]["content"]
+    assert list(keys) == ["video1"]
+    assert left_out == []
+
+def test_run_batch_with_local_processor(recipe_generator, tmp_path):
+    stored = []
+    transcripts = [
+        TranscriptPayload(video_id="video1", text="boil the water. "),
+        TranscriptPayload(video_id="video2", text="broken. "),
+        TranscriptPayload(video_id="video3", text="outage. "),
+    ]
+
+    results = recipe_generator.run_batch(
+        transcripts, LocalBatchProcessor(fake_complete), tmp_path, on_result=stored.append
+    )
+
+    assert [video_id for video_id, _, _ in results] == ["video1", "video2", "video3"]
+    assert results[0][1].title == "Pasta"
+    assert results[0][1].video_id == "video1"
+    assert "Missing required field: ingredients" in results[1][2]
+    assert "Service unavailable" in results[2][2]
+    assert [recipe.video_id for recipe in stored] == ["video1"]
+
+    # A second run is served from the recipe cache without a new batch
+    processor = LocalBatchProcessor(Mock(side_effect=AssertionError("should not be called")))
+    again = recipe_generator.run_batch(transcripts[:1], processor, tmp_path)
+    assert again[0][1].title == "Pasta"
+
+def test_run_batch_records_usage(tmp_path):
+    tracker = UsageTracker()
+    with patch('openai.OpenAI'):
+        recipe_generator = RecipeGenerator("test_key", usage_tracker=tracker)
+
+    # fake_complete reports no usage, so the tokens are counted from the job file
+    recipe_generator.run_batch(
+        [TranscriptPayload(video_id="video1", text="boil the water. ")], LocalBatchProcessor(fake_complete), tmp_path
+    )
+
+    last_minute = tracker.last_minute()
+    assert last_minute["requests"] == 1
+    assert last_minute["prompt_tokens"] > 0 and last_minute["completion_tokens"] > 0
+
+def test_run_batch_times_out(recipe_generator, tmp_path):
+    processor = LocalBatchProcessor(fake_complete)
+    processor.status = lambda batch_id: "in_progress"
+    sleeps = []
+
+    with pytest.raises(RuntimeError, match="did not finish"):
+        recipe_generator.run_batch(
+            [TranscriptPayload(video_id="video1", text="boil the water. ")],
+            processor, tmp_path, poll_interval=10, timeout=30, sleep=sleeps.append,
+        )
+    assert sleeps == [10, 10, 10]
+
+def test_processor_must_implement_all_methods():
+    class SubmitOnly(BatchProcessor):
+        def submit(self, input_path):
+            return "batch_1"
+
+    with pytest.raises(TypeError):
+        SubmitOnly()
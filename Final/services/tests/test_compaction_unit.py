@@ -0,0 +1,88 @@
+from unittest.mock import Mock, patch
+from youtube_parser.compaction import (
+    TranscriptCompactor,
+    count_tokens,
+    split_into_chunks,
+    dedupe_overlaps,
+    strip_fillers,
+    strip_non_speech,
+)
+
+def test_strip_non_speech():
+    assert strip_non_speech(["[Music] add the garlic ♪", "(applause) stir"]) == [
+        "  add the garlic  ", "  stir"
+    ]
+
+def test_strip_fillers():
+    assert strip_fillers(["um so uh add the salt", "you know, stir it"]) == ["so add the salt", "stir it"]
+
+def test_dedupe_overlaps():
+    segments = [
+        "so today we're going",
+        "we're going to make pasta",
+        "we're going to make pasta",
+        "boil the water",
+    ]
+    assert dedupe_overlaps(segments) == ["so today we're going", "to make pasta", "boil the water"]
+
+def test_compact_reports_tokens():
+    compactor = TranscriptCompactor(token_budget=None)
+    text = "[Music]. um so today we're going. we're going to make pasta. [Music]. boil the water. "
+
+    compacted, stats = compactor.compact(text)
+
+    assert compacted == "so today we're going. to make pasta. boil the water. "
+    assert stats["tokens_before"] == count_tokens(text)
+    assert stats["tokens_after"] == count_tokens(compacted)
+    assert stats["tokens_after"] < stats["tokens_before"]
+    assert not stats["truncated"]
+    assert compactor.stats()["tokens_saved"] == stats["tokens_before"] - stats["tokens_after"]
+
+def test_compact_enforces_token_budget():
+    compactor = TranscriptCompactor(token_budget=50)
+    text = "".join(f"step {i} chop the onions finely. " for i in range(100))
+
+    compacted, stats = compactor.compact(text)
+
+    assert stats["truncated"]
+    assert stats["tokens_after"] <= 50
+    assert compacted.startswith("step 0 chop the onions finely. ")
+
+def test_default_budget_leaves_room_for_chunking():
+    # Above RecipeGenerator's default chunk threshold of 6000 tokens
+    text = "".join(f"step {i} chop the onions finely. " for i in range(1500))
+
+    _, stats = TranscriptCompactor().compact(text)
+
+    assert stats["tokens_before"] > 6000
+    assert not stats["truncated"]
+
+def test_custom_stages():
+    compactor = TranscriptCompactor(stages=[lambda segments: [s.upper() for s in segments]], token_budget=None)
+
+    compacted, _ = compactor.compact("add salt. ")
+
+    assert compacted == "ADD SALT. "
+
+def test_split_into_chunks_overlaps():
+    text = "".join(f"segment number {i}. " for i in range(40))
+    chunks = split_into_chunks(text, chunk_tokens=40, overlap_tokens=10)
+
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk) <= 40 for chunk in chunks)
+    assert "segment number 0." in chunks[0]
+    assert "segment number 39." in chunks[-1]
+    # Each chunk starts with segments repeated from the end of the previous one
+    for first, second in zip(chunks, chunks[1:]):
+        assert second.split(". ")[0] + ". " in first
+
+def test_split_into_chunks_short_text():
+    assert split_into_chunks("boil the water. ", chunk_tokens=100, overlap_tokens=10) == ["boil the water. "]
+
+def test_count_tokens_estimates_without_tokenizer_files():
+    tokenizer = Mock()
+    tokenizer.encoding_for_model.side_effect = ConnectionError("offline")
+    with patch("youtube_parser.compaction.tiktoken", tokenizer):
+        assert count_tokens("a" * 40, "offline-model") == 10
+        assert count_tokens("a" * 40, "offline-model") == 10
+    tokenizer.encoding_for_model.assert_called_once_with("offline-model")
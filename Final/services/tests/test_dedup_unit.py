@@ -0,0 +1,65 @@
+import random
+import sqlite3
+import pytest # type: ignore
+from youtube_parser.dedup import DuplicateIndex, shingle_hashes
+
+WORDS = ("boil the pasta in salted water then fry garlic in olive oil add chili flakes "
+         "and parsley toss everything together and serve with grated cheese").split()
+
+def transcript(seed, length=400):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+@pytest.fixture
+def index():
+    return DuplicateIndex(sqlite3.connect(":memory:", check_same_thread=False))
+
+def test_shingle_hashes():
+    assert shingle_hashes("") == []
+    assert len(shingle_hashes("one two three", shingle_size=5)) == 1
+    assert len(shingle_hashes("a b c d e f a b c d e f", shingle_size=5)) == 6
+
+def test_finds_near_duplicate(index):
+    original = transcript(1)
+    words = original.split()
+    words[50:55] = ["subscribe"] * 5
+
+    assert index.find_or_add("original", original) is None
+    duplicate = index.find_or_add("reupload", " ".join(words))
+
+    assert duplicate is not None
+    assert duplicate[0] == "original"
+    assert duplicate[1] >= 0.8
+    # Duplicates are not indexed themselves
+    assert index.stats()["entries"] == 1
+
+def test_ignores_different_transcripts_and_itself(index):
+    index.add("video1", transcript(1))
+
+    assert index.find("video2", transcript(2)) is None
+    assert index.find("video1", transcript(1)) is None
+    assert index.find_or_add("video1", transcript(1)) is None
+
+def test_signatures_persist(tmp_path):
+    db_path = tmp_path / "dedup.db"
+    DuplicateIndex(sqlite3.connect(db_path)).add("video1", transcript(1))
+
+    reopened = DuplicateIndex(sqlite3.connect(db_path))
+
+    assert reopened.find("video2", transcript(1)) == ("video1", 1.0)
+
+def test_bands_must_divide_num_perm():
+    with pytest.raises(ValueError):
+        DuplicateIndex(sqlite3.connect(":memory:"), num_perm=128, bands=24)
+
+def test_reuses_stored_signature(index):
+    index.add("video1", transcript(1))
+
+    assert index.signature_for("video1", "") == index.signature(transcript(1))
+    assert index.signature_for("video2", "") is None
+
+def test_short_transcript_signature_is_dense(index):
+    signature = index.signature("boil the pasta")
+
+    assert len(signature) == index.num_perm
+    assert len(set(signature)) == 1
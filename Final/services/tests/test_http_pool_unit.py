@@ -0,0 +1,61 @@
+import pytest # type: ignore
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from youtube_parser.http_pool import HttpPool
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"items": []}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def local_server():
+    server = HTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+def test_init_timeout():
+    pool = HttpPool(connect_timeout=3, read_timeout=30)
+    assert pool.timeout == (3, 30)
+    assert pool.stats() == {}
+    pool.close()
+
+def test_connections_are_reused(local_server):
+    pool = HttpPool()
+    for _ in range(5):
+        response = pool.get(local_server + "/youtube/v3/search", params={"q": "pasta"})
+        assert response.json() == {"items": []}
+
+    stats = pool.stats()
+    assert stats["127.0.0.1"] == {"requests": 5, "connections": 1, "reused": 4}
+    pool.close()
+
+def test_session_per_thread_shares_connections(local_server):
+    pool = HttpPool()
+    sessions = []
+
+    def fetch():
+        sessions.append(pool.session)
+        assert pool.session is sessions[-1]
+        pool.get(local_server + "/youtube/v3/search")
+
+    for _ in range(2):
+        thread = threading.Thread(target=fetch)
+        thread.start()
+        thread.join()
+
+    assert sessions[0] is not sessions[1]
+    assert pool.stats()["127.0.0.1"] == {"requests": 2, "connections": 1, "reused": 1}
+    pool.close()
@@ -0,0 +1,126 @@
+import asyncio
+import pytest # type: ignore
+import threading
+from fastapi import HTTPException # type: ignore
+from unittest.mock import Mock, patch
+from youtube_parser import main
+from youtube_parser.compaction import TranscriptCompactor, count_tokens
+from youtube_parser.recipe_cache import RecipeCache
+from youtube_parser.recipe_gen import RecipeGenerator
+from youtube_parser.routing import DEFAULT_ROUTES, ModelRouter
+from youtube_parser.types import QueryRequest, ScrapeRequest
+from youtube_parser.type import Recipe, TranscriptPayload
+
+def make_recipe_data(video_id, nutritional_info=None):
+    return {
+        "title": "Pasta",
+        "video_id": video_id,
+        "ingredients": [{"name": "Pasta", "quantity": "200g"}],
+        "steps": [{"step_number": 1, "description": "Boil"}],
+        "servings": None,
+        "prep_time": None,
+        "cook_time": None,
+        "nutritional_info": nutritional_info,
+    }
+
+@pytest.fixture
+def sqlite_backend(monkeypatch):
+    monkeypatch.setattr(main, "db_backend", "sqlite")
+    monkeypatch.setattr(main, "sqlite_conn", main._init_sqlite(":memory:"))
+
+def test_duplicate_linked_to_recipe_without_nutrition(sqlite_backend):
+    # The original was stored with NULL calories, protein, carbs and fat
+    main._store_recipe_sqlite("local-user", make_recipe_data("video1"))
+
+    linked = main._linked_recipe(TranscriptPayload(video_id="video2", duplicate_of="video1"), {})
+    assert linked is not None and linked["nutritional_info"] is None
+    main._persist_recipe(linked, None, "local-user")
+
+    assert main._fetch_recipe_by_video_sqlite("video2")["title"] == "Pasta"
+
+def test_scrape_channel_resolves_handle_off_event_loop(monkeypatch):
+    lookup_threads = []
+    scraper = Mock()
+    scraper.get_channel_id_by_handle.side_effect = lambda handle: lookup_threads.append(threading.get_ident()) or "UC1"
+    scraper.process_transcripts.return_value = []
+    monkeypatch.setattr(main, "_build_scraper", lambda language, quantity=50: scraper)
+
+    with pytest.raises(HTTPException):
+        asyncio.run(main.scrape_channel(ScrapeRequest(handle="@chef")))
+
+    assert lookup_threads and lookup_threads[0] != threading.get_ident()
+    scraper.process_transcripts.assert_called_once_with(type="channel_id", arg="UC1", video_filter=None)
+
+def test_scrape_query_classifies_off_event_loop(monkeypatch):
+    video = TranscriptPayload(video_id="video1", text="boil the water. ")
+    filter_threads = []
+    classifier = Mock()
+    classifier.filter.side_effect = lambda videos: filter_threads.append(threading.get_ident()) or (videos, [])
+    scraper = Mock()
+    scraper.process_transcripts.return_value = [video]
+
+    async def generate_recipes(videos):
+        return [make_recipe_data(v.video_id) for v in videos]
+
+    monkeypatch.setattr(main, "_build_scraper", lambda language, quantity=50: scraper)
+    monkeypatch.setattr(main, "recipe_classifier", classifier)
+    monkeypatch.setattr(main, "_generate_recipes", generate_recipes)
+
+    recipes = asyncio.run(main.scrape_query(QueryRequest(query="pasta")))
+
+    assert [recipe["video_id"] for recipe in recipes] == ["video1"]
+    assert filter_threads and filter_threads[0] != threading.get_ident()
+
+@patch('openai.OpenAI')
+def test_default_budget_keeps_long_transcript_whole(mock_openai, monkeypatch):
+    monkeypatch.delenv("TRANSCRIPT_TOKEN_BUDGET", raising=False)
+    mock_client = Mock()
+    mock_openai.return_value = mock_client
+    mock_client.chat.completions.create.return_value = Mock(
+        choices=[Mock(message=Mock(content='{"title": "Pasta", "ingredients": [], "steps": []}'))]
+    )
+    text = "".join(f"stir the pot {i}. " for i in range(10000))
+    assert count_tokens(text) > 30000
+
+    compactor = TranscriptCompactor(token_budget=main._transcript_token_budget(list(DEFAULT_ROUTES)))
+    recipe_generator = RecipeGenerator("test_key", compactor=compactor, model_router=ModelRouter())
+    recipe_generator.generate_recipe(TranscriptPayload(video_id="video1", text=text))
+
+    request = mock_client.chat.completions.create.call_args.kwargs
+    assert mock_client.chat.completions.create.call_count == 1
+    assert request["model"] == "gpt-4o-mini"
+    assert "stir the pot 9999." in request["messages"][1]["content"]
+
+def test_caches_get_their_own_connection(tmp_path):
+    db_path = str(tmp_path / "recipes.db")
+    recipe_conn = main._init_sqlite(db_path)
+    cache_conn = main._connect_cache(db_path)
+    assert cache_conn is not main._connect_cache(db_path)
+
+    cache = RecipeCache(cache_conn)
+    cache.put("key", Recipe.model_validate(make_recipe_data("video1")), tokens=1)
+
+    # A cache hit while a recipe is half inserted neither waits for nor commits it
+    recipe_conn.execute("INSERT INTO recipes (title, video_id) VALUES ('Pasta', 'video1');")
+    assert cache.get("key", "video2") is not None
+    recipe_conn.rollback()
+
+    assert main._connect_cache(db_path).execute("SELECT COUNT(*) FROM recipes;").fetchone()[0] == 0
+
+def test_finished_batch_jobs_expire(monkeypatch):
+    monkeypatch.setattr(main, "batch_jobs", {})
+    monkeypatch.setattr(main, "_get_recipe_generator", lambda: Mock(run_batch=Mock(return_value=[])))
+    monkeypatch.setattr(main, "_batch_processor", Mock)
+    monkeypatch.setenv("BATCH_JOB_TTL", "60")
+    main.batch_jobs["done"] = {"status": "queued", "stored": 0, "failed": {}, "error": None, "finished_at": None}
+    main.batch_jobs["running"] = {"status": "running", "stored": 0, "failed": {}, "error": None, "finished_at": None}
+
+    main._run_batch_job("done", [], "local-user")
+    finished_at = main.batch_jobs["done"]["finished_at"]
+    assert asyncio.run(main.get_batch_job("done"))["status"] == "completed"
+
+    main._evict_batch_jobs(finished_at + 61)
+
+    assert list(main.batch_jobs) == ["running"]
+    with pytest.raises(HTTPException):
+        asyncio.run(main.get_batch_job("done"))
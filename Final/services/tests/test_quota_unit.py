@@ -0,0 +1,50 @@
+import pytest # type: ignore
+import sqlite3
+from datetime import datetime
+from youtube_parser.quota import QuotaTracker, QuotaExceededError, PACIFIC
+
+@pytest.fixture
+def clock(clock):
+    # 2025-05-10 23:00 Pacific time
+    clock.now = datetime(2025, 5, 10, 23, 0, tzinfo=PACIFIC).timestamp()
+    return clock
+
+@pytest.fixture
+def conn():
+    return sqlite3.connect(":memory:", check_same_thread=False)
+
+def test_charge_uses_documented_costs(conn, clock):
+    quota = QuotaTracker(conn, daily_limit=10000, clock=clock)
+
+    quota.charge("search")
+    quota.charge("channels")
+    quota.charge("playlistItems")
+    quota.charge("videos")
+
+    assert quota.used() == 103
+    assert quota.remaining() == 9897
+
+def test_charge_refuses_over_limit(conn, clock):
+    quota = QuotaTracker(conn, daily_limit=150, clock=clock)
+    quota.charge("search")
+
+    assert not quota.can_afford("search")
+    assert quota.can_afford("videos", calls=50)
+    with pytest.raises(QuotaExceededError, match="search costs 100 units, 50 remaining"):
+        quota.charge("search")
+    assert quota.used() == 100
+
+def test_usage_is_persisted(conn, clock):
+    QuotaTracker(conn, clock=clock).charge("search")
+
+    assert QuotaTracker(conn, clock=clock).used() == 100
+
+def test_resets_at_midnight_pacific(conn, clock):
+    quota = QuotaTracker(conn, clock=clock)
+    quota.charge("search")
+
+    assert quota.reset_time() == datetime(2025, 5, 11, 0, 0, tzinfo=PACIFIC)
+    clock.now += 2 * 3600
+
+    assert quota.used() == 0
+    assert quota.stats()["quota_remaining"] == 10000
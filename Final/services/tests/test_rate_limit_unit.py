@@ -0,0 +1,36 @@
+import asyncio
+import pytest # type: ignore
+from youtube_parser.rate_limit import RateLimiter
+
+def test_request_limit(clock):
+    limiter = RateLimiter(requests_per_minute=2, clock=clock)
+
+    assert limiter.reserve(10) == 0
+    assert limiter.reserve(10) == 0
+    assert limiter.reserve(10) == pytest.approx(30.0)
+
+    clock.now += 30
+    assert limiter.reserve(10) == 0
+
+def test_token_limit(clock):
+    limiter = RateLimiter(tokens_per_minute=600, clock=clock)
+
+    assert limiter.reserve(500) == 0
+    assert limiter.reserve(200) == pytest.approx(10.0)
+    # Calls above the limit wait for a full bucket instead of forever
+    clock.now += 60
+    assert limiter.reserve(1000) == 0
+
+def test_unlimited():
+    limiter = RateLimiter()
+    assert all(limiter.reserve(10 ** 6) == 0 for _ in range(100))
+    assert limiter.stats()["requests_available"] is None
+
+def test_async_acquire_waits():
+    limiter = RateLimiter(requests_per_minute=600)
+    for _ in range(600):
+        limiter.reserve(0)
+
+    asyncio.run(limiter.acquire(0))
+
+    assert limiter.stats()["waits"] >= 1
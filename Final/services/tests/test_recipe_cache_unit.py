@@ -0,0 +1,76 @@
+import pytest # type: ignore
+import sqlite3
+from youtube_parser.recipe_cache import RecipeCache, recipe_cache_key
+from youtube_parser.type import Recipe
+
+def make_recipe(title="Pasta"):
+    return Recipe.model_validate({"title": title, "video_id": "video1", "ingredients": [], "steps": []})
+
+@pytest.fixture
+def conn():
+    return sqlite3.connect(":memory:", check_same_thread=False)
+
+def test_key_depends_on_every_input():
+    base = ("text", "system", "extract", "gpt-3.5-turbo", 0.7)
+    keys = {recipe_cache_key(*base)}
+    for i, changed in enumerate(["text2", "system2", "extract2", "gpt-4o-mini", 0.2]):
+        args = list(base)
+        args[i] = changed
+        keys.add(recipe_cache_key(*args))
+    assert len(keys) == 6
+
+def test_hit_sets_video_id_and_counts_tokens(conn, clock):
+    cache = RecipeCache(conn, clock=clock)
+    assert cache.get("key", "video1") is None
+
+    cache.put("key", make_recipe(), tokens=500)
+    recipe = cache.get("key", "video2")
+
+    assert recipe.title == "Pasta"
+    assert recipe.video_id == "video2"
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["saved_tokens"] == 500
+    assert stats["bytes"] > 0
+
+def test_ttl_expiry(conn, clock):
+    cache = RecipeCache(conn, ttl_seconds=60, clock=clock)
+    cache.put("key", make_recipe(), tokens=1)
+    clock.now += 61
+    assert cache.get("key", "video1") is None
+
+def test_lru_eviction(conn, clock):
+    size = len(make_recipe("a").model_dump_json())
+    cache = RecipeCache(conn, max_bytes=2 * size, clock=clock)
+    cache.put("a", make_recipe("a"), tokens=1)
+    clock.now += 1
+    cache.put("b", make_recipe("b"), tokens=1)
+    clock.now += 1
+    cache.get("a", "video1")
+    clock.now += 1
+    cache.put("c", make_recipe("c"), tokens=1)
+
+    assert cache.get("b", "video1") is None
+    assert cache.get("a", "video1") is not None
+    assert cache.stats()["evictions"] == 1
+
+def test_prompt_version_bump_invalidates(conn, clock):
+    RecipeCache(conn, prompt_version="1", clock=clock).put("key", make_recipe(), tokens=1)
+
+    cache = RecipeCache(conn, prompt_version="2", clock=clock)
+
+    assert cache.get("key", "video1") is None
+    assert cache.stats()["entries"] == 0
+
+def test_hit_does_not_write_until_next_put(conn, clock):
+    cache = RecipeCache(conn, clock=clock)
+    cache.put("a", make_recipe("a"), tokens=1)
+    changes = conn.total_changes
+
+    clock.now += 1
+    assert cache.get("a", "video1") is not None
+    assert conn.total_changes == changes
+
+    cache.put("b", make_recipe("b"), tokens=1)
+    assert conn.execute("SELECT accessed_at FROM recipe_cache WHERE key = 'a';").fetchone()[0] == clock.now
@@ -0,0 +1,35 @@
+from youtube_parser.recipe_classifier import RecipeClassifier, recipe_likelihood
+from youtube_parser.type import TranscriptPayload
+
+RECIPE = TranscriptPayload(
+    video_id="recipe",
+    title="Banana Bread Recipe",
+    text="preheat the oven to 350 degrees. mash 3 bananas, add 1 cup sugar, 2 eggs and melted butter. "
+         "mix in 2 cups flour and baking soda. bake for 60 minutes",
+)
+VLOG = TranscriptPayload(
+    video_id="vlog",
+    title="Q&A answering your questions",
+    text="someone asked what my favorite food is and honestly I love chicken and rice. "
+         "next question is about my camera gear and how I edit my videos",
+)
+
+def test_recipe_likelihood():
+    assert recipe_likelihood(RECIPE.title, RECIPE.text) > 0.8
+    assert recipe_likelihood(VLOG.title, VLOG.text) < 0.3
+    assert recipe_likelihood("", "") == 0.0
+
+def test_filter_skips_unlikely_recipes():
+    classifier = RecipeClassifier(threshold=0.3)
+
+    kept, skipped = classifier.filter([RECIPE, VLOG])
+
+    assert [v.video_id for v in kept] == ["recipe"]
+    assert [v.video_id for v in skipped] == ["vlog"]
+    assert classifier.stats()["skipped"] == 1
+    assert classifier.stats()["skip_rate"] == 0.5
+
+def test_filter_keeps_other_languages_and_disabled():
+    german = VLOG.model_copy(update={"language_code": "de"})
+    assert RecipeClassifier().filter([german])[0] == [german]
+    assert RecipeClassifier(threshold=0).filter([VLOG])[0] == [VLOG]
@@ -1,8 +1,19 @@
 import pytest # type: ignore
 from dotenv import load_dotenv # type: ignore
+import asyncio
 import os
-from youtube_parser.recipe_gen import RecipeGenerator
-from youtube_parser.type import Recipe, Ingredient, InstructionStep
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from youtube_parser.recipe_gen import RecipeGenerator, merge_partial_recipes
+from youtube_parser.type import Recipe, Ingredient, InstructionStep, TranscriptPayload
+from youtube_parser.compaction import TranscriptCompactor, count_tokens
+from youtube_parser.usage import UsageTracker
+from youtube_parser.recipe_cache import RecipeCache
+from youtube_parser.routing import ModelRouter
 import openai # type: ignore
 from unittest.mock import patch, Mock
 
@@ -172,3 +183,370 @@ def test_recipe_missing_fields(recipe_generator):
     
     with pytest.raises(RuntimeError, match="Nutritional info not set in recipe"):
         recipe_generator.receive_nutritional_info()
+
+@patch('openai.OpenAI')
+def test_generate_recipe_compacts_transcript(mock_openai):
+    mock_client = Mock()
+    mock_openai.return_value = mock_client
+    mock_response = Mock()
+    mock_response.choices = [Mock(message=Mock(content='{"title": "Pasta", "ingredients": [], "steps": []}'))]
+    mock_client.chat.completions.create.return_value = mock_response
+
+    compactor = TranscriptCompactor(token_budget=None)
+    recipe_generator = RecipeGenerator("test_key", compactor=compactor)
+    transcript = str({"video_id": "video1", "snippets": "[Music]. um boil the water. boil the water. "})
+    recipe = recipe_generator.generate_recipe(transcript)
+
+    assert recipe.video_id == "video1"
+    prompt = mock_client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+    assert "[Music]" not in prompt
+    assert prompt.count("boil the water") == 1
+    assert compactor.stats()["tokens_after"] < compactor.stats()["tokens_before"]
+
+@patch('openai.OpenAI')
+def test_generate_recipe_chunks_long_transcript(mock_openai):
+    mock_client = Mock()
+    mock_openai.return_value = mock_client
+    partials = [
+        '{"title": "Pasta", "ingredients": [{"name": "Pasta", "quantity": "200g"}], '
+        '"steps": [{"step_number": 1, "description": "Boil the water"}]}',
+        '{"title": "", "ingredients": [{"name": "pasta", "quantity": ""}, {"name": "Salt", "quantity": "1 tsp"}], '
+        '"steps": [{"step_number": 1, "description": "Boil the water."}, {"step_number": 2, "description": "Add the pasta"}]}',
+    ]
+    mock_client.chat.completions.create.side_effect = [
+        Mock(choices=[Mock(message=Mock(content=content))]) for content in partials
+    ]
+
+    recipe_generator = RecipeGenerator(
+        "test_key", chunk_threshold_tokens=20, chunk_tokens=40, chunk_overlap_tokens=0, chunk_workers=1
+    )
+    snippets = "".join(f"this is transcript line {i}. " for i in range(8))
+    recipe = recipe_generator.generate_recipe(str({"video_id": "video1", "snippets": snippets}))
+
+    assert mock_client.chat.completions.create.call_count == 2
+    assert recipe.title == "Pasta"
+    assert [(i.name, i.quantity) for i in recipe.ingredients] == [("Pasta", "200g"), ("Salt", "1 tsp")]
+    assert [(s.step_number, s.description) for s in recipe.steps] == [(1, "Boil the water"), (2, "Add the pasta")]
+
+def test_merge_partial_recipes_fills_missing_fields():
+    recipe = merge_partial_recipes("video1", [
+        {"title": "Soup", "ingredients": [{"name": "Leek", "quantity": ""}], "steps": [], "servings": None},
+        {"ingredients": [{"name": "leek", "quantity": "2"}], "steps": ["Chop the leek"], "servings": "4"},
+    ])
+
+    assert recipe.ingredients[0].quantity == "2"
+    assert recipe.steps[0].description == "Chop the leek"
+    assert recipe.servings == "4"
+
+@patch('openai.OpenAI')
+def test_prompts_hot_reload(mock_openai, tmp_path):
+    prompts_dir = Path(__file__).parent.parent / "youtube_parser" / "prompts"
+    for prompt_file in RecipeGenerator.PROMPT_FILES.values():
+        shutil.copy(prompts_dir / prompt_file, tmp_path / prompt_file)
+
+    recipe_generator = RecipeGenerator("test_key", prompts_dir=tmp_path, prompt_reload_interval=0)
+    assert recipe_generator.reload_prompts_if_changed() is False
+
+    system_file = tmp_path / "recipe_system.txt"
+    system_file.write_text("New system prompt")
+    os.utime(system_file, (time.time() + 10, time.time() + 10))
+
+    assert recipe_generator.reload_prompts_if_changed() is True
+    assert recipe_generator.system_prompt == "New system prompt"
+    assert mock_openai.call_count == 1
+
+@patch('openai.AsyncOpenAI')
+@patch('openai.OpenAI')
+def test_agenerate_recipes_concurrently(mock_openai, mock_async_openai):
+    in_flight = 0
+    peak = 0
+
+    async def create(**kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if "bad" in kwargs["messages"][1]["content"]:
+            return Mock(choices=[Mock(message=Mock(content=""))])
+        return Mock(choices=[Mock(message=Mock(content='{"title": "Pasta", "ingredients": [], "steps": []}'))])
+
+    mock_async_openai.return_value.chat.completions.create = create
+    recipe_generator = RecipeGenerator("test_key", max_concurrency=2)
+    transcripts = [
+        str({"video_id": f"video{i}", "snippets": "bad. " if i == 3 else "boil the water. "})
+        for i in range(6)
+    ]
+
+    async def collect():
+        return [result async for result in recipe_generator.agenerate_recipes(transcripts)]
+
+    results = sorted(asyncio.run(collect()), key=lambda result: result[0])
+
+    assert peak == 2
+    assert [recipe.video_id for _, recipe, _ in results if recipe] == ["video0", "video1", "video2", "video4", "video5"]
+    assert results[3][1] is None
+    assert "Empty response from OpenAI" in results[3][2]
+    mock_openai.return_value.chat.completions.create.assert_not_called()
+
+@patch('openai.AsyncOpenAI')
+@patch('openai.OpenAI')
+def test_agenerate_recipe_caches_off_event_loop(mock_openai, mock_async_openai):
+    async def create(**kwargs):
+        return Mock(choices=[Mock(message=Mock(content='{"title": "Pasta", "ingredients": [], "steps": []}'))])
+
+    mock_async_openai.return_value.chat.completions.create = create
+    cache = RecipeCache(sqlite3.connect(":memory:", check_same_thread=False))
+    recipe_generator = RecipeGenerator("test_key", recipe_cache=cache)
+    loop_thread = threading.get_ident()
+    cache_threads = []
+    get, put = cache.get, cache.put
+    cache.get = lambda *args: cache_threads.append(threading.get_ident()) or get(*args)
+    cache.put = lambda *args: cache_threads.append(threading.get_ident()) or put(*args)
+
+    transcript = TranscriptPayload(video_id="video1", text="boil the water. ")
+    first = asyncio.run(recipe_generator.agenerate_recipe(transcript))
+    second = asyncio.run(recipe_generator.agenerate_recipe(transcript))
+
+    assert second == first
+    assert len(cache_threads) == 3
+    assert loop_thread not in cache_threads
+
+@patch('openai.OpenAI')
+def test_generate_recipe_uses_response_cache(mock_openai):
+    mock_client = Mock()
+    mock_openai.return_value = mock_client
+    mock_client.chat.completions.create.return_value = Mock(
+        choices=[Mock(message=Mock(content='{"title": "Pasta", "ingredients": [], "steps": []}'))]
+    )
+    cache = RecipeCache(sqlite3.connect(":memory:", check_same_thread=False))
+    recipe_generator = RecipeGenerator("test_key", recipe_cache=cache)
+
+    first = recipe_generator.generate_recipe(str({"video_id": "video1", "snippets": "boil the water. "}))
+    second = recipe_generator.generate_recipe(str({"video_id": "video2", "snippets": "boil the water. "}))
+
+    assert mock_client.chat.completions.create.call_count == 1
+    assert (first.title, second.title) == ("Pasta", "Pasta")
+    assert second.video_id == "video2"
+    assert cache.stats()["hits"] == 1
+
+@patch('openai.OpenAI')
+def test_generate_recipe_from_payload(mock_openai):
+    mock_client = Mock()
+    mock_openai.return_value = mock_client
+    mock_client.chat.completions.create.return_value = Mock(
+        choices=[Mock(message=Mock(content='{"title": "Pasta", "ingredients": [], "steps": []}'))]
+    )
+
+    recipe_generator = RecipeGenerator("test_key")
+    recipe = recipe_generator.generate_recipe(TranscriptPayload(video_id="video1", text="boil the water. "))
+
+    assert recipe.video_id == "video1"
+    prompt = mock_client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+    assert "boil the water" in prompt
+
+@patch('openai.OpenAI')
+def test_transcript_string_is_not_executed(mock_openai):
+    recipe_generator = RecipeGenerator("test_key")
+    with pytest.raises(ValueError, match="Invalid transcript data format"):
+        recipe_generator.generate_recipe("__import__('os').getcwd()")
+    with pytest.raises(ValueError, match="missing video_id"):
+        recipe_generator.generate_recipe(str({"snippets": "boil the water. "}))
+
+@pytest.mark.parametrize("content, message", [
+    ('{"ingredients": [], "steps": []}', "Missing required field: title"),
+    ('{"title": "Pasta", "ingredients": [], "steps": {}}', "'steps' must be an array"),
+    ('{"title": "Pasta", "ingredients": [], "steps": [{"description": "Boil"}]}',
+     "Each step must be an object with 'step_number' and 'description'"),
+    ('{"title": "Pasta", "ingredients": [], "steps": [{"step_number": "1", "description": "Boil"}]}',
+     "step_number must be an integer"),
+    ('{"title": "Pasta"', "Invalid JSON response from OpenAI"),
+])
+@patch('openai.OpenAI')
+def test_response_validation_errors(mock_openai, content, message):
+    mock_client = Mock()
+    mock_openai.return_value = mock_client
+    mock_client.chat.completions.create.return_value = Mock(choices=[Mock(message=Mock(content=content))])
+
+    recipe_generator = RecipeGenerator("test_key")
+    with pytest.raises(RuntimeError, match=re.escape(message)):
+        recipe_generator.generate_recipe(TranscriptPayload(video_id="video1", text="boil the water. "))
+    assert recipe_generator.validation_stats()["validations"] == 1
+
+@patch('openai.OpenAI')
+def test_parsed_recipe_round_trips(mock_openai):
+    mock_client = Mock()
+    mock_openai.return_value = mock_client
+    content = ('{"title": "Pasta", "ingredients": [{"name": "Pasta", "quantity": "200g"}], '
+               '"steps": [{"step_number": 1, "description": "Boil"}], "nutritional_info": {"calories": 400}}')
+    mock_client.chat.completions.create.return_value = Mock(choices=[Mock(message=Mock(content=content))])
+
+    recipe_generator = RecipeGenerator("test_key")
+    recipe = recipe_generator.generate_recipe(TranscriptPayload(video_id="video1", text="boil the water. "))
+
+    assert type(recipe.steps[0]) is InstructionStep
+    assert recipe == Recipe.model_validate(recipe.model_dump())
+
+@patch('openai.OpenAI')
+def test_stream_recipe(mock_openai):
+    mock_client = Mock()
+    mock_openai.return_value = mock_client
+    content = ('{"title": "Pasta", "ingredients": [{"name": "Pasta", "quantity": "200g"}], '
+               '"steps": [{"step_number": 1, "description": "Boil"}]}')
+    mock_client.chat.completions.create.return_value = iter([
+        Mock(choices=[Mock(delta=Mock(content=content[i:i + 7]))]) for i in range(0, len(content), 7)
+    ])
+
+    recipe_generator = RecipeGenerator("test_key")
+    events = list(recipe_generator.stream_recipe(TranscriptPayload(video_id="video1", text="boil the water. ")))
+
+    assert [event for event, _ in events] == ["title", "ingredient", "step", "recipe"]
+    assert events[0][1] == "Pasta"
+    assert events[-1][1].video_id == "video1"
+    assert mock_client.chat.completions.create.call_args.kwargs["stream"] is True
+
+@patch('openai.OpenAI')
+def test_stream_recipe_invalid_response(mock_openai):
+    mock_client = Mock()
+    mock_openai.return_value = mock_client
+    mock_client.chat.completions.create.return_value = iter([
+        Mock(choices=[Mock(delta=Mock(content='{"title": "Pasta"}'))])
+    ])
+
+    recipe_generator = RecipeGenerator("test_key")
+    stream = recipe_generator.stream_recipe(TranscriptPayload(video_id="video1", text="boil the water. "))
+
+    assert next(stream) == ("title", "Pasta")
+    with pytest.raises(RuntimeError, match="Missing required field: ingredients"):
+        next(stream)
+
+@patch('openai.OpenAI')
+def test_generate_recipe_records_usage(mock_openai):
+    mock_client = Mock()
+    mock_openai.return_value = mock_client
+    mock_client.chat.completions.create.return_value = Mock(
+        choices=[Mock(message=Mock(content='{"title": "Pasta", "ingredients": [], "steps": []}'))],
+        usage=Mock(prompt_tokens=120, completion_tokens=30),
+    )
+    tracker = UsageTracker()
+
+    recipe_generator = RecipeGenerator("test_key", usage_tracker=tracker)
+    recipe_generator.generate_recipe(TranscriptPayload(video_id="video1", text="boil the water. "))
+
+    assert tracker.last_minute() == {"requests": 1, "prompt_tokens": 120, "completion_tokens": 30, "total_tokens": 150}
+
+@patch('openai.OpenAI')
+def test_prompt_token_budget(mock_openai):
+    mock_client = Mock()
+    mock_openai.return_value = mock_client
+    mock_client.chat.completions.create.return_value = Mock(
+        choices=[Mock(message=Mock(content='{"title": "Pasta", "ingredients": [], "steps": []}'))]
+    )
+    long_transcript = TranscriptPayload(video_id="video1", text="".join(f"line {i}. " for i in range(2000)))
+
+    rejecting = RecipeGenerator("test_key", prompt_token_budget=1000, over_budget="reject")
+    with pytest.raises(ValueError, match="exceeds the budget of 1000 tokens"):
+        rejecting.generate_recipe(long_transcript)
+    mock_client.chat.completions.create.assert_not_called()
+
+    compressing = RecipeGenerator("test_key", prompt_token_budget=1000)
+    compressing.generate_recipe(long_transcript)
+    request = mock_client.chat.completions.create.call_args.kwargs
+    assert sum(count_tokens(m["content"]) for m in request["messages"]) <= 1000
+
+@patch('openai.OpenAI')
+def test_prompt_token_budget_counts_with_routed_model(mock_openai):
+    mock_client = Mock()
+    mock_openai.return_value = mock_client
+    mock_client.chat.completions.create.return_value = Mock(
+        choices=[Mock(message=Mock(content='{"title": "Pasta", "ingredients": [], "steps": []}'))]
+    )
+    long_transcript = TranscriptPayload(video_id="video1", text="".join(f"line {i}. " for i in range(2000)))
+    router = ModelRouter([(100000, "gpt-4o-mini")])
+
+    recipe_generator = RecipeGenerator("test_key", model_router=router, prompt_token_budget=1000)
+    with patch("youtube_parser.recipe_gen.count_tokens", wraps=count_tokens) as counted:
+        recipe_generator.generate_recipe(long_transcript)
+
+    request = mock_client.chat.completions.create.call_args.kwargs
+    assert request["model"] == "gpt-4o-mini"
+    assert "gpt-4o-mini" in {call.args[1] for call in counted.call_args_list if len(call.args) > 1}
+    assert sum(count_tokens(m["content"], "gpt-4o-mini") for m in request["messages"]) <= 1000
+
+@patch('openai.OpenAI')
+def test_generate_recipe_falls_back_to_next_model(mock_openai):
+    mock_client = Mock()
+    mock_openai.return_value = mock_client
+    mock_client.chat.completions.create.side_effect = [
+        Mock(choices=[Mock(message=Mock(content='{"title": "Pasta"}'))]),
+        Mock(choices=[Mock(message=Mock(content='{"title": "Pasta", "ingredients": [], "steps": []}'))]),
+    ]
+    router = ModelRouter([(100, "small-model"), (1000, "large-model")], fallback_model="fallback-model")
+
+    recipe_generator = RecipeGenerator("test_key", model_router=router)
+    recipe = recipe_generator.generate_recipe(TranscriptPayload(video_id="video1", text="boil the water. "))
+
+    assert recipe.title == "Pasta"
+    models = [call.kwargs["model"] for call in mock_client.chat.completions.create.call_args_list]
+    assert models == ["small-model", "fallback-model"]
+    stats = router.stats()
+    assert (stats["small-model"]["failures"], stats["fallback-model"]["fallbacks"]) == (1, 1)
+
+@patch('openai.OpenAI')
+def test_recipe_is_kept_per_thread(mock_openai):
+    mock_client = Mock()
+    mock_openai.return_value = mock_client
+    mock_client.chat.completions.create.return_value = Mock(
+        choices=[Mock(message=Mock(content='{"title": "Pasta", "ingredients": [], "steps": []}'))]
+    )
+    recipe_generator = RecipeGenerator("test_key")
+
+    recipe_generator.generate_recipe(TranscriptPayload(video_id="video1", text="boil the water. "))
+    thread = threading.Thread(
+        target=recipe_generator.generate_recipe,
+        args=(TranscriptPayload(video_id="video2", text="boil the water. "),),
+    )
+    thread.start()
+    thread.join()
+
+    assert recipe_generator.recipe.video_id == "video1"
+
+@patch('openai.OpenAI')
+def test_long_transcript_routed_to_large_context_model(mock_openai):
+    mock_client = Mock()
+    mock_openai.return_value = mock_client
+    mock_client.chat.completions.create.return_value = Mock(
+        choices=[Mock(message=Mock(content='{"title": "Pasta", "ingredients": [], "steps": []}'))]
+    )
+    transcript = TranscriptPayload(video_id="video1", text="".join(f"stir the pot {i}. " for i in range(3000)))
+    assert count_tokens(transcript.text) > 12000
+
+    recipe_generator = RecipeGenerator("test_key", model_router=ModelRouter())
+    recipe = recipe_generator.generate_recipe(transcript)
+
+    assert recipe.video_id == "video1"
+    assert mock_client.chat.completions.create.call_count == 1
+    assert mock_client.chat.completions.create.call_args.kwargs["model"] == "gpt-4o-mini"
+
+@patch('openai.OpenAI')
+def test_transcript_tokenized_once_per_model(mock_openai):
+    mock_client = Mock()
+    mock_openai.return_value = mock_client
+    mock_client.chat.completions.create.return_value = Mock(
+        choices=[Mock(message=Mock(content='{"title": "Pasta", "ingredients": [], "steps": []}'))],
+        usage=None,
+    )
+    transcript = TranscriptPayload(video_id="video1", text="".join(f"stir the pot {i}. " for i in range(3000)))
+
+    recipe_generator = RecipeGenerator(
+        "test_key",
+        compactor=TranscriptCompactor(token_budget=None),
+        model_router=ModelRouter(),
+        recipe_cache=RecipeCache(sqlite3.connect(":memory:", check_same_thread=False)),
+        usage_tracker=UsageTracker(),
+    )
+    with patch("youtube_parser.recipe_gen.count_tokens", wraps=count_tokens) as counted:
+        recipe_generator.generate_recipe(transcript)
+
+    models = [call.args[1] for call in counted.call_args_list if call.args[0] == transcript.text]
+    assert models and len(models) == len(set(models))
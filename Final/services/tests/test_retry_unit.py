@@ -0,0 +1,80 @@
+import pytest # type: ignore
+from unittest.mock import Mock
+from youtube_parser.retry import (
+    RetryPolicy,
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryableHTTPError,
+    parse_retry_after,
+)
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") is None
+
+def test_backoff_is_capped_exponential_with_jitter():
+    policy = RetryPolicy(base_delay=1.0, max_delay=4.0)
+    for attempt in range(6):
+        delay = policy.backoff(attempt)
+        assert 0 <= delay <= min(4.0, 2 ** attempt)
+    assert policy.backoff(0, retry_after=3) >= 3
+    assert policy.backoff(0, retry_after=60) == 4.0
+
+def test_call_retries_then_succeeds():
+    sleeps = []
+    policy = RetryPolicy(sleep=sleeps.append)
+    fn = Mock(side_effect=[RetryableHTTPError(503), RetryableHTTPError(500), "ok"])
+
+    assert policy.call("search", fn) == "ok"
+    assert fn.call_count == 3
+    assert len(sleeps) == 2
+    assert policy.stats()["retries"] == 2
+    assert policy.stats()["retry_seconds"] == round(sum(sleeps), 3)
+    assert policy.breaker.stats()["search"]["retries"] == 2
+
+def test_call_does_not_retry_non_retryable():
+    policy = RetryPolicy(sleep=lambda delay: None)
+    fn = Mock(side_effect=ValueError("bad request"))
+
+    with pytest.raises(ValueError):
+        policy.call("search", fn, retryable=lambda e: not isinstance(e, ValueError))
+    assert fn.call_count == 1
+    assert policy.breaker.stats() == {}
+
+def test_call_gives_up_after_max_attempts():
+    policy = RetryPolicy(max_attempts=3, sleep=lambda delay: None)
+    fn = Mock(side_effect=RetryableHTTPError(503))
+
+    with pytest.raises(RetryableHTTPError):
+        policy.call("videos", fn)
+    assert fn.call_count == 3
+
+def test_retry_budget_is_shared_across_calls():
+    policy = RetryPolicy(max_attempts=4, retry_budget=2, sleep=lambda delay: None)
+    fn = Mock(side_effect=RetryableHTTPError(503))
+
+    with pytest.raises(RetryableHTTPError):
+        policy.call("videos", fn)
+    with pytest.raises(RetryableHTTPError):
+        policy.call("videos", fn)
+    # 3 attempts for the first call (2 retries), then no retries left
+    assert fn.call_count == 4
+    assert policy.stats()["budget_remaining"] == 0
+
+def test_circuit_breaker_opens_and_half_opens(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+    policy = RetryPolicy(max_attempts=1, breaker=breaker)
+    failing = Mock(side_effect=RetryableHTTPError(503))
+
+    for _ in range(2):
+        with pytest.raises(RetryableHTTPError):
+            policy.call("search", failing)
+    with pytest.raises(CircuitOpenError):
+        policy.call("search", failing)
+    assert failing.call_count == 2
+    assert breaker.stats()["search"]["state"] == "open"
+
+    clock.now += 31
+    assert policy.call("search", lambda: "ok") == "ok"
+    assert breaker.stats()["search"]["state"] == "closed"
@@ -0,0 +1,33 @@
+import pytest # type: ignore
+from youtube_parser.routing import ModelRouter, parse_routes
+
+def test_route_by_transcript_size():
+    router = ModelRouter([(12000, "gpt-3.5-turbo"), (120000, "gpt-4o-mini")], fallback_model="gpt-4o-mini")
+
+    assert router.route(500) == ["gpt-3.5-turbo", "gpt-4o-mini"]
+    # No duplicate fallback, and the last route takes anything longer
+    assert router.route(50000) == ["gpt-4o-mini"]
+    assert router.route(500000) == ["gpt-4o-mini"]
+
+def test_route_by_language():
+    router = ModelRouter([(12000, "gpt-3.5-turbo")], fallback_model=None, multilingual_model="gpt-4o")
+
+    assert router.route(500, "en-US") == ["gpt-3.5-turbo"]
+    assert router.route(500, None) == ["gpt-3.5-turbo"]
+    assert router.route(500, "de") == ["gpt-4o"]
+
+def test_record_stats():
+    router = ModelRouter()
+    router.record("gpt-3.5-turbo", 0.2, ok=False)
+    router.record("gpt-4o-mini", 0.4, ok=True, fallback=True)
+    router.record("gpt-4o-mini", 0.6, ok=True)
+
+    assert router.stats() == {
+        "gpt-3.5-turbo": {"requests": 1, "failures": 1, "fallbacks": 0, "avg_latency_ms": 200.0},
+        "gpt-4o-mini": {"requests": 2, "failures": 0, "fallbacks": 1, "avg_latency_ms": 500.0},
+    }
+
+def test_parse_routes():
+    assert parse_routes("12000:gpt-3.5-turbo, 120000:gpt-4o-mini") == [(12000, "gpt-3.5-turbo"), (120000, "gpt-4o-mini")]
+    with pytest.raises(ValueError):
+        parse_routes("gpt-4o")
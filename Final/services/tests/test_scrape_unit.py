@@ -1,7 +1,28 @@
 import pytest # type: ignore
 from unittest.mock import Mock, patch
-from youtube_parser.yt_scrape import YouTubeScraper
-from youtube_parser.type import FetchedTranscript, FetchedTranscriptSnippet
+import sqlite3
+import threading
+import time
+from youtube_parser.yt_scrape import YouTubeScraper, is_retryable, parse_duration
+from youtube_transcript_api import TranscriptsDisabled, VideoUnavailable # type: ignore
+from youtube_parser.transcript_cache import TranscriptCache
+from youtube_parser.dedup import DuplicateIndex
+from youtube_parser.quota import QuotaTracker, QuotaExceededError
+from youtube_parser.retry import RetryPolicy, CircuitBreaker
+from youtube_transcript_api import Transcript, TranscriptList, NoTranscriptFound # type: ignore
+from youtube_transcript_api._transcripts import _TranslationLanguage # type: ignore
+from youtube_parser.type import FetchedTranscript, FetchedTranscriptSnippet, TranscriptPayload, VideoFilter
+
+def make_transcript_list(manual=(), generated=(), translatable=False):
+    translation_languages = [_TranslationLanguage(language="English", language_code="en")] if translatable else []
+    def transcript(code, is_generated):
+        return Transcript(Mock(), "video1", f"https://example.com/{code}", code, code, is_generated, translation_languages)
+    return TranscriptList(
+        "video1",
+        {code: transcript(code, False) for code in manual},
+        {code: transcript(code, True) for code in generated},
+        translation_languages,
+    )
 
 @pytest.fixture
 def youtube_scraper():
@@ -87,21 +108,82 @@ def test_fetch_videos_by_query(mock_get, youtube_scraper):
 
 @patch('youtube_parser.yt_scrape.requests.get')
 def test_fetch_channel_videos_by_id(mock_get, youtube_scraper):
-    mock_response = Mock()
-    mock_response.json.return_value = {
+    channel_response = Mock()
+    channel_response.json.return_value = {
         "items": [
             {
-                "id": {"videoId": "video1"},
-                "snippet": {"title": "Title 1"}
+                "id": "channel123",
+                "contentDetails": {"relatedPlaylists": {"uploads": "UUchannel123"}}
             }
         ]
     }
-    mock_get.return_value = mock_response
+    playlist_response = Mock()
+    playlist_response.json.return_value = {
+        "items": [
+            {
+                "snippet": {"title": "Title 1", "resourceId": {"videoId": "video1"}}
+            },
+            {
+                "snippet": {"title": "Private video", "resourceId": {"videoId": "video2"}}
+            }
+        ]
+    }
+    mock_get.side_effect = [channel_response, playlist_response]
     
     results = youtube_scraper.fetch_channel_videos_by_id("channel123")
     
     assert len(results) == 1
     assert results[0] == ("video1", "Title 1")
+    assert mock_get.call_count == 2
+    assert mock_get.call_args_list[0].args[0].endswith("/channels")
+    assert mock_get.call_args_list[1].args[0].endswith("/playlistItems")
+    assert mock_get.call_args_list[1].kwargs["params"]["playlistId"] == "UUchannel123"
+
+@patch('youtube_parser.yt_scrape.requests.get')
+def test_fetch_channel_videos_by_id_falls_back_to_search(mock_get, youtube_scraper):
+    channel_response = Mock()
+    channel_response.json.return_value = {
+        "items": [
+            {
+                "id": "channel123",
+                "contentDetails": {"relatedPlaylists": {"uploads": "UUchannel123"}}
+            }
+        ]
+    }
+    playlist_response = Mock()
+    playlist_response.json.return_value = {"error": {"message": "playlistNotFound"}}
+    search_response = Mock()
+    search_response.json.return_value = {
+        "items": [
+            {
+                "id": {"videoId": "video1"},
+                "snippet": {"title": "Title 1"}
+            }
+        ]
+    }
+    mock_get.side_effect = [channel_response, playlist_response, search_response]
+
+    results = youtube_scraper.fetch_channel_videos_by_id("channel123")
+
+    assert results == [("video1", "Title 1")]
+    assert mock_get.call_args_list[2].args[0].endswith("/search")
+
+@patch('youtube_parser.yt_scrape.requests.get')
+def test_channel_handle_lookup_caches_uploads_playlist(mock_get, youtube_scraper):
+    channel_response = Mock()
+    channel_response.json.return_value = {
+        "items": [
+            {
+                "id": "channel123",
+                "contentDetails": {"relatedPlaylists": {"uploads": "UUchannel123"}}
+            }
+        ]
+    }
+    mock_get.return_value = channel_response
+
+    youtube_scraper.get_channel_id_by_handle("@TestChannel")
+
+    assert youtube_scraper.get_uploads_playlist_id("channel123") == "UUchannel123"
     mock_get.assert_called_once()
 
 @patch('youtube_parser.yt_scrape.requests.get')
@@ -171,6 +253,48 @@ def test_process_videos_success(mock_get_transcript, mock_fetch_video, youtube_s
     assert results[0]["video_id"] == "video1"
     assert results[0]["snippets"] == "Test. "
 
+@patch.object(YouTubeScraper, 'iter_videos_by_ids')
+@patch.object(YouTubeScraper, 'get_transcript')
+def test_process_transcripts_returns_payloads(mock_get_transcript, mock_iter_videos, youtube_scraper):
+    mock_iter_videos.return_value = iter([[("video1", "Title 1"), ("video2", "Title 2")]])
+    def get_transcript(video_id):
+        if video_id == "video2":
+            raise TranscriptsDisabled(video_id)
+        return FetchedTranscript(
+            snippets=[FetchedTranscriptSnippet(text="Test", start=0.0, duration=1.0)],
+            video_id=video_id,
+            language_code="en",
+            is_generated=True
+        )
+    mock_get_transcript.side_effect = get_transcript
+
+    payloads = youtube_scraper.process_transcripts(type="ids", arg=["video1", "video2"])
+
+    assert payloads == [TranscriptPayload(
+        video_id="video1", title="Title 1", text="Test. ", language_code="en", is_generated=True
+    )]
+
+@patch.object(YouTubeScraper, 'iter_videos_by_ids')
+@patch.object(YouTubeScraper, 'get_transcript')
+def test_process_transcripts_marks_duplicates(mock_get_transcript, mock_iter_videos):
+    mock_iter_videos.return_value = iter([[("video1", "Pasta"), ("video2", "Pasta #shorts"), ("video3", "Cake")]])
+    texts = {
+        "video1": "boil the pasta in salted water then fry the garlic in olive oil and toss with parsley",
+        "video2": "boil the pasta in salted water then fry the garlic in olive oil and toss with parsley",
+        "video3": "cream the butter and sugar then beat in the eggs and fold in the flour before baking",
+    }
+    mock_get_transcript.side_effect = lambda video_id: FetchedTranscript(
+        snippets=[FetchedTranscriptSnippet(text=texts[video_id], start=0.0, duration=1.0)],
+        video_id=video_id,
+        language_code="en",
+        is_generated=False
+    )
+    scraper = YouTubeScraper("fake_api_key", dedup=DuplicateIndex(sqlite3.connect(":memory:", check_same_thread=False)))
+
+    payloads = scraper.process_transcripts(type="ids", arg=["video1", "video2", "video3"])
+
+    assert [p.duplicate_of for p in payloads] == [None, "video1", None]
+
 @patch.object(YouTubeScraper, 'fetch_video_by_id')
 @patch.object(YouTubeScraper, 'get_transcript')
 def test_process_videos_retry_success(mock_get_transcript, mock_fetch_video, youtube_scraper, mock_transcript):
@@ -236,3 +360,343 @@ def test_process_videos_max_retries_failure(mock_ytt_api, youtube_scraper):
     # Process videos - should handle max retries gracefully
     results = youtube_scraper.process_videos(type="id", arg="test_id")
     assert len(results) == 0  # No results due to failure
+
+def test_init_max_workers():
+    assert YouTubeScraper("test_key").max_workers == 8
+    assert YouTubeScraper("test_key", max_workers=0).max_workers == 1
+
+@patch.object(YouTubeScraper, 'iter_videos_by_query')
+@patch.object(YouTubeScraper, 'get_transcript')
+def test_process_videos_concurrent_keeps_order(mock_get_transcript, mock_fetch_videos):
+    videos = [(f"video{i}", f"Title {i}") for i in range(6)]
+    mock_fetch_videos.return_value = iter([videos[:4], videos[4:]])
+
+    def fake_get_transcript(video_id):
+        # Finish later videos first to make sure ordering does not depend on timing
+        time.sleep(0.01 * (6 - int(video_id[-1])))
+        if video_id == "video2":
+            raise Exception("No transcript")
+        return FetchedTranscript(
+            snippets=[FetchedTranscriptSnippet(text=video_id, start=0.0, duration=1.0)],
+            video_id=video_id,
+            language_code="en",
+            is_generated=False
+        )
+    mock_get_transcript.side_effect = fake_get_transcript
+
+    scraper = YouTubeScraper("fake_api_key", max_workers=4, retry=RetryPolicy(sleep=lambda delay: None))
+    results = scraper.process_videos(type="query", arg="test query")
+
+    assert [r["video_id"] for r in results] == [video_id for video_id, _ in videos]
+    assert results[2]["error"] == "Failed to fetch transcript"
+    assert results[2]["snippets"] == ""
+    assert results[5]["snippets"] == "video5. "
+
+@patch.object(YouTubeScraper, 'iter_videos_by_query')
+@patch.object(YouTubeScraper, 'get_transcript')
+def test_process_videos_concurrent_is_bounded(mock_get_transcript, mock_fetch_videos):
+    mock_fetch_videos.return_value = iter([[(f"video{i}", f"Title {i}") for i in range(8)]])
+    lock = threading.Lock()
+    active = [0]
+    peak = [0]
+
+    def fake_get_transcript(video_id):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return FetchedTranscript(snippets=[], video_id=video_id, language_code="en", is_generated=False)
+    mock_get_transcript.side_effect = fake_get_transcript
+
+    scraper = YouTubeScraper("fake_api_key", max_workers=4)
+    start = time.monotonic()
+    results = scraper.process_videos(type="query", arg="test query")
+    elapsed = time.monotonic() - start
+
+    assert len(results) == 8
+    assert peak[0] <= 4
+    # 8 videos on 4 workers take about two rounds, not eight
+    assert elapsed < 0.3
+
+@patch('youtube_parser.yt_scrape.requests.get')
+def test_fetch_videos_by_query_follows_page_tokens(mock_get):
+    def page(start, count, token=None):
+        response = Mock()
+        data = {"items": [
+            {"id": {"videoId": f"video{i}"}, "snippet": {"title": f"Title {i}"}}
+            for i in range(start, start + count)
+        ]}
+        if token:
+            data["nextPageToken"] = token
+        response.json.return_value = data
+        return response
+    mock_get.side_effect = [page(0, 50, "page2"), page(50, 50, "page3"), page(100, 20, "page4")]
+
+    scraper = YouTubeScraper("fake_api_key", max_results=120)
+    results = scraper.fetch_videos_by_query("test query")
+
+    assert len(results) == 120
+    assert results[119] == ("video119", "Title 119")
+    assert mock_get.call_count == 3
+    params = [call.kwargs["params"] for call in mock_get.call_args_list]
+    assert [p["maxResults"] for p in params] == [50, 50, 20]
+    assert "pageToken" not in params[0]
+    assert params[1]["pageToken"] == "page2"
+    assert params[2]["pageToken"] == "page3"
+
+@patch('youtube_parser.yt_scrape.requests.get')
+def test_iter_videos_by_query_stops_without_page_token(mock_get):
+    mock_response = Mock()
+    mock_response.json.return_value = {
+        "items": [{"id": {"videoId": "video1"}, "snippet": {"title": "Title 1"}}]
+    }
+    mock_get.return_value = mock_response
+
+    scraper = YouTubeScraper("fake_api_key", max_results=200)
+    pages = list(scraper.iter_videos_by_query("test query"))
+
+    assert pages == [[("video1", "Title 1")]]
+    mock_get.assert_called_once()
+
+@patch('youtube_parser.yt_scrape.requests.get')
+def test_iter_videos_by_query_api_error(mock_get, youtube_scraper):
+    mock_response = Mock()
+    mock_response.json.return_value = {"error": {"message": "quotaExceeded"}}
+    mock_get.return_value = mock_response
+
+    with pytest.raises(RuntimeError, match=r"YouTube API error \(search\): quotaExceeded"):
+        list(youtube_scraper.iter_videos_by_query("test query"))
+
+def test_get_uses_injected_pool():
+    http = Mock()
+    http.get.return_value.json.return_value = {"items": [{"id": "channel123"}]}
+    scraper = YouTubeScraper("fake_api_key", http=http)
+
+    with patch('youtube_parser.yt_scrape.requests.get') as mock_get:
+        assert scraper.get_channel_id_by_handle("@TestChannel") == "channel123"
+        mock_get.assert_not_called()
+    http.get.assert_called_once()
+
+@patch('youtube_parser.yt_scrape.YouTubeTranscriptApi')
+def test_get_transcript_uses_injected_session(mock_ytt_api):
+    http = Mock()
+    scraper = YouTubeScraper("fake_api_key", http=http)
+
+    mock_ytt_api.return_value.list.return_value = make_transcript_list(manual=["en"])
+
+    with patch.object(Transcript, 'fetch') as mock_fetch:
+        scraper.get_transcript("video1")
+
+    mock_ytt_api.assert_called_once_with(http_client=http.session)
+    mock_ytt_api.return_value.list.assert_called_once_with("video1")
+    mock_fetch.assert_called_once()
+
+@patch.object(YouTubeScraper, 'fetch_video_by_id')
+@patch.object(YouTubeScraper, 'get_transcript')
+def test_process_videos_uses_transcript_cache(mock_get_transcript, mock_fetch_video):
+    mock_fetch_video.return_value = [("video1", "Title 1")]
+    mock_get_transcript.return_value = FetchedTranscript(
+        snippets=[FetchedTranscriptSnippet(text="Test", start=0.0, duration=1.0)],
+        video_id="video1",
+        language_code="en",
+        is_generated=False
+    )
+    cache = TranscriptCache(sqlite3.connect(":memory:", check_same_thread=False))
+    scraper = YouTubeScraper("fake_api_key", cache=cache)
+
+    first = scraper.process_videos(type="id", arg="video1")
+    second = scraper.process_videos(type="id", arg="video1")
+
+    assert first == second
+    assert second[0]["snippets"] == "Test. "
+    assert mock_get_transcript.call_count == 1
+    assert cache.stats()["hits"] == 1
+
+@patch.object(YouTubeScraper, 'fetch_video_by_id')
+@patch.object(YouTubeScraper, 'get_transcript')
+def test_process_videos_non_retryable_error_fails_fast(mock_get_transcript, mock_fetch_video):
+    mock_fetch_video.return_value = [("video1", "Title 1")]
+    mock_get_transcript.side_effect = TranscriptsDisabled("video1")
+    cache = TranscriptCache(sqlite3.connect(":memory:", check_same_thread=False))
+    scraper = YouTubeScraper("fake_api_key", cache=cache)
+
+    first = scraper.process_videos(type="id", arg="video1")
+    second = scraper.process_videos(type="id", arg="video1")
+
+    assert mock_get_transcript.call_count == 1
+    assert first[0]["error"] == "No transcript available: TranscriptsDisabled"
+    assert second == first
+    assert cache.stats()["negative_hits"] == 1
+
+def test_is_retryable():
+    assert is_retryable(Exception("Network error"))
+    assert not is_retryable(TranscriptsDisabled("video1"))
+    assert not is_retryable(VideoUnavailable("video1"))
+
+@patch('youtube_parser.yt_scrape.requests.get')
+def test_pagination_shrinks_when_quota_runs_low(mock_get):
+    mock_response = Mock()
+    mock_response.json.return_value = {
+        "items": [
+            {"id": {"videoId": f"video{i}"}, "snippet": {"title": f"Title {i}"}}
+            for i in range(50)
+        ],
+        "nextPageToken": "next"
+    }
+    mock_get.return_value = mock_response
+    quota = QuotaTracker(sqlite3.connect(":memory:", check_same_thread=False), daily_limit=250)
+    scraper = YouTubeScraper("fake_api_key", max_results=200, quota=quota)
+
+    results = scraper.fetch_videos_by_query("test query")
+
+    assert len(results) == 100
+    assert mock_get.call_count == 2
+    assert quota.used() == 200
+
+@patch('youtube_parser.yt_scrape.requests.get')
+def test_scraper_refuses_when_quota_exhausted(mock_get):
+    quota = QuotaTracker(sqlite3.connect(":memory:", check_same_thread=False), daily_limit=50)
+    scraper = YouTubeScraper("fake_api_key", quota=quota)
+
+    with pytest.raises(QuotaExceededError):
+        scraper.fetch_videos_by_query("test query")
+    mock_get.assert_not_called()
+
+@patch('youtube_parser.yt_scrape.requests.get')
+def test_fetch_videos_by_ids_batches_of_50(mock_get, youtube_scraper):
+    def videos_response(url, params, timeout=None):
+        response = Mock()
+        response.json.return_value = {"items": [
+            {"id": video_id, "snippet": {"title": f"Title {video_id}"}}
+            for video_id in params["id"].split(",")
+            if video_id != "missing"
+        ]}
+        return response
+    mock_get.side_effect = videos_response
+    video_ids = [f"video{i}" for i in range(120)] + ["video0", "missing"]
+
+    results = youtube_scraper.fetch_videos_by_ids(video_ids)
+
+    assert len(results) == 120
+    assert results["video7"]["snippet"]["title"] == "Title video7"
+    assert "missing" not in results
+    assert mock_get.call_count == 3
+    assert [len(call.kwargs["params"]["id"].split(",")) for call in mock_get.call_args_list] == [50, 50, 21]
+
+@patch.object(YouTubeScraper, 'get_transcript')
+@patch('youtube_parser.yt_scrape.requests.get')
+def test_process_videos_by_ids(mock_get, mock_get_transcript, youtube_scraper):
+    mock_response = Mock()
+    mock_response.json.return_value = {"items": [
+        {"id": "video2", "snippet": {"title": "Title 2"}},
+        {"id": "video1", "snippet": {"title": "Title 1"}}
+    ]}
+    mock_get.return_value = mock_response
+    mock_get_transcript.side_effect = lambda video_id: FetchedTranscript(
+        snippets=[FetchedTranscriptSnippet(text=video_id, start=0.0, duration=1.0)],
+        video_id=video_id,
+        language_code="en",
+        is_generated=False
+    )
+
+    results = youtube_scraper.process_videos(type="ids", arg="video1,video2")
+
+    assert [r["video_id"] for r in results] == ["video1", "video2"]
+    assert results[1]["title"] == "Title 2"
+    mock_get.assert_called_once()
+
+def test_parse_duration():
+    assert parse_duration("PT4M13S") == 253
+    assert parse_duration("PT1H") == 3600
+    assert parse_duration("P1DT2S") == 86402
+    assert parse_duration("P0D") == 0
+    with pytest.raises(ValueError):
+        parse_duration("4 minutes")
+
+@patch.object(YouTubeScraper, 'get_transcript')
+@patch.object(YouTubeScraper, 'fetch_videos_by_ids')
+@patch.object(YouTubeScraper, 'iter_videos_by_query')
+def test_process_videos_filter_drops_before_transcript(mock_iter_videos, mock_fetch_ids, mock_get_transcript, youtube_scraper):
+    mock_iter_videos.return_value = iter([[
+        ("short", "Short"), ("nocaps", "No captions"), ("long", "Livestream"), ("good", "Good")
+    ]])
+    mock_fetch_ids.return_value = {
+        "short": {"id": "short", "contentDetails": {"duration": "PT30S", "caption": "true"}},
+        "nocaps": {"id": "nocaps", "contentDetails": {"duration": "PT8M", "caption": "false"}},
+        "long": {"id": "long", "contentDetails": {"duration": "PT2H5M", "caption": "true"}},
+        "good": {"id": "good", "contentDetails": {"duration": "PT8M", "caption": "true"}},
+    }
+    mock_get_transcript.return_value = FetchedTranscript(
+        snippets=[FetchedTranscriptSnippet(text="Test", start=0.0, duration=1.0)],
+        video_id="good",
+        language_code="en",
+        is_generated=False
+    )
+    video_filter = VideoFilter(require_captions=True, min_duration_seconds=60, max_duration_minutes=60)
+
+    results = youtube_scraper.process_videos(type="query", arg="pasta", video_filter=video_filter)
+
+    assert [r["video_id"] for r in results] == ["good"]
+    mock_get_transcript.assert_called_once_with("good")
+    mock_fetch_ids.assert_called_once_with(["short", "nocaps", "long", "good"], part="contentDetails")
+
+@patch('youtube_parser.yt_scrape.requests.get')
+def test_get_retries_server_errors(mock_get):
+    unavailable = Mock(status_code=503, headers={"Retry-After": "2"})
+    ok = Mock(status_code=200)
+    ok.json.return_value = {"items": [{"id": "channel123"}]}
+    mock_get.side_effect = [unavailable, ok]
+    sleeps = []
+    scraper = YouTubeScraper("fake_api_key", retry=RetryPolicy(sleep=sleeps.append))
+
+    assert scraper.get_channel_id_by_handle("@TestChannel") == "channel123"
+    assert mock_get.call_count == 2
+    # Retry-After is honoured
+    assert sleeps and sleeps[0] >= 2
+    assert scraper.retry.stats()["retries"] == 1
+
+@patch.object(YouTubeScraper, 'fetch_video_by_id')
+@patch.object(YouTubeScraper, 'get_transcript')
+def test_process_videos_circuit_breaker_fails_fast(mock_get_transcript, mock_fetch_video):
+    mock_fetch_video.return_value = [("video1", "Title 1")]
+    mock_get_transcript.side_effect = Exception("YouTube is down")
+    breaker = CircuitBreaker(failure_threshold=4, reset_timeout=60)
+    retry = RetryPolicy(breaker=breaker, sleep=lambda delay: None)
+    scraper = YouTubeScraper("fake_api_key", retry=retry)
+
+    first = scraper.process_videos(type="id", arg="video1")
+    second = scraper.process_videos(type="id", arg="video1")
+
+    assert first[0]["error"] == "Failed to fetch transcript"
+    assert second[0]["error"] == "Failed to fetch transcript"
+    assert mock_get_transcript.call_count == 4
+    assert breaker.stats()["transcript"]["state"] == "open"
+    assert breaker.stats()["transcript"]["rejected"] == 1
+
+def test_select_transcript_prefers_manual_in_language(youtube_scraper):
+    chosen = youtube_scraper.select_transcript(make_transcript_list(manual=["ko", "en"], generated=["en"]))
+
+    assert chosen.language_code == "en"
+    assert not chosen.is_generated
+
+def test_select_transcript_falls_back_to_generated(youtube_scraper):
+    chosen = youtube_scraper.select_transcript(make_transcript_list(manual=["ko"], generated=["en-US"]))
+
+    assert chosen.language_code == "en-US"
+    assert chosen.is_generated
+
+def test_select_transcript_falls_back_to_translation(youtube_scraper):
+    chosen = youtube_scraper.select_transcript(make_transcript_list(manual=["ko"], translatable=True))
+
+    assert chosen.language_code == "en"
+    assert "tlang=en" in chosen._url
+
+def test_select_transcript_custom_chain_raises_when_nothing_matches():
+    scraper = YouTubeScraper("fake_api_key", transcript_preferences=["manual", "generated"])
+
+    with pytest.raises(NoTranscriptFound):
+        scraper.select_transcript(make_transcript_list(manual=["ko"], translatable=True))
+    with pytest.raises(ValueError, match="Invalid transcript preferences"):
+        YouTubeScraper("fake_api_key", transcript_preferences=["closest"])
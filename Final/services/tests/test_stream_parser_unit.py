@@ -0,0 +1,45 @@
+import json
+import pytest # type: ignore
+from youtube_parser.stream_parser import IncrementalRecipeParser
+
+RECIPE = {
+    "title": "Pasta \"al dente\" {quick}",
+    "ingredients": [{"name": "Pasta", "quantity": "200g"}, {"name": "Salt [coarse]", "quantity": "1 tsp"}],
+    "steps": [{"step_number": 1, "description": "Boil the water, then salt it"}],
+    "servings": "2",
+    "nutritional_info": {"calories": 400.0},
+}
+
+def feed_in_pieces(text, size):
+    parser = IncrementalRecipeParser()
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i:i + size]))
+    return parser, events
+
+@pytest.mark.parametrize("size", [1, 3, 1000])
+def test_events_in_order(size):
+    text = json.dumps(RECIPE, indent=2)
+    parser, events = feed_in_pieces(text, size)
+
+    assert events == [
+        ("title", RECIPE["title"]),
+        ("ingredient", RECIPE["ingredients"][0]),
+        ("ingredient", RECIPE["ingredients"][1]),
+        ("step", RECIPE["steps"][0]),
+    ]
+    assert parser.text == text
+
+def test_element_reported_only_when_complete():
+    parser = IncrementalRecipeParser()
+    assert parser.feed('{"title": "Soup", "ingredients": [{"name": "Leek", ') == [("title", "Soup")]
+    assert parser.feed('"quantity": "2"') == []
+    assert parser.feed('}]') == [("ingredient", {"name": "Leek", "quantity": "2"})]
+
+def test_nested_title_key_is_ignored():
+    _, events = feed_in_pieces('{"nutritional_info": {"title": "x"}, "title": "Real"}', 5)
+    assert events == [("title", "Real")]
+
+def test_malformed_string_is_not_reported():
+    _, events = feed_in_pieces('{"title": "bad \\x escape", "steps": [{"step_number": 1}]}', 4)
+    assert events == [("step", {"step_number": 1})]
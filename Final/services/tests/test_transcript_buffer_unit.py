@@ -0,0 +1,43 @@
+import pytest # type: ignore
+from youtube_parser.transcript_buffer import TranscriptBuffer
+from youtube_parser.type import FetchedTranscriptSnippet
+
+@pytest.fixture
+def buffer():
+    return TranscriptBuffer.from_snippets([
+        FetchedTranscriptSnippet(text="Boil the water", start=0.0, duration=2.0),
+        FetchedTranscriptSnippet(text="Add the pasta", start=2.0, duration=3.0),
+        FetchedTranscriptSnippet(text="Drain it", start=5.0, duration=1.5),
+    ])
+
+def test_text_matches_joined_snippets(buffer):
+    assert buffer.text == "Boil the water. Add the pasta. Drain it. "
+    assert len(buffer) == 3
+    assert buffer.segment(1) == ("Add the pasta", 2.0, 3.0)
+    assert buffer.end == 6.5
+
+def test_slice_by_time(buffer):
+    view = buffer.slice(1.0, 5.0)
+
+    assert view.text == "Add the pasta. "
+    assert list(view) == [("Add the pasta", 2.0, 3.0)]
+    assert view.start == 2.0
+    assert buffer.slice(0.0, 100.0).text == buffer.text
+    assert len(buffer.slice(7.0, 8.0)) == 0
+
+def test_timestamp_lookups(buffer):
+    assert buffer.time_at(0) == 0.0
+    assert buffer.time_at(buffer.text.index("Drain")) == 5.0
+    assert buffer.segment_at(3.5) == 1
+    assert buffer.segment_at(5.0) == 2
+
+    view = buffer.slice(2.0, 10.0)
+    assert view.time_at(0) == 2.0
+    assert view.segment_at(1.0) is None
+    with pytest.raises(IndexError):
+        view.time_at(len(view.text))
+
+def test_empty_buffer():
+    empty = TranscriptBuffer.from_snippets([])
+    assert empty.text == ""
+    assert empty.segment_at(1.0) is None
@@ -0,0 +1,100 @@
+import pytest # type: ignore
+import sqlite3
+from youtube_parser.transcript_cache import TranscriptCache
+
+def make_transcript(video_id, text="Hello. World. "):
+    return {
+        "title": "Title",
+        "video_id": video_id,
+        "is_generated": True,
+        "language_code": "en",
+        "snippets": text
+    }
+
+@pytest.fixture
+def cache(clock):
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    return TranscriptCache(conn, ttl_seconds=60, clock=clock)
+
+def test_miss_then_hit(cache):
+    assert cache.get("video1", "en") is None
+
+    cache.put(make_transcript("video1"), "en")
+    cached = cache.get("video1", "en")
+
+    assert cached == {
+        "video_id": "video1",
+        "is_generated": True,
+        "language_code": "en",
+        "snippets": "Hello. World. "
+    }
+    assert cache.get("video1", "ko") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["entries"] == 1
+
+def test_snippets_are_compressed(cache):
+    text = "Stir the sauce. " * 500
+    cache.put(make_transcript("video1", text), "en")
+
+    assert cache.stats()["bytes"] < len(text) / 10
+    assert cache.get("video1", "en")["snippets"] == text
+
+def test_ttl_expiry(cache, clock):
+    cache.put(make_transcript("video1"), "en")
+    clock.now += 61
+
+    assert cache.get("video1", "en") is None
+    assert cache.stats()["entries"] == 0
+
+def test_size_eviction_drops_least_recently_used(clock):
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    cache = TranscriptCache(conn, ttl_seconds=60, max_bytes=30, clock=clock)
+
+    cache.put(make_transcript("video1", "aaaa"), "en")
+    clock.now += 1
+    cache.put(make_transcript("video2", "bbbb"), "en")
+    clock.now += 1
+    assert cache.get("video1", "en") is not None
+    clock.now += 1
+    cache.put(make_transcript("video3", "cccc"), "en")
+
+    assert cache.get("video2", "en") is None
+    assert cache.get("video1", "en") is not None
+    assert cache.get("video3", "en") is not None
+    assert cache.stats()["evictions"] == 1
+
+def test_negative_cache(cache, clock):
+    assert cache.get_miss("video1", "en") is None
+
+    cache.put_miss("video1", "en", "TranscriptsDisabled")
+
+    assert cache.get_miss("video1", "en") == "TranscriptsDisabled"
+    assert cache.get_miss("video1", "ko") is None
+    assert cache.stats()["negative_hits"] == 1
+    assert cache.stats()["negative_entries"] == 1
+
+def test_negative_cache_has_own_ttl(clock):
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    cache = TranscriptCache(conn, ttl_seconds=3600, negative_ttl_seconds=10, clock=clock)
+    cache.put_miss("video1", "en", "NoTranscriptFound")
+    clock.now += 11
+
+    assert cache.get_miss("video1", "en") is None
+    assert cache.stats()["negative_entries"] == 0
+
+def test_hit_does_not_write_until_next_put(clock):
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    cache = TranscriptCache(conn, ttl_seconds=60, clock=clock)
+    cache.put(make_transcript("video1"), "en")
+    changes = conn.total_changes
+
+    clock.now += 1
+    assert cache.get("video1", "en") is not None
+    assert conn.total_changes == changes
+
+    cache.put(make_transcript("video2"), "en")
+    assert conn.execute(
+        "SELECT accessed_at FROM transcript_cache WHERE video_id = 'video1';"
+    ).fetchone()[0] == clock.now
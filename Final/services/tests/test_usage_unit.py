@@ -0,0 +1,31 @@
+import pytest # type: ignore
+import sqlite3
+from youtube_parser.usage import UsageTracker, completion_cost
+
+def test_completion_cost():
+    assert completion_cost("gpt-3.5-turbo", 1_000_000, 1_000_000) == pytest.approx(2.0)
+    assert completion_cost("unknown-model", 1000, 1000) == 0.0
+
+def test_rolling_minute(clock):
+    tracker = UsageTracker(clock=clock)
+    tracker.record("video1", "gpt-3.5-turbo", 100, 50, 1.0)
+    clock.now += 30
+    tracker.record("video2", "gpt-3.5-turbo", 200, 20, 0.5)
+
+    assert tracker.last_minute() == {"requests": 2, "prompt_tokens": 300, "completion_tokens": 70, "total_tokens": 370}
+    clock.now += 31
+    assert tracker.last_minute()["requests"] == 1
+
+def test_daily_totals_persisted(clock):
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    UsageTracker(conn, clock=clock).record("video1", "gpt-3.5-turbo", 1000, 500, 2.0)
+
+    today = UsageTracker(conn, clock=clock).today()
+
+    assert today["requests"] == 1
+    assert today["total_tokens"] == 1500
+    assert today["avg_latency_ms"] == 2000.0
+    assert today["cost_usd"] == pytest.approx(completion_cost("gpt-3.5-turbo", 1000, 500))
+
+    clock.now += 24 * 3600
+    assert UsageTracker(conn, clock=clock).today()["requests"] == 0
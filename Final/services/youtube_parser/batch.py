@@ -0,0 +1,154 @@
+"""
+Offline bulk generation through JSONL job files, following the OpenAI Batch API.
+"""
+
+import json
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# Endpoint every line of a job file targets
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+# Batch statuses after which polling stops
+BATCH_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+def batch_request_line(custom_id: str, body: Dict[str, Any]) -> str:
+    """
+    One line of a job file.
+
+    Args:
+        custom_id: ID echoed back in the matching output line
+        body: Chat completion request arguments
+
+    Returns:
+        str: JSON line, without the trailing newline
+    """
+    return json.dumps({"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body})
+
+
+class BatchProcessor(ABC):
+    """
+    Runs job files. Subclasses submit a file, report its status and download the output.
+    """
+
+    @abstractmethod
+    def submit(self, input_path: Path) -> str:
+        """
+        Submit a job file.
+
+        Args:
+            input_path: JSONL file of batch_request_line lines
+
+        Returns:
+            str: Batch ID
+        """
+        ...
+
+    @abstractmethod
+    def status(self, batch_id: str) -> str:
+        """
+        Current status of a batch (e.g. 'in_progress', 'completed').
+        """
+        ...
+
+    @abstractmethod
+    def download(self, batch_id: str, output_path: Path) -> None:
+        """
+        Write the output lines of a finished batch to a file.
+
+        Raises:
+            RuntimeError: If the batch has no output
+        """
+        ...
+
+
+class OpenAIBatchProcessor(BatchProcessor):
+    def __init__(self, client: Any, completion_window: str = "24h"):
+        """
+        Batch processor backed by the OpenAI Batch API.
+
+        Args:
+            client: openai.OpenAI client
+            completion_window: Time the batch may take, as accepted by the API
+        """
+        self.client = client
+        self.completion_window = completion_window
+
+    def submit(self, input_path: Path) -> str:
+        with open(input_path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def download(self, batch_id: str, output_path: Path) -> None:
+        batch = self.client.batches.retrieve(batch_id)
+        file_ids = [f for f in (batch.output_file_id, batch.error_file_id) if f]
+        if not file_ids:
+            raise RuntimeError(f"Batch {batch_id} has no output (status: {batch.status})")
+        with open(output_path, "w") as out:
+            for file_id in file_ids:
+                text = self.client.files.content(file_id).text
+                out.write(text if text.endswith("\n") or not text else text + "\n")
+
+
+class LocalBatchProcessor(BatchProcessor):
+    def __init__(self, complete: Callable[[Dict[str, Any]], Dict[str, Any]]):
+        """
+        Stand-in batch processor that runs each line on submit, for offline
+        use and tests.
+
+        Args:
+            complete: Takes a request body and returns the chat completion as a
+                dict (e.g. lambda body: client.chat.completions.create(**body).model_dump())
+        """
+        self.complete = complete
+        self._outputs: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, input_path: Path) -> str:
+        lines = []
+        with open(input_path, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                try:
+                    body = self.complete(request["body"])
+                    output = {
+                        "custom_id": request["custom_id"],
+                        "response": {"status_code": 200, "body": body},
+                        "error": None,
+                    }
+                except Exception as e:
+                    output = {
+                        "custom_id": request["custom_id"],
+                        "response": None,
+                        "error": {"message": str(e)},
+                    }
+                lines.append(json.dumps(output))
+        with self._lock:
+            batch_id = f"local-batch-{len(self._outputs) + 1}"
+            self._outputs[batch_id] = lines
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        with self._lock:
+            return "completed" if batch_id in self._outputs else "failed"
+
+    def download(self, batch_id: str, output_path: Path) -> None:
+        with self._lock:
+            if batch_id not in self._outputs:
+                raise RuntimeError(f"Batch {batch_id} has no output (status: failed)")
+            lines = self._outputs[batch_id]
+        with open(output_path, "w") as out:
+            out.writelines(line + "\n" for line in lines)
@@ -0,0 +1,237 @@
+"""
+Transcript compaction: cut prompt tokens before recipe generation.
+"""
+
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    # tiktoken (in requirements.txt) gives exact counts; without it, or when its
+    # encoding files cannot be downloaded, counts fall back to an estimate
+    import tiktoken  # type: ignore
+except ImportError:  # pragma: no cover - missing dependency
+    tiktoken = None  # type: ignore
+
+# transcript_to_dict joins caption snippets with ". "
+SEGMENT_SEPARATOR = ". "
+
+# Non-speech caption markers such as [Music], (applause) or ♪
+NON_SPEECH_PATTERN = re.compile(r"\[[^\]]*\]|\((?:music|applause|laughs?|laughter|inaudible|silence)\)|[♪♫]+", re.IGNORECASE)
+
+# Filler words that carry nothing for a recipe
+FILLER_PATTERN = re.compile(r"\b(?:um+|uh+|erm+|hmm+|ah+|you know|i mean)\b,?\s*", re.IGNORECASE)
+
+# Longest caption overlap (in words) looked for between consecutive segments
+MAX_OVERLAP_WORDS = 12
+
+_encoding_cache: Dict[str, Any] = {}
+
+
+def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    """
+    Count the tokens of a text for a model.
+
+    Args:
+        text: Text to count
+        model: OpenAI model name used to pick the tokenizer
+
+    Returns:
+        int: Exact count with tiktoken, otherwise an estimate of 4 characters per token
+    """
+    if tiktoken is not None and model not in _encoding_cache:
+        _encoding_cache[model] = _load_encoding(model)
+    encoding = _encoding_cache.get(model)
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text))
+
+
+def _load_encoding(model: str) -> Any:
+    """tiktoken encoding of a model (cl100k_base for unknown ones), or None if it cannot be loaded."""
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # Encodings are downloaded on first use
+        print(f"Could not load the tokenizer of {model}, estimating token counts: {str(e)}")
+        return None
+
+
+def strip_non_speech(segments: List[str]) -> List[str]:
+    """Remove [Music]-style markers from each segment."""
+    return [NON_SPEECH_PATTERN.sub(" ", segment) for segment in segments]
+
+
+def strip_fillers(segments: List[str]) -> List[str]:
+    """Remove filler words from each segment."""
+    return [FILLER_PATTERN.sub("", segment) for segment in segments]
+
+
+def dedupe_overlaps(segments: List[str]) -> List[str]:
+    """
+    Drop repeated captions and the words a segment repeats from the end of the previous one.
+
+    Auto-generated captions often roll over, e.g. "so today we're going" followed by
+    "we're going to make pasta"; the second becomes "to make pasta".
+    """
+    result: List[str] = []
+    previous_words: List[str] = []
+    for segment in segments:
+        words = segment.split()
+        if not words:
+            continue
+        lowered = [w.lower() for w in words]
+        previous_lowered = [w.lower() for w in previous_words]
+        if lowered == previous_lowered:
+            continue
+
+        overlap = 0
+        for size in range(min(MAX_OVERLAP_WORDS, len(words), len(previous_words)), 0, -1):
+            if previous_lowered[-size:] == lowered[:size]:
+                overlap = size
+                break
+
+        remaining = words[overlap:]
+        if remaining:
+            result.append(" ".join(remaining))
+        previous_words = words
+    return result
+
+
+DEFAULT_STAGES: Tuple[Callable[[List[str]], List[str]], ...] = (
+    strip_non_speech,
+    strip_fillers,
+    dedupe_overlaps,
+)
+
+
+def split_into_chunks(text: str, chunk_tokens: int, overlap_tokens: int, model: str = "gpt-3.5-turbo") -> List[str]:
+    """
+    Split a transcript into overlapping chunks at segment boundaries.
+
+    Args:
+        text: Transcript text, caption snippets joined with ". "
+        chunk_tokens: Target tokens per chunk
+        overlap_tokens: Tokens repeated from the end of one chunk at the start of the next
+        model: Model whose tokenizer is used for counting
+
+    Returns:
+        List of chunk texts, in transcript order
+    """
+    segments = [segment for segment in text.split(SEGMENT_SEPARATOR) if segment.strip()]
+    sizes = [count_tokens(segment + SEGMENT_SEPARATOR, model) for segment in segments]
+
+    chunks: List[str] = []
+    start = 0
+    while start < len(segments):
+        end = start
+        used = 0
+        # Always take at least one segment so an oversized segment cannot stall the loop
+        while end < len(segments) and (end == start or used + sizes[end] <= chunk_tokens):
+            used += sizes[end]
+            end += 1
+        chunks.append(SEGMENT_SEPARATOR.join(segments[start:end]) + SEGMENT_SEPARATOR)
+        if end == len(segments):
+            break
+
+        # Step back over the last segments of this chunk to create the overlap
+        next_start = end
+        overlap = 0
+        while next_start - 1 > start and overlap + sizes[next_start - 1] <= overlap_tokens:
+            next_start -= 1
+            overlap += sizes[next_start]
+        start = next_start
+    return chunks
+
+
+class TranscriptCompactor:
+    def __init__(
+        self,
+        stages: Sequence[Callable[[List[str]], List[str]]] = DEFAULT_STAGES,
+        token_budget: Optional[int] = 30000,
+        model: str = "gpt-3.5-turbo",
+    ):
+        """
+        Pipeline of transcript clean-up stages with a final token budget.
+
+        Args:
+            stages: Functions taking and returning the list of caption segments,
+                applied in order
+            token_budget: Maximum tokens of the compacted text; segments past the
+                budget are dropped. None disables the limit. Keep it above
+                RecipeGenerator's chunk_threshold_tokens, or long transcripts
+                are cut before they can be chunked
+            model: Model whose tokenizer is used for counting
+        """
+        self.stages = list(stages)
+        self.token_budget = token_budget
+        self.model = model
+        self.compacted = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+        self._lock = threading.Lock()
+
+    def compact(self, text: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Compact a transcript text.
+
+        Args:
+            text: Transcript text, caption snippets joined with ". "
+
+        Returns:
+            Tuple of the compacted text and a dict with tokens_before,
+            tokens_after and truncated
+        """
+        segments = [segment.strip() for segment in text.split(SEGMENT_SEPARATOR)]
+        for stage in self.stages:
+            segments = stage(segments)
+        segments = [" ".join(segment.split()) for segment in segments]
+        segments = [segment.strip(" .") for segment in segments]
+        segments = [segment for segment in segments if segment]
+
+        truncated = False
+        if self.token_budget is not None:
+            segments, truncated = self._fit_budget(segments)
+
+        compacted = SEGMENT_SEPARATOR.join(segments) + SEGMENT_SEPARATOR if segments else ""
+        stats = {
+            "tokens_before": count_tokens(text, self.model),
+            "tokens_after": count_tokens(compacted, self.model),
+            "truncated": truncated,
+        }
+        with self._lock:
+            self.compacted += 1
+            self.tokens_before += stats["tokens_before"]
+            self.tokens_after += stats["tokens_after"]
+        return compacted, stats
+
+    def _fit_budget(self, segments: List[str]) -> Tuple[List[str], bool]:
+        """Keep leading segments while they fit in the token budget."""
+        assert self.token_budget is not None
+        kept: List[str] = []
+        used = 0
+        for segment in segments:
+            tokens = count_tokens(segment + SEGMENT_SEPARATOR, self.model)
+            if used + tokens > self.token_budget:
+                return kept, True
+            kept.append(segment)
+            used += tokens
+        return kept, False
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Totals over all compacted transcripts.
+
+        Returns:
+            Dict with transcripts, tokens_before, tokens_after and tokens_saved
+        """
+        with self._lock:
+            return {
+                "transcripts": self.compacted,
+                "tokens_before": self.tokens_before,
+                "tokens_after": self.tokens_after,
+                "tokens_saved": self.tokens_before - self.tokens_after,
+            }
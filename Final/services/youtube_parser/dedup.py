@@ -0,0 +1,285 @@
+"""
+Near-duplicate transcript detection with MinHash signatures and LSH buckets,
+backed by the service's SQLite database.
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Largest 64-bit hash value, the content of a signature slot before any shingle
+MAX_HASH = (1 << 64) - 1
+
+
+def shingle_hashes(text: str, shingle_size: int = 5, key: bytes = b"") -> List[int]:
+    """
+    Hash the distinct word shingles of a text.
+
+    Args:
+        text: Transcript text
+        shingle_size: Words per shingle
+        key: Hash key (salt)
+
+    Returns:
+        List of 64-bit shingle hashes; empty for a text without words
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    if not words:
+        return []
+    shingles = {" ".join(words[i:i + shingle_size]) for i in range(max(1, len(words) - shingle_size + 1))}
+    return [
+        int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8, key=key).digest(), "big")
+        for shingle in shingles
+    ]
+
+
+class DuplicateIndex:
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        threshold: float = 0.8,
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle_size: int = 5,
+        seed: int = 1,
+    ):
+        """
+        Index of transcript MinHash signatures for near-duplicate lookups.
+
+        Each signature is split into bands hashed to LSH buckets; only videos
+        sharing a bucket are compared, so a lookup costs a few indexed queries
+        however many transcripts are stored. With 16 bands of 8 rows, pairs at
+        0.8 Jaccard similarity share a bucket with 97% probability and pairs
+        at 0.5 with 6%.
+
+        Signatures use one-permutation hashing: each shingle is hashed once
+        into one of num_perm slots, which keeps its minimum, so computing a
+        signature is linear in the transcript length.
+
+        Args:
+            conn: SQLite connection (opened with check_same_thread=False)
+            threshold: Minimum estimated Jaccard similarity of a duplicate
+            num_perm: Slots (minimum hash values) per signature
+            bands: LSH bands; must divide num_perm
+            shingle_size: Words per shingle
+            seed: Seed of the shingle hash; signatures stored under another
+                seed or num_perm cannot be compared
+        """
+        if num_perm % bands:
+            raise ValueError("bands must divide num_perm")
+        self.conn = conn
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self._key = seed.to_bytes(8, "big")
+        self.lookups = 0
+        self.duplicates = 0
+        self.candidates = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+        with self._lock:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS transcript_minhash (
+                    video_id TEXT PRIMARY KEY,
+                    signature BLOB NOT NULL,
+                    added_at REAL NOT NULL
+                );
+                """
+            )
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS transcript_lsh (
+                    bucket INTEGER NOT NULL,
+                    video_id TEXT NOT NULL
+                );
+                """
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS transcript_lsh_bucket ON transcript_lsh (bucket);")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS transcript_lsh_video ON transcript_lsh (video_id);")
+            self.conn.commit()
+
+    def signature(self, text: str) -> Optional[Tuple[int, ...]]:
+        """
+        MinHash signature of a text.
+
+        Args:
+            text: Transcript text
+
+        Returns:
+            Tuple of num_perm minimum hash values, or None for a text without words
+        """
+        hashes = shingle_hashes(text, self.shingle_size, self._key)
+        if not hashes:
+            return None
+        slots = [MAX_HASH] * self.num_perm
+        for h in hashes:
+            value, slot = divmod(h, self.num_perm)
+            if value < slots[slot]:
+                slots[slot] = value
+        # Densify: an empty slot borrows the next filled slot's value, so short
+        # transcripts still get comparable signatures
+        filled = [i for i, value in enumerate(slots) if value != MAX_HASH]
+        for i in range(self.num_perm):
+            if slots[i] == MAX_HASH:
+                slots[i] = slots[next((j for j in filled if j > i), filled[0])]
+        return tuple(slots)
+
+    def signature_for(self, video_id: str, text: str) -> Optional[Tuple[int, ...]]:
+        """
+        Signature of a video's transcript, read back from the index when the
+        video is already indexed.
+
+        Args:
+            video_id: YouTube video ID
+            text: Transcript text
+
+        Returns:
+            MinHash signature, or None for a text without words
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT signature FROM transcript_minhash WHERE video_id = ?;", (video_id,)
+            ).fetchone()
+        if row is not None:
+            return tuple(array("Q", row[0]))
+        return self.signature(text)
+
+    def _buckets(self, signature: Tuple[int, ...]) -> List[int]:
+        """LSH bucket of each band, as signed 64-bit SQLite integers."""
+        buckets = []
+        for band in range(self.bands):
+            rows = array("Q", signature[band * self.rows:(band + 1) * self.rows]).tobytes()
+            digest = hashlib.blake2b(band.to_bytes(2, "big") + rows, digest_size=8).digest()
+            buckets.append(int.from_bytes(digest, "big", signed=True))
+        return buckets
+
+    def _similarity(self, a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity of two signatures."""
+        return sum(1 for x, y in zip(a, b, strict=True) if x == y) / self.num_perm
+
+    def find(self, video_id: str, text: str) -> Optional[Tuple[str, float]]:
+        """
+        Look up the most similar indexed transcript of another video.
+
+        Args:
+            video_id: Video the text belongs to; its own entry is ignored
+            text: Transcript text
+
+        Returns:
+            Tuple of the duplicate's video_id and the estimated similarity, or
+            None if no indexed transcript reaches the threshold
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return None
+        with self._lock:
+            return self._find(video_id, signature, self._buckets(signature), time.perf_counter())
+
+    def _find(
+        self, video_id: str, signature: Tuple[int, ...], buckets: List[int], started: float
+    ) -> Optional[Tuple[str, float]]:
+        """Candidate lookup and comparison; the caller holds the lock."""
+        placeholders = ",".join("?" * len(buckets))
+        rows = self.conn.execute(
+            f"""
+            SELECT m.video_id, m.signature FROM transcript_minhash m
+            WHERE m.video_id IN (SELECT DISTINCT video_id FROM transcript_lsh WHERE bucket IN ({placeholders}))
+            AND m.video_id != ?;
+            """,
+            (*buckets, video_id),
+        ).fetchall()
+
+        best: Optional[Tuple[str, float]] = None
+        for candidate, blob in rows:
+            similarity = self._similarity(signature, tuple(array("Q", blob)))
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (candidate, similarity)
+
+        self.lookups += 1
+        self.candidates += len(rows)
+        self.duplicates += 1 if best else 0
+        self.seconds += time.perf_counter() - started
+        return best
+
+    def add(self, video_id: str, text: str) -> None:
+        """
+        Index a transcript, replacing the video's previous entry.
+
+        Args:
+            video_id: YouTube video ID
+            text: Transcript text
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return
+        with self._lock:
+            self._add(video_id, signature, self._buckets(signature))
+            self.conn.commit()
+
+    def _add(self, video_id: str, signature: Tuple[int, ...], buckets: List[int]) -> None:
+        """Write a signature and its buckets; the caller holds the lock and commits."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO transcript_minhash (video_id, signature, added_at) VALUES (?, ?, ?);",
+            (video_id, array("Q", signature).tobytes(), time.time()),
+        )
+        self.conn.execute("DELETE FROM transcript_lsh WHERE video_id = ?;", (video_id,))
+        self.conn.executemany(
+            "INSERT INTO transcript_lsh (bucket, video_id) VALUES (?, ?);",
+            [(bucket, video_id) for bucket in buckets],
+        )
+
+    def find_or_add(
+        self, video_id: str, text: str, signature: Optional[Tuple[int, ...]] = None
+    ) -> Optional[Tuple[str, float]]:
+        """
+        Look up a near-duplicate of a transcript, indexing it if there is none.
+        Duplicates are not indexed, so they keep pointing at the original.
+
+        Args:
+            video_id: YouTube video ID
+            text: Transcript text
+            signature: Signature from signature_for, if already computed
+
+        Returns:
+            Tuple of the original's video_id and the estimated similarity, or None
+        """
+        if signature is None:
+            signature = self.signature_for(video_id, text)
+        if signature is None:
+            return None
+        buckets = self._buckets(signature)
+        with self._lock:
+            duplicate = self._find(video_id, signature, buckets, time.perf_counter())
+            if duplicate is None:
+                self._add(video_id, signature, buckets)
+                self.conn.commit()
+        return duplicate
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Index statistics.
+
+        Returns:
+            Dict with threshold, entries, lookups, duplicates, avg_candidates
+            and avg_lookup_ms
+        """
+        with self._lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM transcript_minhash;").fetchone()[0]
+            return {
+                "threshold": self.threshold,
+                "entries": entries,
+                "lookups": self.lookups,
+                "duplicates": self.duplicates,
+                "avg_candidates": round(self.candidates / self.lookups, 2) if self.lookups else 0.0,
+                "avg_lookup_ms": round(1000 * self.seconds / self.lookups, 3) if self.lookups else 0.0,
+            }
@@ -0,0 +1,94 @@
+"""
+Shared keep-alive HTTP connection pool for outgoing API calls.
+"""
+
+import threading
+import requests # type: ignore
+from requests.adapters import HTTPAdapter # type: ignore
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class HttpPool:
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 20,
+        connect_timeout: float = 10.0,
+        read_timeout: float = 60.0,
+    ):
+        """
+        Create a connection pool shared by per-thread requests sessions.
+
+        Args:
+            pool_connections: Number of per-host pools to keep (one per host we talk to)
+            pool_maxsize: Maximum number of kept-alive connections per host; should be
+                at least the number of threads sharing the pool
+            connect_timeout: Default connect timeout in seconds
+            read_timeout: Default read timeout in seconds
+        """
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self._local = threading.local()
+        self._sessions: List[requests.Session] = []
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        """
+        The calling thread's session, mounted on the shared adapter.
+
+        requests.Session is not thread-safe (cookies, headers), so each thread
+        gets its own while the pooled connections stay shared.
+        """
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", self.adapter)
+            session.mount("http://", self.adapter)
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, timeout: Any = None) -> requests.Response:
+        """
+        Send a GET request over a pooled connection.
+
+        Args:
+            url: Request URL
+            params: Query parameters
+            timeout: Optional (connect, read) timeout, defaults to the pool timeout
+
+        Returns:
+            requests.Response
+        """
+        return self.session.get(url, params=params, timeout=timeout or self.timeout)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Per-host connection reuse statistics.
+
+        Returns:
+            Dict keyed by host with the number of requests sent, connections
+            opened (i.e. TCP/TLS handshakes) and requests served on a reused
+            connection
+        """
+        pools = self.adapter.poolmanager.pools
+        stats: Dict[str, Dict[str, int]] = {}
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = stats.setdefault(pool.host, {"requests": 0, "connections": 0, "reused": 0})
+            host["requests"] += pool.num_requests
+            host["connections"] += pool.num_connections
+            host["reused"] += max(0, pool.num_requests - pool.num_connections)
+        return stats
+
+    def close(self) -> None:
+        """Close all sessions and pooled connections."""
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+        self.adapter.close()
@@ -9,15 +9,34 @@ To-do:
 
 
 import fastapi  # type: ignore
-from fastapi import HTTPException, Header  # type: ignore
+from fastapi import BackgroundTasks, HTTPException, Header  # type: ignore
 from fastapi.middleware.cors import CORSMiddleware  # type: ignore
-from .yt_scrape import YouTubeScraper
+from fastapi.responses import StreamingResponse  # type: ignore
+from .yt_scrape import YouTubeScraper, TRANSCRIPT_PREFERENCES
 from .recipe_gen import RecipeGenerator
-from .types import ScrapeRequest, QueryRequest, VideoRequest
+from .rate_limit import RateLimiter
+from .routing import DEFAULT_ROUTES, ModelRouter, parse_routes
+from .recipe_cache import RecipeCache
+from .recipe_classifier import RecipeClassifier
+from .usage import UsageTracker
+from .batch import BatchProcessor, LocalBatchProcessor, OpenAIBatchProcessor
+from .http_pool import HttpPool
+from .transcript_cache import TranscriptCache
+from .dedup import DuplicateIndex
+from .quota import QuotaTracker, QuotaExceededError
+from .retry import RetryPolicy, CircuitBreaker
+from .compaction import TranscriptCompactor
+from .types import ScrapeRequest, QueryRequest, VideoRequest, VideoBatchRequest
+from .type import TranscriptPayload, VideoFilter
 from dotenv import load_dotenv  # type: ignore
+import asyncio
+import json
 import os
+import time
+import uuid
 from contextlib import asynccontextmanager
-from typing import List, Dict, Any, Optional
+from pathlib import Path
+from typing import Callable, List, Dict, Any, Optional, Tuple
 import sqlite3
 
 try:
@@ -29,6 +48,20 @@ except ImportError:  # pragma: no cover - optional dependency for local dev
 
 yt_api_key: Optional[str] = None
 openai_api_key: Optional[str] = None
+transcript_workers: int = 8
+http_pool: Optional[HttpPool] = None
+transcript_cache: Optional[TranscriptCache] = None
+duplicate_index: Optional[DuplicateIndex] = None
+quota_tracker: Optional[QuotaTracker] = None
+circuit_breaker: Optional[CircuitBreaker] = None
+scrape_retry_budget: int = 50
+transcript_preferences: List[str] = list(TRANSCRIPT_PREFERENCES)
+transcript_compactor: Optional[TranscriptCompactor] = None
+recipe_generator: Optional[RecipeGenerator] = None
+recipe_classifier: Optional[RecipeClassifier] = None
+# Offline batch jobs started by /batch/scrape_channel, keyed by job ID; finished
+# ones are dropped BATCH_JOB_TTL seconds after they end
+batch_jobs: Dict[str, Dict[str, Any]] = {}
 supabase: Optional["Client"] = None
 
 # database backend config
@@ -103,6 +136,21 @@ def _init_sqlite(db_path: str) -> sqlite3.Connection:
     return conn
 
 
+def _connect_cache(db_path: str) -> sqlite3.Connection:
+    """
+    Open a connection for one of the caches.
+
+    Each cache serializes its transactions with its own lock, so it gets its
+    own connection: on a shared one, a cache's commit would also commit
+    another's writes, or a recipe half inserted by _store_recipe_sqlite.
+    SQLite serializes writers across connections, and WAL keeps readers
+    from waiting on them.
+    """
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode = WAL;")
+    return conn
+
+
 def _store_recipe_sqlite(user_id: str, recipe_data: Dict[str, Any]) -> None:
     """
     Store recipe, ingredients, steps and generation log into SQLite.
@@ -112,16 +160,18 @@ def _store_recipe_sqlite(user_id: str, recipe_data: Dict[str, Any]) -> None:
 
     cur = sqlite_conn.cursor()
 
+    # nutritional_info is None when neither the model nor a linked recipe has it
+    nutrition = recipe_data.get("nutritional_info") or {}
     recipe_insert_data = (
         recipe_data["title"],
         recipe_data["video_id"],
         recipe_data.get("servings"),
         recipe_data.get("prep_time"),
         recipe_data.get("cook_time"),
-        recipe_data["nutritional_info"].get("calories"),
-        recipe_data["nutritional_info"].get("protein"),
-        recipe_data["nutritional_info"].get("carbs"),
-        recipe_data["nutritional_info"].get("fat"),
+        nutrition.get("calories"),
+        nutrition.get("protein"),
+        nutrition.get("carbs"),
+        nutrition.get("fat"),
     )
 
     cur.execute(
@@ -316,6 +366,158 @@ def _fetch_recipe_by_video_sqlite(video_id: str) -> Optional[Dict[str, Any]]:
         "steps": steps,
     }
 
+
+def _build_scraper(language: str, quantity: int = 50) -> YouTubeScraper:
+    """
+    Build a YouTubeScraper wired to the process-wide HTTP pool, transcript
+    cache, quota tracker and circuit breaker, with a fresh retry budget.
+    """
+    return YouTubeScraper(
+        yt_api_key,
+        language,
+        quantity,
+        max_workers=transcript_workers,
+        http=http_pool,
+        cache=transcript_cache,
+        quota=quota_tracker,
+        retry=RetryPolicy(retry_budget=scrape_retry_budget, breaker=circuit_breaker),
+        transcript_preferences=transcript_preferences,
+        dedup=duplicate_index,
+    )
+
+
+def _scrape_channel(
+    scraper: YouTubeScraper, handle: str, video_filter: Optional[VideoFilter]
+) -> List[TranscriptPayload]:
+    """
+    Resolve a channel handle and fetch the transcripts of its videos. Both
+    block on YouTube (with retry backoff), so run this in a worker thread.
+    """
+    channel_id = scraper.get_channel_id_by_handle(handle)
+    return scraper.process_transcripts(type="channel_id", arg=channel_id, video_filter=video_filter)
+
+
+def _transcript_token_budget(routes: List[Tuple[int, str]]) -> Optional[int]:
+    """
+    Token budget of the transcript compactor: TRANSCRIPT_TOKEN_BUDGET (0 = none).
+
+    It defaults to the largest model route, so transcripts the router sends
+    whole to a long-context model are never cut. Without routes, transcripts
+    over the chunk threshold are chunked and 30000 tokens is only a safety cap.
+    """
+    default = max((limit for limit, _ in routes), default=30000)
+    return int(os.getenv("TRANSCRIPT_TOKEN_BUDGET", str(default))) or None
+
+
+def _get_recipe_generator() -> RecipeGenerator:
+    """
+    The process-wide RecipeGenerator created in lifespan.
+    """
+    if recipe_generator is None:
+        raise RuntimeError("Recipe generator is not initialized")
+    return recipe_generator
+
+
+def _likely_recipes(videos: List[TranscriptPayload]) -> List[TranscriptPayload]:
+    """
+    Drop scraped videos whose transcript is unlikely to contain a recipe, so
+    vlogs and Q&As from a channel or search do not cost a completion.
+    """
+    if recipe_classifier is None:
+        return videos
+    kept, _ = recipe_classifier.filter(videos)
+    return kept
+
+
+def _scrape_likely_recipes(
+    scrape: Callable[..., List[TranscriptPayload]], *args: Any, **kwargs: Any
+) -> Tuple[List[TranscriptPayload], int]:
+    """
+    Run a blocking scrape, then classify its transcripts, in one worker thread.
+
+    Returns:
+        Tuple of the videos likely to be recipes and the number scraped
+    """
+    videos = scrape(*args, **kwargs)
+    return _likely_recipes(videos), len(videos)
+
+
+def _stored_recipe(stored: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a recipe read from SQLite back to the Recipe.model_dump() shape.
+    """
+    nutrition = {key: stored[key] for key in ("calories", "protein", "carbs", "fat") if stored.get(key) is not None}
+    return {
+        "title": stored["title"],
+        "video_id": stored["video_id"],
+        "ingredients": [{"name": i["name"], "quantity": i["quantity"]} for i in stored["ingredients"]],
+        "steps": [{"step_number": s["step_number"], "description": s["description"]} for s in stored["steps"]],
+        "servings": stored.get("servings"),
+        "prep_time": stored.get("prep_time"),
+        "cook_time": stored.get("cook_time"),
+        "nutritional_info": nutrition or None,
+    }
+
+
+def _linked_recipe(video: TranscriptPayload, generated: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Reuse the recipe of the video a near-duplicate transcript was linked to.
+
+    Args:
+        video: Scraped transcript
+        generated: Recipes generated earlier in this request, keyed by video_id
+
+    Returns:
+        The original's recipe under the duplicate's video_id, or None if the
+        video is not a duplicate or the original has no recipe
+    """
+    if video.duplicate_of is None:
+        return None
+    recipe = generated.get(video.duplicate_of)
+    if recipe is None and db_backend == "sqlite":
+        stored = _fetch_recipe_by_video_sqlite(video.duplicate_of)
+        recipe = _stored_recipe(stored) if stored else None
+    if recipe is None:
+        return None
+    print(f"Linked video {video.video_id} to the recipe of {video.duplicate_of}")
+    return {**recipe, "video_id": video.video_id}
+
+
+async def _generate_into(recipes: Dict[str, Dict[str, Any]], videos: List[TranscriptPayload]) -> None:
+    """
+    Generate recipes concurrently into a dict keyed by video_id; failures are logged.
+    """
+    async for i, recipe, error in _get_recipe_generator().agenerate_recipes(videos):
+        if recipe is None:
+            print(f"Error processing video {videos[i].video_id}: {error}")
+            continue
+        recipes[videos[i].video_id] = recipe.model_dump()
+
+
+async def _generate_recipes(videos: List[TranscriptPayload]) -> List[Dict[str, Any]]:
+    """
+    Generate recipes for scraped videos concurrently, within the OpenAI limits.
+    Near-duplicates of another video reuse its recipe; they are only generated
+    if the original has none. Failed videos are logged and skipped; the rest
+    keep the videos' order.
+    """
+    recipes: Dict[str, Dict[str, Any]] = {}
+    await _generate_into(recipes, [video for video in videos if video.duplicate_of is None])
+
+    unlinked = []
+    for video in videos:
+        if video.duplicate_of is None:
+            continue
+        linked = _linked_recipe(video, recipes)
+        if linked is not None:
+            recipes[video.video_id] = linked
+        else:
+            unlinked.append(video)
+    await _generate_into(recipes, unlinked)
+
+    return [recipes[video.video_id] for video in videos if video.video_id in recipes]
+
+
 @asynccontextmanager
 async def lifespan(app: fastapi.FastAPI):
     """
@@ -324,9 +526,13 @@ async def lifespan(app: fastapi.FastAPI):
     Initializes API keys and database backend (Supabase or SQLite).
     """
     load_dotenv()
-    global yt_api_key, openai_api_key, supabase, db_backend, sqlite_conn
+    global yt_api_key, openai_api_key, transcript_workers, http_pool, transcript_cache, duplicate_index, quota_tracker, circuit_breaker, scrape_retry_budget, transcript_preferences, transcript_compactor, recipe_generator, recipe_classifier, supabase, db_backend, sqlite_conn
     yt_api_key = os.getenv("YOUTUBE_API_KEY")
     openai_api_key = os.getenv("OPENAI_API_KEY")
+    # Number of transcripts fetched in parallel per scrape request
+    transcript_workers = int(os.getenv("TRANSCRIPT_WORKERS", "8"))
+    # Transcript fallback chain, e.g. "manual,generated,translated,any"
+    transcript_preferences = os.getenv("TRANSCRIPT_PREFERENCES", ",".join(TRANSCRIPT_PREFERENCES)).split(",")
 
     # Decide backend: SQLite for fast local spin-up, Supabase otherwise
     use_sqlite = os.getenv("USE_SQLITE", "").lower() in ("1", "true", "yes")
@@ -338,16 +544,91 @@ async def lifespan(app: fastapi.FastAPI):
     if not openai_api_key:
         raise ValueError("OPENAI_API_KEY environment variable not set")
 
+    db_path = os.getenv("SQLITE_DB_PATH", "recipes.db")
     if use_sqlite or not (supabase_url and supabase_key and create_client):
         # Fallback to SQLite when requested or when Supabase is not configured
         db_backend = "sqlite"
-        db_path = os.getenv("SQLITE_DB_PATH", "recipes.db")
         sqlite_conn = _init_sqlite(db_path)
     else:
         db_backend = "supabase"
         supabase = create_client(supabase_url, supabase_key)  # type: ignore
 
-    yield  
+    # The caches always live in the local SQLite file, each on its own connection
+    transcript_cache = TranscriptCache(
+        _connect_cache(db_path),
+        ttl_seconds=float(os.getenv("TRANSCRIPT_CACHE_TTL", str(30 * 24 * 3600))),
+        max_bytes=int(os.getenv("TRANSCRIPT_CACHE_MAX_BYTES", str(100 * 1024 * 1024))),
+        negative_ttl_seconds=float(os.getenv("TRANSCRIPT_NEGATIVE_CACHE_TTL", str(7 * 24 * 3600))),
+    )
+    # Re-uploads scoring at least DUPLICATE_THRESHOLD Jaccard similarity reuse the original's recipe (0 = off)
+    duplicate_threshold = float(os.getenv("DUPLICATE_THRESHOLD", "0.8"))
+    duplicate_index = DuplicateIndex(_connect_cache(db_path), threshold=duplicate_threshold) if duplicate_threshold > 0 else None
+    quota_tracker = QuotaTracker(
+        _connect_cache(db_path),
+        daily_limit=int(os.getenv("YOUTUBE_DAILY_QUOTA", "10000")),
+    )
+
+    # Model per transcript size ("max_tokens:model,..."; empty = always gpt-3.5-turbo)
+    model_routes = parse_routes(
+        os.getenv("OPENAI_MODEL_ROUTES", ",".join(f"{limit}:{model}" for limit, model in DEFAULT_ROUTES))
+    )
+    # Transcript clean-up before OpenAI, cut to TRANSCRIPT_TOKEN_BUDGET (0 = no budget)
+    transcript_compactor = TranscriptCompactor(token_budget=_transcript_token_budget(model_routes))
+
+    # One generator per process: prompts are read once and the OpenAI client keeps
+    # its connections alive across requests. PROMPT_RELOAD_INTERVAL=0 disables hot reload
+    prompt_reload_interval = float(os.getenv("PROMPT_RELOAD_INTERVAL", "5"))
+    # Concurrent completions per request and the OpenAI tier's per-minute limits (0 = unlimited)
+    rate_limiter = RateLimiter(
+        requests_per_minute=int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "3500")) or None,
+        tokens_per_minute=int(os.getenv("OPENAI_TOKENS_PER_MINUTE", "200000")) or None,
+    )
+    # Recipes keyed by transcript and prompts; bump PROMPT_VERSION to invalidate them
+    recipe_cache = RecipeCache(
+        _connect_cache(db_path),
+        prompt_version=os.getenv("PROMPT_VERSION", "1"),
+        ttl_seconds=float(os.getenv("RECIPE_CACHE_TTL", str(30 * 24 * 3600))),
+        max_bytes=int(os.getenv("RECIPE_CACHE_MAX_BYTES", str(50 * 1024 * 1024))),
+    )
+    # Per-completion token, latency and cost records, stored next to recipe_generations
+    usage_tracker = UsageTracker(_connect_cache(db_path))
+    # The model retried on rate limits or invalid recipes, and one for non-English transcripts
+    model_router = ModelRouter(
+        model_routes,
+        fallback_model=os.getenv("OPENAI_FALLBACK_MODEL", "gpt-4o-mini") or None,
+        multilingual_model=os.getenv("OPENAI_MULTILINGUAL_MODEL") or None,
+    ) if model_routes else None
+    recipe_generator = RecipeGenerator(
+        openai_api_key,
+        compactor=transcript_compactor,
+        prompt_reload_interval=prompt_reload_interval or None,
+        rate_limiter=rate_limiter,
+        max_concurrency=int(os.getenv("OPENAI_MAX_CONCURRENCY", "8")),
+        recipe_cache=recipe_cache,
+        usage_tracker=usage_tracker,
+        # Prompt tokens allowed per generation (0 = unlimited); over it, compress or reject
+        prompt_token_budget=int(os.getenv("PROMPT_TOKEN_BUDGET", "0")) or None,
+        over_budget=os.getenv("PROMPT_BUDGET_POLICY", "compress"),
+        model_router=model_router,
+    )
+    # Channel and query scrapes skip transcripts scoring below this recipe likelihood (0 = off)
+    recipe_classifier = RecipeClassifier(threshold=float(os.getenv("RECIPE_LIKELIHOOD_THRESHOLD", "0.3")))
+
+    # Circuit state is shared so an outage seen by one scrape fails fast for the others
+    circuit_breaker = CircuitBreaker()
+    scrape_retry_budget = int(os.getenv("SCRAPE_RETRY_BUDGET", "50"))
+
+    # One keep-alive connection pool shared by every scraper for the process lifetime
+    http_pool = HttpPool(
+        pool_maxsize=int(os.getenv("HTTP_POOL_SIZE", "20")),
+        connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT", "10")),
+        read_timeout=float(os.getenv("HTTP_READ_TIMEOUT", "60")),
+    )
+
+    yield
+
+    await recipe_generator.aclose()
+    http_pool.close()
 
 app = fastapi.FastAPI(
     title="ChefPanda YouTube Parser",
@@ -372,38 +653,31 @@ app.add_middleware(
 async def scrape_channel(request: ScrapeRequest) -> List[Dict[str, Any]]:
     """
     Scrape recipes from a YouTube channel.
+    Videos whose transcript is unlikely to contain a recipe are skipped
+    (RECIPE_LIKELIHOOD_THRESHOLD).
     
     Args:
         request: ScrapeRequest containing:
             - handle: YouTube channel handle (e.g. '@yooxicman')
             - language: Language code (default: 'en')
             - quantity: Number of videos to scrape (default: 200)
+            - video_filter: Optional caption/duration rules applied before transcripts are fetched
             
     Returns:
         List[Dict[str, Any]]: List of recipe dictionaries
     """
     try:
-        scraper = YouTubeScraper(yt_api_key, request.language, request.quantity)
-        channel_id = scraper.get_channel_id_by_handle(request.handle)
-        result = scraper.process_videos(type="channel_id", arg=channel_id)
+        scraper = _build_scraper(request.language, request.quantity)
+        result, _ = await asyncio.to_thread(
+            _scrape_likely_recipes, _scrape_channel, scraper, request.handle, request.video_filter
+        )
+    except QuotaExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
 
     try:
-        recipes = []
-        recipe_gen = RecipeGenerator(openai_api_key) 
-        
-        # Process videos in batches to avoid timeouts
-        batch_size = 1  # Process one video at a time to ensure reliability
-        for i in range(0, len(result), batch_size):
-            batch = result[i:i + batch_size]
-            for video in batch:
-                try:
-                    recipe = recipe_gen.generate_recipe(str(video))
-                    recipes.append(recipe.model_dump())
-                except Exception as e:
-                    print(f"Error processing video {i}: {str(e)}")
-                    continue
+        recipes = await _generate_recipes(result)
                 
         if not recipes:
             raise HTTPException(status_code=404, detail="No recipes could be generated from the videos")
@@ -416,39 +690,34 @@ async def scrape_channel(request: ScrapeRequest) -> List[Dict[str, Any]]:
 async def scrape_query(request: QueryRequest) -> List[Dict[str, Any]]:
     """
     Search and scrape recipes based on a query.
+    Videos whose transcript is unlikely to contain a recipe are skipped
+    (RECIPE_LIKELIHOOD_THRESHOLD).
     
     Args:
         request: QueryRequest containing:
             - query: Search query string
             - language: Language code (default: 'en')
             - quantity: Number of videos to scrape (default: 50)
+            - video_filter: Optional caption/duration rules applied before transcripts are fetched
             
     Returns:
         List[Dict[str, Any]]: List of recipe dictionaries
     """
     try:
-        scraper = YouTubeScraper(yt_api_key, request.language, request.quantity)
-        result = scraper.process_videos(type="query", arg=request.query)
-        if not result:
+        scraper = _build_scraper(request.language, request.quantity)
+        result, scraped = await asyncio.to_thread(
+            _scrape_likely_recipes,
+            scraper.process_transcripts, type="query", arg=request.query, video_filter=request.video_filter,
+        )
+        if not scraped:
             raise HTTPException(status_code=404, detail="No videos found for query")
+    except QuotaExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
 
     try:
-        recipes = []
-        recipe_gen = RecipeGenerator(openai_api_key)
-        
-        # Process videos in batches to avoid timeouts
-        batch_size = 1  # Process one video at a time to ensure reliability
-        for i in range(0, len(result), batch_size):
-            batch = result[i:i + batch_size]
-            for video in batch:
-                try:
-                    recipe = recipe_gen.generate_recipe(str(video))
-                    recipes.append(recipe.model_dump())
-                except Exception as e:
-                    print(f"Error processing video {i}: {str(e)}")
-                    continue
+        recipes = await _generate_recipes(result)
                 
         if not recipes:
             raise HTTPException(status_code=404, detail="No recipes could be generated from the videos")
@@ -457,108 +726,316 @@ async def scrape_query(request: QueryRequest) -> List[Dict[str, Any]]:
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing recipes: {str(e)}")
 
-@app.post("/scrape_video_id")
-async def scrape_video_id(request: VideoRequest, authorization: str = Header(None)) -> Dict[str, Any]:
+@app.post("/scrape_video_ids")
+async def scrape_video_ids(request: VideoBatchRequest) -> List[Dict[str, Any]]:
+    """
+    Scrape recipes from several YouTube videos in one request.
+    Video metadata is looked up 50 IDs per YouTube API call.
+
+    Args:
+        request: VideoBatchRequest containing:
+            - ids: List of YouTube video IDs
+            - language: Language code (default: 'en')
+            - video_filter: Optional caption/duration rules applied before transcripts are fetched
+
+    Returns:
+        List[Dict[str, Any]]: List of recipe dictionaries
+    """
+    if not request.ids:
+        raise HTTPException(status_code=400, detail="No video IDs given")
+
+    try:
+        scraper = _build_scraper(request.language, len(request.ids))
+        result = await asyncio.to_thread(
+            scraper.process_transcripts, type="ids", arg=request.ids, video_filter=request.video_filter
+        )
+    except QuotaExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
+
+    if not result:
+        raise HTTPException(status_code=404, detail="No videos found for the given IDs")
+
+    recipes = await _generate_recipes(result)
+    if not recipes:
+        raise HTTPException(status_code=404, detail="No recipes could be generated from the videos")
+
+    return recipes
+
+def _resolve_user_id(authorization: Optional[str]) -> Optional[str]:
+    """
+    Check the Authorization header of a generation request.
+
+    Returns:
+        The local user id in SQLite mode without a bearer token, otherwise None
+        (the Supabase user is looked up when persisting)
+
+    Raises:
+        HTTPException: 401 in Supabase mode without a bearer token
+    """
     if not authorization or not authorization.startswith("Bearer "):
         # For local SQLite mode we don't strictly need auth, but keep this for compatibility
         if db_backend == "sqlite":
             # Use a fixed local user id to keep logic simple
-            user_id = os.getenv(
+            return os.getenv(
                 "LOCAL_USER_ID",
                 "local-user",
             )
-        else:
-            raise HTTPException(status_code=401, detail="Missing or invalid authorization token")
+        raise HTTPException(status_code=401, detail="Missing or invalid authorization token")
+    return None  # will be set when persisting
+
+
+def _persist_recipe(recipe_data: Dict[str, Any], authorization: Optional[str], user_id: Optional[str]) -> None:
+    """
+    Store a generated recipe in the configured backend and log the generation.
+    """
+    if db_backend == "sqlite":
+        if user_id is None:
+            # If we reached here with a bearer token in SQLite mode, still derive a stable user id
+            token = authorization.split(" ")[1] if authorization else ""
+            user_id = os.getenv("LOCAL_USER_ID", token or "local-user")
+        _store_recipe_sqlite(user_id, recipe_data)
     else:
-        user_id = None  # will be set below when needed
+        if supabase is None or create_client is None:
+            raise RuntimeError("Supabase client is not initialized")
+        if authorization is None:
+            raise HTTPException(status_code=401, detail="Missing or invalid authorization token")
+
+        token = authorization.split(" ")[1]
+        user = supabase.auth.get_user(token)
+        user_id = user.user.id
+
+        user_supabase = create_client(
+            os.getenv("SUPABASE_URL"),
+            os.getenv("SUPABASE_KEY"),
+        )
+        user_supabase.auth.set_session(token, "")
+
+        # 🔹 Insert into recipes table
+        nutrition = recipe_data.get("nutritional_info") or {}
+        recipe_insert_data = {
+            "title": recipe_data["title"],
+            "video_id": recipe_data["video_id"],
+            "servings": recipe_data.get("servings"),
+            "prep_time": recipe_data.get("prep_time"),
+            "cook_time": recipe_data.get("cook_time"),
+            "calories": nutrition.get("calories"),
+            "protein": nutrition.get("protein"),
+            "carbs": nutrition.get("carbs"),
+            "fat": nutrition.get("fat"),
+        }
+        recipe_response = user_supabase.table("recipes").insert(recipe_insert_data).execute()
+        recipe_id = recipe_response.data[0]["id"]
+
+        # 🔹 Insert ingredients
+        ingredients_data = [
+            {
+                "recipe_id": recipe_id,
+                "name": ing["name"],
+                "quantity": ing["quantity"],
+            }
+            for ing in recipe_data["ingredients"]
+        ]
+        user_supabase.table("ingredients").insert(ingredients_data).execute()
+
+        # 🔹 Insert steps
+        steps_data = [
+            {
+                "recipe_id": recipe_id,
+                "step_number": step["step_number"],
+                "description": step["description"],
+            }
+            for step in recipe_data["steps"]
+        ]
+        user_supabase.table("steps").insert(steps_data).execute()
+
+        # 🔹 Log generation last
+        user_supabase.table("recipe_generations").insert(
+            {
+                "user_id": user_id,
+            }
+        ).execute()
+
+
+@app.post("/scrape_video_id")
+async def scrape_video_id(request: VideoRequest, authorization: str = Header(None)) -> Dict[str, Any]:
+    user_id = _resolve_user_id(authorization)
 
     try:
-        scraper = YouTubeScraper(yt_api_key, request.language)
-        results = scraper.process_videos(type="id", arg=request.id)
+        scraper = _build_scraper(request.language)
+        results = await asyncio.to_thread(scraper.process_transcripts, type="id", arg=request.id)
 
         if not results:
             raise HTTPException(status_code=404, detail="Video not found or no transcript available")
 
-        # 🔹 Generate recipe
-        recipe_gen = RecipeGenerator(openai_api_key)
-        recipe = recipe_gen.generate_recipe(str(results[0]))
-        recipe_data = recipe.model_dump()
+        # 🔹 Generate recipe, or reuse the one of the video this transcript duplicates
+        recipe_data = _linked_recipe(results[0], {}) or _get_recipe_generator().generate_recipe(results[0]).model_dump()
 
         # 🔹 Persist to the configured backend
-        if db_backend == "sqlite":
-            if user_id is None:
-                # If we reached here with a bearer token in SQLite mode, still derive a stable user id
-                token = authorization.split(" ")[1] if authorization else ""
-                user_id = os.getenv("LOCAL_USER_ID", token or "local-user")
-            _store_recipe_sqlite(user_id, recipe_data)
-        else:
-            if supabase is None or create_client is None:
-                raise RuntimeError("Supabase client is not initialized")
-
-            token = authorization.split(" ")[1]
-            user = supabase.auth.get_user(token)
-            user_id = user.user.id
-
-            user_supabase = create_client(
-                os.getenv("SUPABASE_URL"),
-                os.getenv("SUPABASE_KEY"),
-            )
-            user_supabase.auth.set_session(token, "")
-
-            # 🔹 Insert into recipes table
-            recipe_insert_data = {
-                "title": recipe_data["title"],
-                "video_id": recipe_data["video_id"],
-                "servings": recipe_data.get("servings"),
-                "prep_time": recipe_data.get("prep_time"),
-                "cook_time": recipe_data.get("cook_time"),
-                "calories": recipe_data["nutritional_info"].get("calories"),
-                "protein": recipe_data["nutritional_info"].get("protein"),
-                "carbs": recipe_data["nutritional_info"].get("carbs"),
-                "fat": recipe_data["nutritional_info"].get("fat"),
-            }
-            recipe_response = user_supabase.table("recipes").insert(recipe_insert_data).execute()
-            recipe_id = recipe_response.data[0]["id"]
-
-            # 🔹 Insert ingredients
-            ingredients_data = [
-                {
-                    "recipe_id": recipe_id,
-                    "name": ing["name"],
-                    "quantity": ing["quantity"],
-                }
-                for ing in recipe_data["ingredients"]
-            ]
-            user_supabase.table("ingredients").insert(ingredients_data).execute()
-
-            # 🔹 Insert steps
-            steps_data = [
-                {
-                    "recipe_id": recipe_id,
-                    "step_number": step["step_number"],
-                    "description": step["description"],
-                }
-                for step in recipe_data["steps"]
-            ]
-            user_supabase.table("steps").insert(steps_data).execute()
-
-            # 🔹 Log generation last
-            user_supabase.table("recipe_generations").insert(
-                {
-                    "user_id": user_id,
-                }
-            ).execute()
+        _persist_recipe(recipe_data, authorization, user_id)
 
         return recipe_data
 
     except HTTPException:
         raise
+    except QuotaExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         if 'Invalid JWT' in str(e):
             raise HTTPException(status_code=401, detail="Invalid authentication token")
         raise HTTPException(status_code=500, detail=f"Error processing video: {str(e)}")
 
 
+@app.post("/scrape_video_id/stream")
+async def scrape_video_id_stream(request: VideoRequest, authorization: str = Header(None)) -> StreamingResponse:
+    """
+    Streaming variant of /scrape_video_id.
+
+    Responds with NDJSON events as the recipe is generated: {"event": "title"},
+    then one {"event": "ingredient"} / {"event": "step"} per item, and finally
+    {"event": "recipe"} with the validated recipe once it is persisted, or
+    {"event": "error"} if generation or storage fails. A near-duplicate of a
+    video with a stored recipe only gets the "recipe" event.
+    """
+    user_id = _resolve_user_id(authorization)
+
+    try:
+        scraper = _build_scraper(request.language)
+        results = await asyncio.to_thread(scraper.process_transcripts, type="id", arg=request.id)
+    except QuotaExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing video: {str(e)}")
+
+    if not results:
+        raise HTTPException(status_code=404, detail="Video not found or no transcript available")
+
+    def events():
+        try:
+            linked = _linked_recipe(results[0], {})
+            if linked is not None:
+                _persist_recipe(linked, authorization, user_id)
+                yield json.dumps({"event": "recipe", "data": linked}) + "\n"
+                return
+            for event, data in _get_recipe_generator().stream_recipe(results[0]):
+                if event == "recipe":
+                    data = data.model_dump()
+                    _persist_recipe(data, authorization, user_id)
+                yield json.dumps({"event": event, "data": data}) + "\n"
+        except Exception as e:
+            yield json.dumps({"event": "error", "data": str(e)}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+def _batch_processor() -> BatchProcessor:
+    """
+    Batch backend: the OpenAI Batch API, or with BATCH_PROCESSOR=local a
+    stand-in that runs every request on submit.
+    """
+    client = _get_recipe_generator().openai
+    if os.getenv("BATCH_PROCESSOR", "openai").lower() == "local":
+        return LocalBatchProcessor(lambda body: client.chat.completions.create(**body).model_dump())
+    return OpenAIBatchProcessor(client)
+
+
+def _run_batch_job(job_id: str, videos: List[TranscriptPayload], user_id: str) -> None:
+    """
+    Background task: generate recipes through a batch job and store them in SQLite.
+    """
+    job = batch_jobs[job_id]
+    job["status"] = "running"
+
+    def store(recipe: Any) -> None:
+        try:
+            _store_recipe_sqlite(user_id, recipe.model_dump())
+            job["stored"] += 1
+        except Exception as e:
+            print(f"Error storing recipe for video {recipe.video_id}: {str(e)}")
+
+    try:
+        results = _get_recipe_generator().run_batch(
+            videos,
+            _batch_processor(),
+            Path(os.getenv("BATCH_JOB_DIR", "batch_jobs")),
+            poll_interval=float(os.getenv("BATCH_POLL_INTERVAL", "60")),
+            on_result=store,
+        )
+        job["failed"] = {video_id: error for video_id, recipe, error in results if recipe is None}
+        job["status"] = "completed"
+    except Exception as e:
+        job["status"] = "failed"
+        job["error"] = str(e)
+    job["finished_at"] = time.time()
+
+
+def _evict_batch_jobs(now: float) -> None:
+    """Drop batch jobs that finished more than BATCH_JOB_TTL seconds ago."""
+    ttl = float(os.getenv("BATCH_JOB_TTL", str(24 * 3600)))
+    for job_id, job in list(batch_jobs.items()):
+        if job["finished_at"] is not None and now - job["finished_at"] > ttl:
+            del batch_jobs[job_id]
+
+
+@app.post("/batch/scrape_channel")
+async def batch_scrape_channel(request: ScrapeRequest, background_tasks: BackgroundTasks) -> Dict[str, Any]:
+    """
+    Backfill a channel's recipes through an offline batch job.
+    Transcripts are fetched now; recipes are generated in the background and
+    stored in SQLite when the batch finishes.
+
+    Args:
+        request: ScrapeRequest (same fields as /scrape_channel)
+
+    Returns:
+        Dict[str, Any]: job_id, the number of videos submitted and the number
+        skipped as unlikely recipes
+    """
+    if db_backend != "sqlite":
+        raise HTTPException(status_code=400, detail="Batch mode stores recipes in SQLite; enable USE_SQLITE")
+
+    try:
+        scraper = _build_scraper(request.language, request.quantity)
+        videos, scraped = await asyncio.to_thread(
+            _scrape_likely_recipes, _scrape_channel, scraper, request.handle, request.video_filter
+        )
+    except QuotaExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
+
+    if not scraped:
+        raise HTTPException(status_code=404, detail="No videos with transcripts found for the channel")
+    if not videos:
+        raise HTTPException(status_code=404, detail="No videos of the channel look like recipes")
+
+    _evict_batch_jobs(time.time())
+    job_id = str(uuid.uuid4())
+    batch_jobs[job_id] = {
+        "status": "queued", "videos": len(videos), "skipped": scraped - len(videos),
+        "stored": 0, "failed": {}, "error": None, "finished_at": None,
+    }
+    background_tasks.add_task(_run_batch_job, job_id, videos, os.getenv("LOCAL_USER_ID", "local-user"))
+    return {"job_id": job_id, "videos": len(videos), "skipped": scraped - len(videos)}
+
+
+@app.get("/batch/{job_id}")
+async def get_batch_job(job_id: str) -> Dict[str, Any]:
+    """
+    Status of a batch job started by /batch/scrape_channel. Jobs are kept
+    for BATCH_JOB_TTL seconds (default a day) after they finish.
+
+    Returns:
+        Dict[str, Any]: status, videos, skipped, stored, failed (video_id -> error),
+        error and finished_at
+    """
+    _evict_batch_jobs(time.time())
+    if job_id not in batch_jobs:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    return batch_jobs[job_id]
+
+
 @app.get("/recipes")
 async def list_recipes() -> List[Dict[str, Any]]:
     """
@@ -604,6 +1081,16 @@ async def get_status() -> Dict[str, Any]:
             - service: Overall service status
             - youtube_api: YouTube API key status
             - openai_api: OpenAI API key status
+            - http_connections: Per-host connection reuse statistics
+            - transcript_cache: Transcript cache hit/miss statistics
+            - circuit_breakers: Circuit state and retry totals per YouTube endpoint
+            - transcript_compaction: Prompt tokens before/after transcript compaction
+            - openai_rate_limit: OpenAI per-minute limits, remaining capacity and waits
+            - recipe_cache: Recipe response cache hit rate, size and saved tokens
+            - recipe_validation: Time spent validating OpenAI responses
+            - model_routing: Requests, failures, fallbacks and latency per OpenAI model
+            - recipe_classifier: Videos checked and skipped as unlikely recipes
+            - duplicate_index: Indexed transcripts and near-duplicates found
     """
     try:
         # Basic validation of API keys
@@ -614,11 +1101,37 @@ async def get_status() -> Dict[str, Any]:
             "service": "healthy",
             "youtube_api": yt_status,
             "openai_api": openai_status,
+            "http_connections": http_pool.stats() if http_pool else {},
+            "transcript_cache": transcript_cache.stats() if transcript_cache else {},
+            "circuit_breakers": circuit_breaker.stats() if circuit_breaker else {},
+            "transcript_compaction": transcript_compactor.stats() if transcript_compactor else {},
+            "openai_rate_limit": recipe_generator.rate_limiter.stats() if recipe_generator and recipe_generator.rate_limiter else {},
+            "recipe_cache": recipe_generator.recipe_cache.stats() if recipe_generator and recipe_generator.recipe_cache else {},
+            "recipe_validation": recipe_generator.validation_stats() if recipe_generator else {},
+            "model_routing": recipe_generator.model_router.stats() if recipe_generator and recipe_generator.model_router else {},
+            "recipe_classifier": recipe_classifier.stats() if recipe_classifier else {},
+            "duplicate_index": duplicate_index.stats() if duplicate_index else {},
             "version": app.version
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error checking status: {str(e)}")
 
+def _openai_limits() -> Dict[str, Any]:
+    """
+    Configured OpenAI limits with the usage recorded against them.
+    """
+    generator = _get_recipe_generator()
+    limiter = generator.rate_limiter
+    usage = generator.usage_tracker
+    return {
+        "requests_per_min": limiter.requests_per_minute if limiter else None,
+        "tokens_per_min": limiter.tokens_per_minute if limiter else None,
+        "reset_period": "per minute",
+        "prompt_token_budget": generator.prompt_token_budget,
+        "usage": usage.stats() if usage else {},
+    }
+
+
 @app.get("/limits")
 async def get_rate_limits() -> Dict[str, Any]:
     """
@@ -628,19 +1141,12 @@ async def get_rate_limits() -> Dict[str, Any]:
         Dict[str, Any]: Rate limit information for APIs
     """
     try:
-        # You would typically implement actual quota checking here
-        # This is a placeholder implementation
+        if quota_tracker is None:
+            raise RuntimeError("Quota tracker is not initialized")
+
         return {
-            "youtube_api": {
-                "daily_quota": 10000,
-                "quota_remaining": 9000,
-                "reset_time": "midnight PT"
-            },
-            "openai_api": {
-                "requests_per_min": 60,
-                "tokens_per_min": 40000,
-                "reset_period": "per minute"
-            }
+            "youtube_api": quota_tracker.stats(),
+            "openai_api": _openai_limits()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error checking rate limits: {str(e)}")
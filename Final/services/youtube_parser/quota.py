@@ -0,0 +1,173 @@
+"""
+YouTube Data API quota accounting.
+"""
+
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict
+from zoneinfo import ZoneInfo
+
+# The daily quota resets at midnight Pacific time
+PACIFIC = ZoneInfo("America/Los_Angeles")
+
+# Documented unit cost per list call
+# https://developers.google.com/youtube/v3/determine_quota_cost
+ENDPOINT_COSTS: Dict[str, int] = {
+    "search": 100,
+    "channels": 1,
+    "videos": 1,
+    "playlistItems": 1,
+}
+
+
+class QuotaExceededError(RuntimeError):
+    """Raised when a call would exceed the remaining daily YouTube quota."""
+
+
+class QuotaTracker:
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        daily_limit: int = 10000,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Track daily YouTube Data API usage, persisted in SQLite.
+
+        Args:
+            conn: SQLite connection (opened with check_same_thread=False)
+            daily_limit: Daily quota of the API key, in units
+            clock: Time source, in seconds since the epoch
+        """
+        self.conn = conn
+        self.daily_limit = daily_limit
+        self.clock = clock
+        # Shared by the scraper's worker threads
+        self._lock = threading.Lock()
+
+        with self._lock:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS youtube_quota (
+                    day TEXT PRIMARY KEY,
+                    units INTEGER NOT NULL
+                );
+                """
+            )
+            self.conn.commit()
+
+    def _today(self) -> str:
+        """Current quota day, as a Pacific time date string."""
+        return datetime.fromtimestamp(self.clock(), PACIFIC).date().isoformat()
+
+    def used(self) -> int:
+        """
+        Units used so far today.
+
+        Returns:
+            int: Units charged since the last reset
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT units FROM youtube_quota WHERE day = ?;",
+                (self._today(),),
+            ).fetchone()
+        return row[0] if row else 0
+
+    def remaining(self) -> int:
+        """
+        Units left today.
+
+        Returns:
+            int: Remaining units, never negative
+        """
+        return max(0, self.daily_limit - self.used())
+
+    def can_afford(self, endpoint: str, calls: int = 1) -> bool:
+        """
+        Whether the given number of calls to an endpoint fit in today's quota.
+
+        Args:
+            endpoint: API endpoint name (e.g. 'search')
+            calls: Number of calls
+
+        Returns:
+            bool
+        """
+        return self.cost(endpoint) * calls <= self.remaining()
+
+    def cost(self, endpoint: str) -> int:
+        """
+        Unit cost of one call to an endpoint.
+
+        Args:
+            endpoint: API endpoint name (e.g. 'search')
+
+        Returns:
+            int: Units; unknown endpoints cost 1
+        """
+        return ENDPOINT_COSTS.get(endpoint, 1)
+
+    def charge(self, endpoint: str) -> int:
+        """
+        Charge one call to an endpoint against today's quota.
+
+        Args:
+            endpoint: API endpoint name (e.g. 'search')
+
+        Returns:
+            int: Units used today after this call
+
+        Raises:
+            QuotaExceededError: If the call does not fit in the remaining quota
+        """
+        cost = self.cost(endpoint)
+        day = self._today()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT units FROM youtube_quota WHERE day = ?;",
+                (day,),
+            ).fetchone()
+            used = row[0] if row else 0
+            if used + cost > self.daily_limit:
+                raise QuotaExceededError(
+                    f"YouTube quota exceeded: {endpoint} costs {cost} units, "
+                    f"{max(0, self.daily_limit - used)} remaining today"
+                )
+            self.conn.execute(
+                """
+                INSERT INTO youtube_quota (day, units) VALUES (?, ?)
+                ON CONFLICT(day) DO UPDATE SET units = units + excluded.units;
+                """,
+                (day, cost),
+            )
+            self.conn.commit()
+        return used + cost
+
+    def reset_time(self) -> datetime:
+        """
+        Time of the next quota reset.
+
+        Returns:
+            datetime: Next midnight Pacific time
+        """
+        now = datetime.fromtimestamp(self.clock(), PACIFIC)
+        tomorrow = now.date() + timedelta(days=1)
+        return datetime(tomorrow.year, tomorrow.month, tomorrow.day, tzinfo=PACIFIC)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Quota information for the /limits endpoint.
+
+        Returns:
+            Dict with daily_quota, quota_used, quota_remaining and reset_time
+        """
+        used = self.used()
+        return {
+            "daily_quota": self.daily_limit,
+            "quota_used": used,
+            "quota_remaining": max(0, self.daily_limit - used),
+            "reset_time": self.reset_time().isoformat(),
+        }
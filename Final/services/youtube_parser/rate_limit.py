@@ -0,0 +1,128 @@
+"""
+Client-side OpenAI rate limiting: requests and tokens per minute.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Token buckets for an OpenAI tier's per-minute limits.
+
+        Each bucket holds up to one minute of capacity and refills continuously.
+        Callers reserve one request and their estimated tokens before each call
+        and wait while either bucket is short. Usable from threads (acquire_sync)
+        and coroutines (acquire).
+
+        Args:
+            requests_per_minute: Request limit; None for no limit
+            tokens_per_minute: Token limit (prompt plus completion); None for no limit
+            clock: Time source, in seconds
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.clock = clock
+        self._requests = float(requests_per_minute or 0)
+        self._tokens = float(tokens_per_minute or 0)
+        self._updated_at = clock()
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        """Add the capacity accrued since the last update."""
+        elapsed = max(0.0, now - self._updated_at)
+        self._updated_at = now
+        if self.requests_per_minute:
+            self._requests = min(float(self.requests_per_minute), self._requests + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self._tokens = min(float(self.tokens_per_minute), self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    def reserve(self, tokens: int) -> float:
+        """
+        Try to reserve one request and the given tokens.
+
+        Args:
+            tokens: Estimated tokens of the call; capped at the per-minute limit
+                so that a single large call can always go through eventually
+
+        Returns:
+            float: 0 if reserved, otherwise the seconds to wait before retrying
+        """
+        with self._lock:
+            self._refill(self.clock())
+            wait = 0.0
+            if self.requests_per_minute and self._requests < 1:
+                wait = max(wait, (1 - self._requests) * 60 / self.requests_per_minute)
+            if self.tokens_per_minute:
+                needed = min(tokens, self.tokens_per_minute)
+                if self._tokens < needed:
+                    wait = max(wait, (needed - self._tokens) * 60 / self.tokens_per_minute)
+            if wait > 0:
+                return wait
+            if self.requests_per_minute:
+                self._requests -= 1
+            if self.tokens_per_minute:
+                self._tokens -= min(tokens, self.tokens_per_minute)
+            return 0.0
+
+    def _record_wait(self, delay: float) -> None:
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds += delay
+
+    def acquire_sync(self, tokens: int) -> None:
+        """
+        Block the calling thread until the call fits in the limits.
+
+        Args:
+            tokens: Estimated tokens of the call
+        """
+        while True:
+            delay = self.reserve(tokens)
+            if delay <= 0:
+                return
+            self._record_wait(delay)
+            time.sleep(delay)
+
+    async def acquire(self, tokens: int) -> None:
+        """
+        Wait without blocking the event loop until the call fits in the limits.
+
+        Args:
+            tokens: Estimated tokens of the call
+        """
+        while True:
+            delay = self.reserve(tokens)
+            if delay <= 0:
+                return
+            self._record_wait(delay)
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Limits, remaining capacity and time spent waiting.
+
+        Returns:
+            Dict with requests_per_minute, tokens_per_minute, requests_available,
+            tokens_available, waits and wait_seconds
+        """
+        with self._lock:
+            self._refill(self.clock())
+            return {
+                "requests_per_minute": self.requests_per_minute,
+                "tokens_per_minute": self.tokens_per_minute,
+                "requests_available": int(self._requests) if self.requests_per_minute else None,
+                "tokens_available": int(self._tokens) if self.tokens_per_minute else None,
+                "waits": self.waits,
+                "wait_seconds": round(self.wait_seconds, 3),
+            }
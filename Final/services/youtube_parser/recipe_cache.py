@@ -0,0 +1,212 @@
+"""
+Content-addressed cache of generated recipes, backed by the service's SQLite database.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from .type import Recipe
+
+
+def recipe_cache_key(
+    transcript_text: str,
+    system_prompt: str,
+    extraction_prompt: str,
+    model: str,
+    temperature: float,
+) -> str:
+    """
+    Hash everything that determines a completion.
+
+    Args:
+        transcript_text: Transcript text sent to the model (after compaction)
+        system_prompt: System prompt
+        extraction_prompt: Extraction prompt template
+        model: OpenAI model name
+        temperature: Sampling temperature
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    payload = json.dumps(
+        [transcript_text, system_prompt, extraction_prompt, model, temperature],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RecipeCache:
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        prompt_version: str = "1",
+        ttl_seconds: float = 30 * 24 * 3600,
+        max_bytes: int = 50 * 1024 * 1024,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Cache of validated recipes keyed by recipe_cache_key.
+
+        Entries written under another prompt_version are dropped on start-up,
+        so bumping the version invalidates the whole cache.
+
+        Args:
+            conn: SQLite connection (opened with check_same_thread=False)
+            prompt_version: Version of the prompts/output format
+            ttl_seconds: How long a cached recipe stays valid
+            max_bytes: Maximum total size of the stored recipes; the least
+                recently used entries are evicted above it
+            clock: Time source, in seconds
+        """
+        self.conn = conn
+        self.prompt_version = prompt_version
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.saved_tokens = 0
+        # Access times of hits, written with the next put rather than committed on every hit
+        self._accessed: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        with self._lock:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS recipe_cache (
+                    key TEXT PRIMARY KEY,
+                    prompt_version TEXT NOT NULL,
+                    recipe TEXT NOT NULL,
+                    tokens INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                );
+                """
+            )
+            cur = self.conn.execute(
+                "DELETE FROM recipe_cache WHERE prompt_version != ?;",
+                (self.prompt_version,),
+            )
+            if cur.rowcount > 0:
+                print(f"Invalidated {cur.rowcount} cached recipes (prompt version {self.prompt_version})")
+            self.conn.commit()
+
+    def get(self, key: str, video_id: str) -> Optional[Recipe]:
+        """
+        Look up a cached recipe.
+
+        Args:
+            key: Cache key from recipe_cache_key
+            video_id: Video the recipe is requested for; the same transcript may
+                belong to several videos
+
+        Returns:
+            Recipe with video_id set, or None on a miss or if the entry expired
+        """
+        now = self.clock()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT recipe, tokens, created_at FROM recipe_cache WHERE key = ? AND prompt_version = ?;",
+                (key, self.prompt_version),
+            ).fetchone()
+
+            if row is None or now - row[2] > self.ttl_seconds:
+                if row is not None:
+                    self.conn.execute("DELETE FROM recipe_cache WHERE key = ?;", (key,))
+                    self.conn.commit()
+                self.misses += 1
+                return None
+
+            self._accessed[key] = now
+            self.hits += 1
+            self.saved_tokens += row[1]
+
+        return Recipe.model_validate_json(row[0]).model_copy(update={"video_id": video_id})
+
+    def put(self, key: str, recipe: Recipe, tokens: int) -> None:
+        """
+        Store a validated recipe.
+
+        Args:
+            key: Cache key from recipe_cache_key
+            recipe: Generated recipe
+            tokens: Tokens the generation cost, counted as saved on each hit
+        """
+        now = self.clock()
+        data = recipe.model_dump_json()
+        size = len(data.encode("utf-8"))
+        with self._lock:
+            self.conn.execute(
+                """
+                INSERT OR REPLACE INTO recipe_cache (
+                    key, prompt_version, recipe, tokens, size, created_at, accessed_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?);
+                """,
+                (key, self.prompt_version, data, tokens, size, now, now),
+            )
+            self._write_accessed()
+            self._evict(now)
+            self.conn.commit()
+
+    def _write_accessed(self) -> None:
+        """Write the access times of the hits since the last put; eviction orders by them."""
+        self.conn.executemany(
+            "UPDATE recipe_cache SET accessed_at = ? WHERE key = ?;",
+            [(accessed_at, key) for key, accessed_at in self._accessed.items()],
+        )
+        self._accessed.clear()
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then least recently used ones until under max_bytes."""
+        cur = self.conn.execute(
+            "DELETE FROM recipe_cache WHERE created_at < ?;",
+            (now - self.ttl_seconds,),
+        )
+        self.evictions += max(cur.rowcount, 0)
+
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM recipe_cache;").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self.conn.execute(
+            "SELECT key, size FROM recipe_cache ORDER BY accessed_at ASC;"
+        ).fetchall()
+        stale = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self.conn.executemany("DELETE FROM recipe_cache WHERE key = ?;", stale)
+        self.evictions += len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Cache statistics.
+
+        Returns:
+            Dict with prompt_version, hits, misses, hit_rate, evictions,
+            entries, bytes and saved_tokens
+        """
+        with self._lock:
+            entries, size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM recipe_cache;"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "prompt_version": self.prompt_version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+            "saved_tokens": self.saved_tokens,
+        }
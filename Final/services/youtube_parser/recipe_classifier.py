@@ -0,0 +1,151 @@
+"""
+Local recipe-likelihood scoring, to skip videos without a recipe before any OpenAI call.
+"""
+
+import re
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+from .type import TranscriptPayload
+
+# Common ingredients, singular and plural
+INGREDIENT_WORDS = frozenset("""
+    flour sugar salt pepper butter oil olive egg eggs milk cream cheese yeast water
+    garlic onion onions shallot shallots ginger chili chilies chilli lemon lemons lime limes
+    tomato tomatoes potato potatoes carrot carrots celery peppers mushroom mushrooms
+    spinach basil parsley cilantro coriander thyme rosemary oregano cumin paprika cinnamon
+    nutmeg vanilla honey vinegar soy sauce stock broth rice pasta noodles bread dough
+    chicken beef pork lamb bacon sausage fish salmon tuna shrimp prawns tofu beans lentils
+    chickpeas corn peas cabbage broccoli zucchini eggplant avocado apple apples banana
+    bananas berries strawberries chocolate cocoa nuts almonds walnuts peanut sesame
+    mayonnaise mustard ketchup yogurt buttermilk cornstarch baking soda powder
+""".split())
+
+# Verbs of cooking instructions
+COOKING_VERBS = frozenset("""
+    bake baking boil boiling simmer simmering fry frying saute sauteing roast roasting grill
+    grilling chop chopped dice diced slice sliced mince minced stir whisk whisking knead
+    mix mixing fold blend marinate season preheat drain toss melt melted grate grated peel
+    peeled sear steam reduce combine beat poach broil caramelize garnish
+""".split())
+
+# Quantities such as "2 cups", "1/2 teaspoon" or "350 degrees"
+MEASUREMENT_PATTERN = re.compile(
+    r"\b\d+(?:[./]\d+)?\s*(?:cups?|tablespoons?|tbsp|teaspoons?|tsp|grams?|g|kg|ml|liters?|litres?"
+    r"|ounces?|oz|pounds?|lbs?|pinch|cloves?|degrees?|minutes?)\b",
+    re.IGNORECASE,
+)
+
+# Title words of recipe videos
+TITLE_PATTERN = re.compile(r"\b(?:recipes?|how to (?:make|cook|bake)|homemade|cooking|baking)\b", re.IGNORECASE)
+
+WORD_PATTERN = re.compile(r"[a-z]+")
+
+# Lexicon hits per word at which the density part of the score saturates
+SATURATION_DENSITY = 0.08
+
+# Distinct ingredients at which the variety part of the score saturates
+SATURATION_INGREDIENTS = 5
+
+# Lexicon hits needed for full confidence, so a few food words in a short
+# clip or a Q&A do not score like a recipe
+MIN_EVIDENCE = 8
+
+
+def recipe_likelihood(title: str, text: str) -> float:
+    """
+    Score how likely a transcript is to contain a recipe.
+
+    Combines the density of ingredient, cooking-verb and measurement mentions
+    with the number of distinct ingredients, scaled down when there are few
+    mentions, plus a bonus for a recipe-like title.
+
+    Args:
+        title: Video title
+        text: Transcript text
+
+    Returns:
+        float: Likelihood between 0 and 1
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    if not words:
+        return 0.0
+
+    ingredients = [w for w in words if w in INGREDIENT_WORDS]
+    verbs = sum(1 for w in words if w in COOKING_VERBS)
+    measurements = len(MEASUREMENT_PATTERN.findall(text))
+
+    hits = len(ingredients) + verbs + 2 * measurements
+    score = 0.6 * min(1.0, hits / len(words) / SATURATION_DENSITY)
+    score += 0.4 * min(1.0, len(set(ingredients)) / SATURATION_INGREDIENTS)
+    score *= min(1.0, hits / MIN_EVIDENCE)
+    if TITLE_PATTERN.search(title or ""):
+        score += 0.2
+    return min(1.0, score)
+
+
+class RecipeClassifier:
+    def __init__(self, threshold: float = 0.3, languages: Tuple[str, ...] = ("en",)):
+        """
+        Skip transcripts unlikely to contain a recipe.
+
+        Args:
+            threshold: Minimum recipe likelihood to keep a transcript; 0 keeps everything
+            languages: Languages the lexicons cover; other transcripts are always kept
+        """
+        self.threshold = threshold
+        self.languages = languages
+        self.checked = 0
+        self.skipped = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def filter(self, transcripts: List[TranscriptPayload]) -> Tuple[List[TranscriptPayload], List[TranscriptPayload]]:
+        """
+        Split transcripts into those worth generating a recipe for and those skipped.
+
+        Args:
+            transcripts: Scraped transcripts
+
+        Returns:
+            Tuple of the kept and the skipped transcripts, each in input order
+        """
+        started = time.perf_counter()
+        kept: List[TranscriptPayload] = []
+        skipped: List[TranscriptPayload] = []
+        for payload in transcripts:
+            language = (payload.language_code or self.languages[0]).split("-")[0]
+            if self.threshold <= 0 or language not in self.languages:
+                kept.append(payload)
+                continue
+            score = recipe_likelihood(payload.title, payload.text)
+            if score < self.threshold:
+                print(f"Skipping video {payload.video_id}: recipe likelihood {score:.2f} < {self.threshold:.2f}")
+                skipped.append(payload)
+            else:
+                kept.append(payload)
+
+        with self._lock:
+            self.checked += len(transcripts)
+            self.skipped += len(skipped)
+            self.seconds += time.perf_counter() - started
+        if skipped:
+            print(f"Skipped {len(skipped)} of {len(transcripts)} videos as unlikely recipes")
+        return kept, skipped
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Classification statistics.
+
+        Returns:
+            Dict with threshold, checked, skipped, skip_rate and seconds
+        """
+        with self._lock:
+            return {
+                "threshold": self.threshold,
+                "checked": self.checked,
+                "skipped": self.skipped,
+                "skip_rate": self.skipped / self.checked if self.checked else 0.0,
+                "seconds": round(self.seconds, 6),
+            }
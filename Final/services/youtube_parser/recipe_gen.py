@@ -2,35 +2,313 @@
 Recipe generation and parsing functionality.
 """
 
-from .type import Ingredient, InstructionStep, Recipe
+from .type import Ingredient, InstructionStep, Recipe, TranscriptPayload
+from .compaction import TranscriptCompactor, count_tokens, split_into_chunks
+from .rate_limit import RateLimiter
+from .routing import ModelRouter
+from .usage import UsageTracker
+from .recipe_cache import RecipeCache, recipe_cache_key
+from .stream_parser import IncrementalRecipeParser
+from .batch import BATCH_TERMINAL_STATUSES, BatchProcessor, batch_request_line
 import openai # type: ignore
-from typing import List, Optional, Dict
+from pydantic import StrictInt, ValidationError, create_model # type: ignore
+from typing import AsyncIterator, Callable, Iterator, List, Optional, Dict, Any, Sequence, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import ast
+import asyncio
 import json
+import re
+import threading
+import time
+
+
+def _normalize(text: str) -> str:
+    """Lowercase and strip punctuation for duplicate detection."""
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+
+def merge_partial_recipes(video_id: str, partials: List[Dict[str, Any]]) -> Recipe:
+    """
+    Merge recipe fragments extracted from consecutive transcript chunks.
+
+    Ingredients are deduplicated by name (keeping the first concrete quantity),
+    steps repeated by overlapping chunks are dropped and the rest renumbered
+    in chunk order. Scalar fields come from the first chunk that mentions them;
+    nutritional info from the chunk that saw the most ingredients.
+
+    Args:
+        video_id: YouTube video ID
+        partials: Parsed JSON objects, one per chunk, in transcript order
+
+    Returns:
+        Recipe: The merged recipe
+    """
+    def first(field: str) -> Optional[str]:
+        return next((str(p[field]) for p in partials if p.get(field)), None)
+
+    ingredients: List[Dict[str, str]] = []
+    ingredient_index: Dict[str, int] = {}
+    for partial in partials:
+        for ingredient in partial.get("ingredients") or []:
+            if not isinstance(ingredient, dict) or not ingredient.get("name"):
+                continue
+            key = _normalize(str(ingredient["name"]))
+            quantity = str(ingredient.get("quantity") or "")
+            if key in ingredient_index:
+                existing = ingredients[ingredient_index[key]]
+                if not existing["quantity"] and quantity:
+                    existing["quantity"] = quantity
+                continue
+            ingredient_index[key] = len(ingredients)
+            ingredients.append({"name": str(ingredient["name"]), "quantity": quantity})
+
+    steps: List[Dict[str, Any]] = []
+    seen_steps = set()
+    for partial in partials:
+        for step in partial.get("steps") or []:
+            description = step.get("description") if isinstance(step, dict) else step
+            if not description:
+                continue
+            key = _normalize(str(description))
+            if key in seen_steps:
+                continue
+            seen_steps.add(key)
+            steps.append({"step_number": len(steps) + 1, "description": str(description)})
+
+    with_nutrition = [p for p in partials if isinstance(p.get("nutritional_info"), dict)]
+    nutritional_info = (
+        max(with_nutrition, key=lambda p: len(p.get("ingredients") or []))["nutritional_info"]
+        if with_nutrition else None
+    )
+
+    return Recipe.model_validate({
+        "title": first("title") or "Untitled recipe",
+        "video_id": video_id,
+        "ingredients": ingredients,
+        "steps": steps,
+        "servings": first("servings"),
+        "prep_time": first("prep_time"),
+        "cook_time": first("cook_time"),
+        "nutritional_info": nutritional_info,
+    })
+
+
+class _ResponseStep(InstructionStep):
+    # The model must not get away with "1" or 1.0
+    step_number: StrictInt
+
+
+# Completion payload: a Recipe without video_id, derived from Recipe so the two cannot drift
+_RESPONSE_FIELDS: Dict[str, Any] = {
+    name: (List[_ResponseStep] if name == "steps" else field.annotation, field)
+    for name, field in Recipe.model_fields.items()
+    if name != "video_id"
+}
+_RecipeResponse = create_model("_RecipeResponse", **_RESPONSE_FIELDS)
+
+
+REQUIRED_RESPONSE_FIELDS = ("title", "ingredients", "steps")
+
+
+def _validation_message(error: ValidationError) -> str:
+    """
+    Map a pydantic error on a completion to generate_recipe's error messages.
+    """
+    details = error.errors()
+    if any(d["type"] == "json_invalid" for d in details):
+        message = next(d["msg"] for d in details if d["type"] == "json_invalid")
+        return f"Invalid JSON response from OpenAI: {message}"
+
+    for field in REQUIRED_RESPONSE_FIELDS:
+        if any(d["type"] == "missing" and d["loc"] == (field,) for d in details):
+            return f"Invalid response structure: Missing required field: {field}"
+
+    for d in details:
+        loc = d["loc"]
+        if not loc or loc[0] != "steps":
+            continue
+        if len(loc) == 1:
+            return "Invalid response structure: 'steps' must be an array"
+        if len(loc) == 2 or (len(loc) == 3 and d["type"] == "missing"):
+            return "Invalid response structure: Each step must be an object with 'step_number' and 'description'"
+        if loc[2] == "step_number":
+            return "Invalid response structure: step_number must be an integer"
+
+    return f"Invalid response structure: {str(error)}"
+
+
+class _TranscriptTokens:
+    def __init__(self, text: str, counts: Optional[Dict[str, int]] = None):
+        """
+        A prepared transcript with its token count per model, so the text is
+        tokenized once per model however often routing, chunking, rate
+        limiting, usage and the cache need the count.
+
+        Args:
+            text: Transcript text
+            counts: Counts already known, e.g. from compaction, keyed by model
+        """
+        self.text = text
+        self._counts: Dict[str, int] = dict(counts or {})
+
+    def count(self, model: str) -> int:
+        """Tokens of the text for a model."""
+        if model not in self._counts:
+            self._counts[model] = count_tokens(self.text, model)
+        return self._counts[model]
+
 
 class RecipeGenerator:  
-    def __init__(self, api_key: str): 
+    def __init__(
+        self,
+        api_key: str,
+        compactor: Optional[TranscriptCompactor] = None,
+        chunk_threshold_tokens: Optional[int] = 6000,
+        chunk_tokens: int = 3000,
+        chunk_overlap_tokens: int = 200,
+        chunk_workers: int = 4,
+        prompts_dir: Optional[Path] = None,
+        prompt_reload_interval: Optional[float] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_concurrency: int = 8,
+        completion_token_estimate: int = 1000,
+        recipe_cache: Optional[RecipeCache] = None,
+        usage_tracker: Optional[UsageTracker] = None,
+        prompt_token_budget: Optional[int] = None,
+        over_budget: str = "compress",
+        model_router: Optional[ModelRouter] = None,
+    ): 
         self.api_key = api_key
+        # Token/latency/cost telemetry of every completion
+        self.usage_tracker = usage_tracker
+        # Maximum prompt tokens per generation; over_budget is 'compress' (truncate) or 'reject'
+        if over_budget not in ("compress", "reject"):
+            raise ValueError("over_budget must be 'compress' or 'reject'")
+        self.prompt_token_budget = prompt_token_budget
+        self.over_budget = over_budget
+        self.validations = 0
+        self.validation_seconds = 0.0
+        self._validation_lock = threading.Lock()
+        self.model = "gpt-3.5-turbo"
+        self.temperature = 0.7  # Balanced between creativity and accuracy
+        # Picks the model per transcript and the fallback model; None always uses self.model
+        self.model_router = model_router
+        # Recipes already generated for identical transcript text and prompts
+        self.recipe_cache = recipe_cache
+        # One client, and so one pooled HTTP connection set, for the generator's lifetime
         self.openai = openai.OpenAI(api_key=self.api_key)
+        self.async_openai: Optional[openai.AsyncOpenAI] = None
+        # Shared tier limits, and the default number of concurrent async completions
+        self.rate_limiter = rate_limiter
+        self.max_concurrency = max(1, max_concurrency)
+        self.completion_token_estimate = completion_token_estimate
+        self.prompts_dir = Path(prompts_dir) if prompts_dir else Path(__file__).parent / "prompts"
+        # Seconds between prompt file change checks; None disables hot reloading
+        self.prompt_reload_interval = prompt_reload_interval
+        self._prompt_lock = threading.Lock()
+        self._prompt_mtimes: Dict[str, float] = {}
+        self._prompts_checked_at = 0.0
         self._load_prompts()
-        self.recipe: Optional[Recipe] = None 
+        # The generator is shared by concurrent requests: the recipe read by the
+        # receive_* accessors is kept per thread
+        self._local = threading.local()
+        # Optional clean-up stage run on the transcript before it is sent to OpenAI
+        self.compactor = compactor
+        # Transcripts longer than chunk_threshold_tokens are split into overlapping
+        # chunks that are extracted in parallel and merged (None disables it)
+        self.chunk_threshold_tokens = chunk_threshold_tokens
+        self.chunk_tokens = chunk_tokens
+        self.chunk_overlap_tokens = chunk_overlap_tokens
+        self.chunk_workers = max(1, chunk_workers)
+
+    PROMPT_FILES = {
+        "system_prompt": "recipe_system.txt",
+        "extraction_prompt_template": "recipe_extraction.txt",
+        "chunk_prompt_template": "recipe_chunk_extraction.txt",
+    }
+
+    # Prompt templates, (re)loaded from PROMPT_FILES by _load_prompts
+    system_prompt: str
+    extraction_prompt_template: str
+    chunk_prompt_template: str
 
     def _load_prompts(self):
         """Load prompt templates from text files"""
-        prompts_dir = Path(__file__).parent / "prompts"
-        
-        with open(prompts_dir / "recipe_system.txt", "r") as f:
-            self.system_prompt = f.read().strip()
-            
-        with open(prompts_dir / "recipe_extraction.txt", "r") as f:
-            self.extraction_prompt_template = f.read().strip()
+        prompts: Dict[str, str] = {}
+        mtimes = {}
+        for attribute, filename in self.PROMPT_FILES.items():
+            path = self.prompts_dir / filename
+            with open(path, "r") as f:
+                prompts[attribute] = f.read().strip()
+            mtimes[filename] = path.stat().st_mtime
+        # Only replace the prompts once every file was read
+        self.system_prompt = prompts["system_prompt"]
+        self.extraction_prompt_template = prompts["extraction_prompt_template"]
+        self.chunk_prompt_template = prompts["chunk_prompt_template"]
+        self._prompt_mtimes = mtimes
+        self._prompts_checked_at = time.monotonic()
+        # Prompt tokens of a whole-transcript request besides the transcript, per model
+        self._prompt_overheads: Dict[str, int] = {}
+
+    def reload_prompts_if_changed(self) -> bool:
+        """
+        Reload the prompt templates if any prompt file changed on disk.
 
-    def generate_recipe(self, transcript_data: str) -> Recipe:
+        Returns:
+            bool: True if the prompts were reloaded
+        """
+        with self._prompt_lock:
+            self._prompts_checked_at = time.monotonic()
+            try:
+                changed = any(
+                    (self.prompts_dir / filename).stat().st_mtime != mtime
+                    for filename, mtime in self._prompt_mtimes.items()
+                )
+                if changed:
+                    self._load_prompts()
+            except OSError as e:
+                # Keep serving the prompts already loaded
+                print(f"Failed to reload prompts: {str(e)}")
+                return False
+        if changed:
+            print(f"Reloaded prompts from {self.prompts_dir}")
+        return changed
+
+    def _maybe_reload_prompts(self):
+        """Check the prompt files at most once per prompt_reload_interval."""
+        if self.prompt_reload_interval is None:
+            return
+        if time.monotonic() - self._prompts_checked_at >= self.prompt_reload_interval:
+            self.reload_prompts_if_changed()
+
+    def close(self):
+        """Close the OpenAI client's connections."""
+        self.openai.close()
+
+    async def aclose(self):
+        """Close the connections of both OpenAI clients."""
+        self.openai.close()
+        if self.async_openai is not None:
+            await self.async_openai.close()
+
+    @property
+    def recipe(self) -> Optional[Recipe]:
+        """Recipe last returned by generate_recipe on the calling thread."""
+        return getattr(self._local, "recipe", None)
+
+    @recipe.setter
+    def recipe(self, recipe: Optional[Recipe]) -> None:
+        self._local.recipe = recipe
+
+    def generate_recipe(self, transcript_data: Union[TranscriptPayload, str]) -> Recipe:
         """
         Generate a complete recipe from a video transcript using OpenAI.
+        Transcripts above chunk_threshold_tokens are processed in chunks.
         
         Args:
-            transcript_data (str): The video transcript dictionary as a string
+            transcript_data: The video's TranscriptPayload; the transcript
+                dictionary as a string is still accepted
             
         Returns:
             Recipe: A Recipe object containing title, video_id, ingredients, and steps
@@ -39,70 +317,740 @@ class RecipeGenerator:
             RuntimeError: If recipe generation fails
             ValueError: If transcript is empty or whitespace
         """
+        video_id, transcript, models, key, recipe = self._prepare_cached(transcript_data)
+        if recipe is None:
+            recipe = self._generate_uncached(video_id, transcript, models)
+            self._cache_recipe(key, transcript, recipe)
+        self.recipe = recipe
+        return recipe
+
+    def _generate_uncached(self, video_id: str, transcript: _TranscriptTokens, models: List[str]) -> Recipe:
+        """
+        Call OpenAI for a prepared transcript, moving on to the next model
+        when one is rate limited or returns an invalid recipe.
+        """
+        if self._needs_chunking(transcript, models[0]):
+            return self._generate_recipe_chunked_or_raise(video_id, transcript.text, models[0])
+
+        error = RuntimeError("No model to generate the recipe with")
+        for attempt, model in enumerate(models):
+            request = self._completion_request(transcript.text, model)
+            prompt_tokens = self._prompt_tokens(transcript, model)
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire_sync(prompt_tokens + self.completion_token_estimate)
+            started = time.perf_counter()
+            try:
+                response = self.openai.chat.completions.create(**request)
+                content = response.choices[0].message.content
+                self._record_usage(video_id, request, getattr(response, "usage", None), content, started, prompt_tokens)
+                recipe = self._parse_recipe(video_id, content)
+
+            except openai.RateLimitError as e:
+                error = RuntimeError(f"OpenAI API error: {str(e)}")
+            except openai.APIError as e:
+                self._record_attempt(model, started, False, attempt)
+                raise RuntimeError(f"OpenAI API error: {str(e)}")
+            except RuntimeError as e:
+                # Empty or invalid completion
+                error = RuntimeError(f"Failed to generate recipe: {str(e)}")
+            except Exception as e:
+                self._record_attempt(model, started, False, attempt)
+                raise RuntimeError(f"Failed to generate recipe: {str(e)}")
+            else:
+                self._record_attempt(model, started, True, attempt)
+                return recipe
+
+            self._record_attempt(model, started, False, attempt)
+            if attempt + 1 < len(models):
+                print(f"Falling back to {models[attempt + 1]} for {video_id}: {str(error)}")
+        raise error
+
+    async def agenerate_recipe(self, transcript_data: Union[TranscriptPayload, str]) -> Recipe:
+        """
+        Async variant of generate_recipe using the AsyncOpenAI client.
+        Raises the same errors as generate_recipe.
+
+        Args:
+            transcript_data: The video's TranscriptPayload or transcript string
+
+        Returns:
+            Recipe: The generated recipe
+        """
+        # Compaction, tokenizing and the SQLite cache block; keep them off the event loop
+        video_id, transcript, models, key, cached = await asyncio.to_thread(self._prepare_cached, transcript_data)
+        if cached is not None:
+            return cached
+
+        recipe = await self._agenerate_uncached(video_id, transcript, models)
+        await asyncio.to_thread(self._cache_recipe, key, transcript, recipe)
+        return recipe
+
+    def _prepare_cached(
+        self, transcript_data: Union[TranscriptPayload, str]
+    ) -> Tuple[str, _TranscriptTokens, List[str], str, Optional[Recipe]]:
+        """
+        Prepare a transcript and look up its recipe in the cache.
+
+        Returns:
+            Tuple of video_id, prepared transcript, models to try, cache key
+            and the cached recipe (None on a miss or without a cache)
+        """
+        video_id, transcript, models = self._prepare_transcript(transcript_data)
+        key = self._cache_key(transcript, models[0])
+        cached = self.recipe_cache.get(key, video_id) if self.recipe_cache is not None else None
+        return video_id, transcript, models, key, cached
+
+    async def _agenerate_uncached(self, video_id: str, transcript: _TranscriptTokens, models: List[str]) -> Recipe:
+        """Call OpenAI asynchronously for a prepared transcript, with the same fallback as _generate_uncached."""
+        if self._needs_chunking(transcript, models[0]):
+            # The chunk fan-out already runs on its own thread pool
+            return await asyncio.to_thread(self._generate_recipe_chunked_or_raise, video_id, transcript.text, models[0])
+
+        error = RuntimeError("No model to generate the recipe with")
+        for attempt, model in enumerate(models):
+            request = self._completion_request(transcript.text, model)
+            # Counted in _prepare_transcript, so nothing is tokenized on the event loop
+            prompt_tokens = self._prompt_tokens(transcript, model)
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire(prompt_tokens + self.completion_token_estimate)
+            started = time.perf_counter()
+            try:
+                response = await self._get_async_openai().chat.completions.create(**request)
+                content = response.choices[0].message.content
+                self._record_usage(video_id, request, getattr(response, "usage", None), content, started, prompt_tokens)
+                recipe = self._parse_recipe(video_id, content)
+
+            except openai.RateLimitError as e:
+                error = RuntimeError(f"OpenAI API error: {str(e)}")
+            except openai.APIError as e:
+                self._record_attempt(model, started, False, attempt)
+                raise RuntimeError(f"OpenAI API error: {str(e)}")
+            except RuntimeError as e:
+                error = RuntimeError(f"Failed to generate recipe: {str(e)}")
+            except Exception as e:
+                self._record_attempt(model, started, False, attempt)
+                raise RuntimeError(f"Failed to generate recipe: {str(e)}")
+            else:
+                self._record_attempt(model, started, True, attempt)
+                return recipe
+
+            self._record_attempt(model, started, False, attempt)
+            if attempt + 1 < len(models):
+                print(f"Falling back to {models[attempt + 1]} for {video_id}: {str(error)}")
+        raise error
+
+    async def agenerate_recipes(
+        self,
+        transcripts: Sequence[Union[TranscriptPayload, str]],
+        max_concurrency: Optional[int] = None,
+    ) -> AsyncIterator[Tuple[int, Optional[Recipe], Optional[str]]]:
+        """
+        Generate recipes for many transcripts concurrently.
+
+        At most max_concurrency completions are in flight at once, and every
+        call also waits for the rate limiter, if any.
+
+        Args:
+            transcripts: TranscriptPayloads (or transcript strings)
+            max_concurrency: In-flight limit, defaults to self.max_concurrency
+
+        Yields:
+            Tuple of the transcript's index, the recipe (None on failure) and the
+            error message (None on success), in completion order
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency or self.max_concurrency))
+
+        async def generate(index: int, transcript_data: Union[TranscriptPayload, str]) -> Tuple[int, Optional[Recipe], Optional[str]]:
+            async with semaphore:
+                try:
+                    return index, await self.agenerate_recipe(transcript_data), None
+                except Exception as e:
+                    return index, None, str(e)
+
+        tasks = [asyncio.create_task(generate(i, t)) for i, t in enumerate(transcripts)]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stream_recipe(self, transcript_data: Union[TranscriptPayload, str]) -> Iterator[Tuple[str, Any]]:
+        """
+        Generate a recipe while streaming the completion.
+
+        Yields the title, then each ingredient and step as soon as the model
+        has written it completely, and finally the validated recipe. Cached
+        recipes and chunked transcripts are not streamed by OpenAI; their parts
+        are replayed from the finished recipe.
+
+        Args:
+            transcript_data: The video's TranscriptPayload or transcript string
+
+        Yields:
+            Tuple of event and data: ("title", str), ("ingredient", dict),
+            ("step", dict) and lastly ("recipe", Recipe)
+
+        Raises:
+            RuntimeError: If recipe generation fails, as in generate_recipe
+            ValueError: If transcript is empty or malformed
+        """
+        video_id, transcript, models = self._prepare_transcript(transcript_data)
+        # Output already sent cannot be taken back, so only the routed model is used
+        model = models[0]
+
+        key = self._cache_key(transcript, model)
+        recipe = self.recipe_cache.get(key, video_id) if self.recipe_cache is not None else None
+        if recipe is None and self._needs_chunking(transcript, model):
+            recipe = self._generate_recipe_chunked_or_raise(video_id, transcript.text, model)
+            self._cache_recipe(key, transcript, recipe)
+        if recipe is not None:
+            yield from self._replay_events(recipe)
+            return
+
+        request = self._completion_request(transcript.text, model)
+        prompt_tokens = self._prompt_tokens(transcript, model)
+        parser = IncrementalRecipeParser()
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire_sync(prompt_tokens + self.completion_token_estimate)
+        started = time.perf_counter()
+        try:
+            stream = self.openai.chat.completions.create(
+                stream=True, stream_options={"include_usage": True}, **request
+            )
+            usage = None
+            for chunk in stream:
+                # The usage arrives in a last chunk without choices
+                usage = getattr(chunk, "usage", None) or usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield from parser.feed(delta)
+            self._record_usage(video_id, request, usage, parser.text, started, prompt_tokens)
+            recipe = self._parse_recipe(video_id, parser.text)
+
+        except openai.APIError as e:
+            self._record_attempt(model, started, False, 0)
+            raise RuntimeError(f"OpenAI API error: {str(e)}")
+        except Exception as e:
+            self._record_attempt(model, started, False, 0)
+            raise RuntimeError(f"Failed to generate recipe: {str(e)}")
+
+        self._record_attempt(model, started, True, 0)
+
+        self._cache_recipe(key, transcript, recipe)
+        yield "recipe", recipe
+
+    @staticmethod
+    def _replay_events(recipe: Recipe) -> Iterator[Tuple[str, Any]]:
+        """The events stream_recipe would have produced for a finished recipe."""
+        yield "title", recipe.title
+        for ingredient in recipe.ingredients:
+            yield "ingredient", ingredient.model_dump()
+        for step in recipe.steps:
+            yield "step", step.model_dump()
+        yield "recipe", recipe
+
+    def write_batch_file(
+        self,
+        transcripts: List[TranscriptPayload],
+        path: Path,
+    ) -> Tuple[Dict[str, str], List[TranscriptPayload]]:
+        """
+        Write one chat completion request per transcript to a JSONL job file.
+
+        Transcripts above chunk_threshold_tokens need several dependent calls
+        and are not written.
+
+        Args:
+            transcripts: Transcripts to generate recipes for; duplicates of a
+                video_id are written once
+            path: Job file to create
+
+        Returns:
+            Tuple of the cache keys of the written videos, keyed by video_id
+            (custom_id in the file), and the transcripts left out
+
+        Raises:
+            ValueError: If a transcript is empty or malformed
+        """
+        prepared = [(payload, *self._prepare_transcript(payload)) for payload in transcripts]
+        return self._write_prepared_batch(prepared, path)
+
+    def _write_prepared_batch(
+        self,
+        prepared: List[Tuple[TranscriptPayload, str, _TranscriptTokens, List[str]]],
+        path: Path,
+    ) -> Tuple[Dict[str, str], List[TranscriptPayload]]:
+        """Write (payload, video_id, prepared transcript, models) entries to a job file; see write_batch_file."""
+        keys: Dict[str, str] = {}
+        left_out: List[TranscriptPayload] = []
+        with open(path, "w") as f:
+            for payload, video_id, transcript, models in prepared:
+                if video_id in keys:
+                    continue
+                # Batch lines cannot fall back; failures are reported per video
+                model = models[0]
+                if self._needs_chunking(transcript, model):
+                    left_out.append(payload)
+                    continue
+                keys[video_id] = self._cache_key(transcript, model)
+                f.write(batch_request_line(video_id, self._completion_request(transcript.text, model)) + "\n")
+        return keys, left_out
+
+    def read_batch_results(
+        self, path: Path, input_path: Optional[Path] = None, started: Optional[float] = None
+    ) -> Dict[str, Tuple[Optional[Recipe], Optional[str]]]:
+        """
+        Validate the output lines of a finished batch and record their usage.
+
+        Args:
+            path: Output JSONL file
+            input_path: Job file of the batch, whose requests are counted
+                locally for lines without usage
+            started: time.perf_counter() when the batch was submitted
+
+        Returns:
+            Dict keyed by video_id of (recipe, None) or (None, error message)
+        """
+        requests: Dict[str, Dict[str, Any]] = {}
+        if input_path is not None:
+            with open(input_path, "r") as f:
+                for line in f:
+                    if line.strip():
+                        request_line = json.loads(line)
+                        requests[request_line["custom_id"]] = request_line["body"]
+
+        results: Dict[str, Tuple[Optional[Recipe], Optional[str]]] = {}
+        with open(path, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                output = json.loads(line)
+                video_id = output["custom_id"]
+                response = output.get("response") or {}
+                if output.get("error") or response.get("status_code") != 200:
+                    error = (output.get("error") or {}).get("message") or f"HTTP {response.get('status_code')}"
+                    results[video_id] = (None, f"OpenAI API error: {error}")
+                    continue
+                try:
+                    body = response["body"]
+                    content = body["choices"][0]["message"]["content"]
+                    request = requests.get(video_id) or {"model": body.get("model", self.model), "messages": []}
+                    self._record_usage(
+                        video_id, request, body.get("usage"), content,
+                        started if started is not None else time.perf_counter(),
+                    )
+                    results[video_id] = (self._parse_recipe(video_id, content), None)
+                except Exception as e:
+                    results[video_id] = (None, f"Failed to generate recipe: {str(e)}")
+        return results
+
+    def run_batch(
+        self,
+        transcripts: List[TranscriptPayload],
+        processor: BatchProcessor,
+        job_dir: Path,
+        poll_interval: float = 60.0,
+        timeout: float = 24 * 3600,
+        on_result: Optional[Callable[[Recipe], None]] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> List[Tuple[str, Optional[Recipe], Optional[str]]]:
+        """
+        Generate recipes for many transcripts through a batch job.
+
+        Cached recipes are reused, the rest are written to a job file,
+        submitted and polled until the batch finishes. Transcripts too long for
+        a single request go through generate_recipe instead.
+
+        Args:
+            transcripts: Transcripts to generate recipes for
+            processor: Batch backend (OpenAIBatchProcessor or LocalBatchProcessor)
+            job_dir: Directory for the job input and output files
+            poll_interval: Seconds between status checks
+            timeout: Seconds to wait for the batch before giving up
+            on_result: Called with each generated recipe, e.g. to store it
+            sleep: Sleep function, in seconds
+
+        Returns:
+            List of (video_id, recipe, error) in the order of transcripts
+
+        Raises:
+            RuntimeError: If the batch fails or does not finish within timeout
+        """
+        job_dir = Path(job_dir)
+        job_dir.mkdir(parents=True, exist_ok=True)
+        results: Dict[str, Tuple[Optional[Recipe], Optional[str]]] = {}
+
+        pending: List[Tuple[TranscriptPayload, str, _TranscriptTokens, List[str]]] = []
+        prepared: Dict[str, _TranscriptTokens] = {}
+        for payload in transcripts:
+            if payload.video_id in results or payload.video_id in prepared:
+                continue
+            video_id, transcript, models = self._prepare_transcript(payload)
+            key = self._cache_key(transcript, models[0])
+            cached = self.recipe_cache.get(key, video_id) if self.recipe_cache is not None else None
+            if cached is not None:
+                results[video_id] = (cached, None)
+            else:
+                pending.append((payload, video_id, transcript, models))
+                prepared[video_id] = transcript
+
+        if pending:
+            input_path = job_dir / f"batch_{int(time.time())}_{len(pending)}.jsonl"
+            keys, left_out = self._write_prepared_batch(pending, input_path)
+            if keys:
+                submitted = time.perf_counter()
+                batch_id = processor.submit(input_path)
+                print(f"Submitted batch {batch_id} with {len(keys)} transcripts")
+
+                waited = 0.0
+                status = processor.status(batch_id)
+                while status not in BATCH_TERMINAL_STATUSES:
+                    if waited >= timeout:
+                        raise RuntimeError(f"Batch {batch_id} did not finish within {timeout:.0f}s (status: {status})")
+                    sleep(poll_interval)
+                    waited += poll_interval
+                    status = processor.status(batch_id)
+                if status != "completed":
+                    raise RuntimeError(f"Batch {batch_id} ended with status: {status}")
+
+                output_path = input_path.with_name(input_path.stem + "_output.jsonl")
+                processor.download(batch_id, output_path)
+                for video_id, (recipe, error) in self.read_batch_results(output_path, input_path, submitted).items():
+                    if recipe is not None and video_id in keys:
+                        self._cache_recipe(keys[video_id], prepared[video_id], recipe)
+                    results[video_id] = (recipe, error)
+
+            for payload in left_out:
+                try:
+                    results[payload.video_id] = (self.generate_recipe(payload), None)
+                except Exception as e:
+                    results[payload.video_id] = (None, str(e))
+
+        if on_result is not None:
+            for recipe, _ in results.values():
+                if recipe is not None:
+                    on_result(recipe)
+        return [
+            (payload.video_id, *results.get(payload.video_id, (None, "Missing from batch output")))
+            for payload in transcripts
+        ]
+
+    def _prepare_transcript(
+        self, transcript_data: Union[TranscriptPayload, str]
+    ) -> Tuple[str, _TranscriptTokens, List[str]]:
+        """
+        Validate the transcript, compact its text and route it, then fit it
+        to the prompt budget of the routed model. The text is tokenized here,
+        once per model to try; later steps reuse the counts.
+
+        Returns:
+            Tuple of video_id, prepared transcript and the models to try, in order
+
+        Raises:
+            ValueError: If the transcript is empty or malformed
+        """
+        payload = self._to_payload(transcript_data)
+        video_id = payload.video_id
+        transcript = _TranscriptTokens(payload.text)
+
+        self._maybe_reload_prompts()
+
+        if self.compactor is not None:
+            transcript_text, compaction = self.compactor.compact(transcript.text)
+            print(f"Compacted transcript of {video_id}: "
+                  f"{compaction['tokens_before']} -> {compaction['tokens_after']} tokens")
+            if not transcript_text:
+                raise ValueError("Transcript is empty after compaction")
+            transcript = _TranscriptTokens(transcript_text, {self.compactor.model: compaction["tokens_after"]})
+
+        models = self._route(transcript, payload.language_code)
+        if self.prompt_token_budget is not None:
+            transcript = self._enforce_prompt_budget(video_id, transcript, models[0])
+        for model in models:
+            transcript.count(model)
+
+        return video_id, transcript, models
+
+    def _route(self, transcript: _TranscriptTokens, language_code: Optional[str]) -> List[str]:
+        """Models to try for a prepared transcript, in order."""
+        if self.model_router is None:
+            return [self.model]
+        primary, *fallbacks = self.model_router.route(transcript.count(self.model), language_code)
+        # A fallback whose context cannot take the transcript would only fail
+        return [primary] + [model for model in fallbacks if not self._needs_chunking(transcript, model)]
+
+    def _record_attempt(self, model: str, started: float, ok: bool, attempt: int) -> None:
+        """Report one model attempt's outcome and latency to the router."""
+        if self.model_router is not None:
+            self.model_router.record(model, time.perf_counter() - started, ok, fallback=attempt > 0)
+
+    def _cache_key(self, transcript: _TranscriptTokens, model: Optional[str] = None) -> str:
+        """Response cache key of a prepared transcript under the current prompts."""
+        chunked = self._needs_chunking(transcript, model)
+        template = self.chunk_prompt_template if chunked else self.extraction_prompt_template
+        return recipe_cache_key(transcript.text, self.system_prompt, template, model or self.model, self.temperature)
+
+    def _cache_recipe(self, key: str, transcript: _TranscriptTokens, recipe: Recipe) -> None:
+        """Store a generated recipe with the (estimated) tokens it cost."""
+        if self.recipe_cache is None:
+            return
+        tokens = self._prompt_tokens(transcript, self.model) + count_tokens(recipe.model_dump_json(), self.model)
+        self.recipe_cache.put(key, recipe, tokens)
+
+    @staticmethod
+    def _to_payload(transcript_data: Union[TranscriptPayload, str]) -> TranscriptPayload:
+        """
+        Accept a TranscriptPayload, or the legacy str() of a process_videos entry.
+
+        Raises:
+            ValueError: If the transcript is empty or malformed
+        """
+        if isinstance(transcript_data, TranscriptPayload):
+            if not transcript_data.video_id:
+                raise ValueError("Invalid transcript data format: Transcript data missing video_id")
+            return transcript_data
+
         if not transcript_data or transcript_data.isspace():
             raise ValueError("Transcript cannot be empty or whitespace")
-            
-        # Parse the transcript string back into a dictionary
+
+        # Compatibility shim: parse the dict literal without executing code
         try:
-            transcript_dict = eval(transcript_data)
-            video_id = transcript_dict.get('video_id')
-            if not video_id:
-                raise ValueError("Transcript data missing video_id")
-            transcript_text = transcript_dict.get('snippets', '')
+            return TranscriptPayload.from_video_dict(ast.literal_eval(transcript_data))
         except Exception as e:
             raise ValueError(f"Invalid transcript data format: {str(e)}")
-            
-        prompt = self.extraction_prompt_template.format(transcript=transcript_text)
-        
-        try:
-            response = self.openai.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.7  # Balanced between creativity and accuracy
+
+    def _needs_chunking(self, transcript: _TranscriptTokens, model: Optional[str] = None) -> bool:
+        """
+        Whether the transcript goes through the chunked path.
+
+        Transcripts above chunk_threshold_tokens are chunked, unless a model
+        router is configured and the routed model's context takes the whole
+        prompt and the expected completion.
+        """
+        if self.chunk_threshold_tokens is None or transcript.count(self.model) <= self.chunk_threshold_tokens:
+            return False
+        if self.model_router is None or model is None:
+            return True
+        context = self.model_router.context_tokens.get(model)
+        if context is None:
+            return True
+        return self._prompt_tokens(transcript, model) + self.completion_token_estimate > context
+
+    def _prompt_tokens(self, transcript: _TranscriptTokens, model: str) -> int:
+        """Prompt tokens of the whole-transcript request for a model."""
+        if model not in self._prompt_overheads:
+            self._prompt_overheads[model] = self._count_prompt_tokens(self._completion_request("", model))
+        return self._prompt_overheads[model] + transcript.count(model)
+
+    def _completion_request(self, transcript_text: str, model: Optional[str] = None) -> Dict[str, Any]:
+        """Arguments of the chat completion call for a whole transcript."""
+        return self._chat_request(self.extraction_prompt_template.format(transcript=transcript_text), model)
+
+    def _chat_request(self, prompt: str, model: Optional[str] = None) -> Dict[str, Any]:
+        """Arguments of a JSON-mode chat completion call with the system prompt."""
+        return {
+            "model": model or self.model,
+            "messages": [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            "response_format": {"type": "json_object"},
+            "temperature": self.temperature,
+        }
+
+    def _estimate_tokens(self, request: Dict[str, Any]) -> int:
+        """Prompt tokens of a request plus the expected completion size."""
+        return self._count_prompt_tokens(request) + self.completion_token_estimate
+
+    @staticmethod
+    def _count_prompt_tokens(request: Dict[str, Any]) -> int:
+        """Tokens of a request's messages."""
+        return sum(count_tokens(m["content"], request["model"]) for m in request["messages"])
+
+    def _record_usage(
+        self,
+        video_id: Optional[str],
+        request: Dict[str, Any],
+        usage: Any,
+        content: Optional[str],
+        started: float,
+        request_tokens: Optional[int] = None,
+    ) -> None:
+        """
+        Record a completion's usage, counting tokens locally when OpenAI did not report it.
+
+        Args:
+            video_id: Video the completion was for
+            request: Arguments of the completion call
+            usage: The response's usage (object or dict), if any
+            content: Completion text
+            started: time.perf_counter() when the request was sent
+            request_tokens: Prompt tokens of the request, if already counted
+        """
+        if self.usage_tracker is None:
+            return
+        if isinstance(usage, dict):
+            prompt_tokens, completion_tokens = usage.get("prompt_tokens"), usage.get("completion_tokens")
+        else:
+            prompt_tokens = getattr(usage, "prompt_tokens", None)
+            completion_tokens = getattr(usage, "completion_tokens", None)
+        if not isinstance(prompt_tokens, int) or not isinstance(completion_tokens, int):
+            prompt_tokens = request_tokens if request_tokens is not None else self._count_prompt_tokens(request)
+            completion_tokens = count_tokens(content or "", request["model"])
+        self.usage_tracker.record(
+            video_id, request["model"], prompt_tokens, completion_tokens, time.perf_counter() - started
+        )
+
+    def _enforce_prompt_budget(self, video_id: str, transcript: _TranscriptTokens, model: str) -> _TranscriptTokens:
+        """
+        Apply prompt_token_budget to a transcript before anything is sent,
+        counting tokens with the model it is routed to.
+
+        Returns:
+            The transcript, truncated to fit if over_budget is 'compress'
+
+        Raises:
+            ValueError: If the prompt is over budget and over_budget is 'reject',
+                or nothing of the transcript fits
+        """
+        assert self.prompt_token_budget is not None
+        tokens = self._prompt_tokens(transcript, model)
+        if tokens <= self.prompt_token_budget:
+            return transcript
+        if self.over_budget == "reject":
+            raise ValueError(
+                f"Prompt of {tokens} tokens exceeds the budget of {self.prompt_token_budget} tokens"
             )
-            content = response.choices[0].message.content
-            if not content:
-                raise RuntimeError("Empty response from OpenAI")
-                
-            # Validate JSON structure before parsing
-            try:
-                json_data = json.loads(content)
-                # Basic structure validation
-                required_fields = ["title", "ingredients", "steps"]
-                for field in required_fields:
-                    if field not in json_data:
-                        raise ValueError(f"Missing required field: {field}")
-                
-                # Add video_id to the JSON data
-                json_data['video_id'] = video_id
-                
-                # Validate steps format
-                if not isinstance(json_data["steps"], list):
-                    raise ValueError("'steps' must be an array")
-                for step in json_data["steps"]:
-                    if not isinstance(step, dict) or "step_number" not in step or "description" not in step:
-                        raise ValueError("Each step must be an object with 'step_number' and 'description'")
-                    if not isinstance(step["step_number"], int):
-                        raise ValueError("step_number must be an integer")
-                
-                # If validation passes, parse with pydantic
-                self.recipe = Recipe.model_validate_json(json.dumps(json_data))
-                return self.recipe
-                
-            except json.JSONDecodeError as e:
-                raise RuntimeError(f"Invalid JSON response from OpenAI: {str(e)}")
-            except ValueError as e:
-                raise RuntimeError(f"Invalid response structure: {str(e)}")
-                
+
+        overhead = tokens - transcript.count(model)
+        compactor = TranscriptCompactor(stages=(), token_budget=max(0, self.prompt_token_budget - overhead), model=model)
+        transcript_text, compaction = compactor.compact(transcript.text)
+        print(f"Truncated transcript of {video_id} to fit the prompt budget of {self.prompt_token_budget} tokens")
+        if not transcript_text:
+            raise ValueError("Transcript is empty after compaction")
+        return _TranscriptTokens(transcript_text, {model: compaction["tokens_after"]})
+
+    def _parse_recipe(self, video_id: str, content: Optional[str]) -> Recipe:
+        """
+        Validate the completion content into a Recipe in a single pass.
+
+        Raises:
+            RuntimeError: If the content is empty, not JSON or badly structured
+        """
+        if not content:
+            raise RuntimeError("Empty response from OpenAI")
+
+        started = time.perf_counter()
+        try:
+            response = _RecipeResponse.model_validate_json(content)
+        except ValidationError as e:
+            raise RuntimeError(_validation_message(e))
+        finally:
+            with self._validation_lock:
+                self.validations += 1
+                self.validation_seconds += time.perf_counter() - started
+
+        # Already validated: build the Recipe without a second pass
+        fields = dict(response)
+        fields["video_id"] = video_id
+        fields["steps"] = [InstructionStep.model_construct(**dict(step)) for step in fields["steps"]]
+        return Recipe.model_construct(**fields)
+
+    def validation_stats(self) -> Dict[str, Any]:
+        """
+        Time spent validating completions.
+
+        Returns:
+            Dict with validations, validation_seconds and avg_validation_ms
+        """
+        with self._validation_lock:
+            return {
+                "validations": self.validations,
+                "validation_seconds": round(self.validation_seconds, 6),
+                "avg_validation_ms": round(1000 * self.validation_seconds / self.validations, 3) if self.validations else 0.0,
+            }
+
+    def _generate_recipe_chunked_or_raise(self, video_id: str, transcript_text: str, model: Optional[str] = None) -> Recipe:
+        """Run the chunked path, mapping failures to generate_recipe's errors."""
+        try:
+            return self._generate_recipe_chunked(video_id, transcript_text, model)
         except openai.APIError as e:
             raise RuntimeError(f"OpenAI API error: {str(e)}")
+        except json.JSONDecodeError as e:
+            raise RuntimeError(f"Invalid JSON response from OpenAI: {str(e)}")
         except Exception as e:
             raise RuntimeError(f"Failed to generate recipe: {str(e)}")
 
+    def _get_async_openai(self) -> "openai.AsyncOpenAI":
+        """The AsyncOpenAI client, created on first use."""
+        if self.async_openai is None:
+            self.async_openai = openai.AsyncOpenAI(api_key=self.api_key)
+        return self.async_openai
+
+    def _generate_recipe_chunked(self, video_id: str, transcript_text: str, model: Optional[str] = None) -> Recipe:
+        """
+        Map-reduce generation for long transcripts.
+
+        Args:
+            video_id: YouTube video ID
+            transcript_text: Transcript text
+            model: Model for the chunk extractions, defaults to self.model
+
+        Returns:
+            Recipe: Recipe merged from the per-chunk extractions
+        """
+        chunks = split_into_chunks(transcript_text, self.chunk_tokens, self.chunk_overlap_tokens)
+        print(f"Generating recipe for {video_id} from {len(chunks)} transcript chunks")
+
+        with ThreadPoolExecutor(max_workers=min(self.chunk_workers, len(chunks))) as executor:
+            partials = list(executor.map(
+                lambda part: self._extract_partial_recipe(video_id, part[0] + 1, len(chunks), part[1], model),
+                enumerate(chunks),
+            ))
+
+        return merge_partial_recipes(video_id, partials)
+
+    def _extract_partial_recipe(
+        self, video_id: str, part: int, parts: int, chunk: str, model: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Extract the recipe fragment contained in one transcript chunk.
+
+        Args:
+            video_id: YouTube video ID
+            part: Chunk number, starting at 1
+            parts: Total number of chunks
+            chunk: Chunk text
+            model: Model to use, defaults to self.model
+
+        Returns:
+            Dict: Parsed JSON fragment
+
+        Raises:
+            RuntimeError: If OpenAI returns an empty response
+            ValueError: If the fragment is malformed
+        """
+        request = self._chat_request(self.chunk_prompt_template.format(part=part, parts=parts, transcript=chunk), model)
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire_sync(self._estimate_tokens(request))
+        started = time.perf_counter()
+        response = self.openai.chat.completions.create(**request)
+        content = response.choices[0].message.content
+        self._record_usage(video_id, request, getattr(response, "usage", None), content, started)
+        if not content:
+            raise RuntimeError("Empty response from OpenAI")
+
+        json_data = json.loads(content)
+        if not isinstance(json_data, dict):
+            raise ValueError("Chunk response must be a JSON object")
+        for field in ("ingredients", "steps"):
+            if not isinstance(json_data.get(field, []), list):
+                raise ValueError(f"'{field}' must be an array")
+        return json_data
+
     def receive_ingredients(self) -> List[Ingredient]:
         """
         Extract just the ingredients list from a transcript.
@@ -0,0 +1,251 @@
+"""
+Retry policy with exponential backoff, jitter and per-endpoint circuit breaking.
+"""
+
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class RetryableHTTPError(RuntimeError):
+    """Raised for HTTP responses worth retrying (429 and 5xx)."""
+
+    def __init__(self, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an endpoint whose circuit is open."""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given in seconds.
+
+    Args:
+        value: Header value
+
+    Returns:
+        Delay in seconds, or None if missing or not a number
+    """
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_threshold: int = 10,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Per-endpoint circuit breaker, shared by all scrapes of the process.
+
+        After failure_threshold consecutive failures an endpoint's circuit
+        opens and calls fail fast for reset_timeout seconds. The next call
+        after that is let through as a trial: success closes the circuit,
+        failure opens it again.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open
+            clock: Time source, in seconds
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._rejected: Dict[str, int] = {}
+        self._retries: Dict[str, int] = {}
+        self._retry_seconds: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, endpoint: str) -> bool:
+        """
+        Whether a call to the endpoint may go out now.
+
+        Args:
+            endpoint: Endpoint name
+
+        Returns:
+            bool: False while the circuit is open
+        """
+        with self._lock:
+            opened_at = self._opened_at.get(endpoint)
+            if opened_at is None:
+                return True
+            if self.clock() - opened_at >= self.reset_timeout:
+                # Half-open: let one trial call through and re-arm the timer
+                self._opened_at[endpoint] = self.clock()
+                return True
+            self._rejected[endpoint] = self._rejected.get(endpoint, 0) + 1
+            return False
+
+    def record_success(self, endpoint: str) -> None:
+        """Close the endpoint's circuit."""
+        with self._lock:
+            self._failures[endpoint] = 0
+            self._opened_at.pop(endpoint, None)
+
+    def record_failure(self, endpoint: str) -> None:
+        """Count a failure and open the circuit at the threshold."""
+        with self._lock:
+            failures = self._failures.get(endpoint, 0) + 1
+            self._failures[endpoint] = failures
+            if failures >= self.failure_threshold:
+                self._opened_at[endpoint] = self.clock()
+
+    def record_retry(self, endpoint: str, delay: float) -> None:
+        """Add a retry and the time slept before it to the endpoint's totals."""
+        with self._lock:
+            self._retries[endpoint] = self._retries.get(endpoint, 0) + 1
+            self._retry_seconds[endpoint] = self._retry_seconds.get(endpoint, 0.0) + delay
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Circuit state and retry totals per endpoint.
+
+        Returns:
+            Dict keyed by endpoint with state, consecutive_failures, rejected,
+            retries and retry_seconds
+        """
+        with self._lock:
+            endpoints = set(self._failures) | set(self._rejected) | set(self._retries)
+            return {
+                endpoint: {
+                    "state": "open" if endpoint in self._opened_at else "closed",
+                    "consecutive_failures": self._failures.get(endpoint, 0),
+                    "rejected": self._rejected.get(endpoint, 0),
+                    "retries": self._retries.get(endpoint, 0),
+                    "retry_seconds": round(self._retry_seconds.get(endpoint, 0.0), 3),
+                }
+                for endpoint in sorted(endpoints)
+            }
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        retry_budget: int = 50,
+        breaker: Optional[CircuitBreaker] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Retry policy for one scrape.
+
+        Delays grow exponentially from base_delay with full jitter, capped at
+        max_delay; a server-provided Retry-After is honoured up to max_delay.
+        All calls of a scrape share retry_budget retries, so a bad run cannot
+        multiply its latency by max_attempts.
+
+        Args:
+            max_attempts: Attempts per call, including the first
+            base_delay: Backoff base in seconds
+            max_delay: Longest single wait in seconds
+            retry_budget: Total retries allowed across the scrape
+            breaker: Shared circuit breaker; a private one is created if None
+            sleep: Sleep function, in seconds
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_budget = retry_budget
+        self.breaker = breaker or CircuitBreaker()
+        self.sleep = sleep
+        self.retries = 0
+        self.retry_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Delay before the next attempt.
+
+        Args:
+            attempt: Number of the attempt that just failed, starting at 0
+            retry_after: Delay requested by the server, if any
+
+        Returns:
+            Delay in seconds
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    def _take_retry(self, delay: float) -> bool:
+        """Reserve one retry from the budget."""
+        with self._lock:
+            if self.retries >= self.retry_budget:
+                return False
+            self.retries += 1
+            self.retry_seconds += delay
+            return True
+
+    def call(
+        self,
+        endpoint: str,
+        fn: Callable[[], T],
+        retryable: Callable[[Exception], bool] = lambda e: True,
+    ) -> T:
+        """
+        Call fn, retrying retryable failures.
+
+        Args:
+            endpoint: Endpoint name used for circuit breaking and statistics
+            fn: Function performing a single attempt
+            retryable: Tells whether an exception may succeed on a later attempt;
+                non-retryable errors are raised at once and do not trip the breaker
+
+        Returns:
+            The result of fn
+
+        Raises:
+            CircuitOpenError: If the endpoint's circuit is open
+            Exception: The last error once attempts or the retry budget run out
+        """
+        for attempt in range(self.max_attempts):
+            if not self.breaker.allow(endpoint):
+                raise CircuitOpenError(f"Circuit open for {endpoint}: failing fast")
+            try:
+                result = fn()
+            except Exception as e:
+                if not retryable(e):
+                    raise
+                self.breaker.record_failure(endpoint)
+                if attempt == self.max_attempts - 1:
+                    raise
+                delay = self.backoff(attempt, getattr(e, "retry_after", None))
+                if not self._take_retry(delay):
+                    raise
+                print(f"{endpoint} failed (attempt {attempt+1}): {str(e)}. Retrying in {delay:.2f}s...")
+                self.breaker.record_retry(endpoint, delay)
+                self.sleep(delay)
+                continue
+            self.breaker.record_success(endpoint)
+            return result
+        raise RuntimeError("unreachable")  # pragma: no cover
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retry statistics of this scrape.
+
+        Returns:
+            Dict with retries, retry_seconds and budget_remaining
+        """
+        return {
+            "retries": self.retries,
+            "retry_seconds": round(self.retry_seconds, 3),
+            "budget_remaining": max(0, self.retry_budget - self.retries),
+        }
@@ -0,0 +1,137 @@
+"""
+Model selection for recipe generation, with fallback models.
+"""
+
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# (max transcript tokens, model): gpt-3.5-turbo for clips that fit its 16k
+# context, gpt-4o-mini (128k context) for longer videos
+DEFAULT_ROUTES: Tuple[Tuple[int, str], ...] = (
+    (12000, "gpt-3.5-turbo"),
+    (120000, "gpt-4o-mini"),
+)
+
+# Context window of each model, in tokens
+MODEL_CONTEXT_TOKENS: Dict[str, int] = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-4o-mini": 128000,
+    "gpt-4o": 128000,
+}
+
+
+def parse_routes(value: str) -> List[Tuple[int, str]]:
+    """
+    Parse routes written as "12000:gpt-3.5-turbo,120000:gpt-4o-mini".
+
+    Args:
+        value: Comma-separated max_tokens:model pairs
+
+    Returns:
+        List of (max_tokens, model)
+
+    Raises:
+        ValueError: If a pair is malformed
+    """
+    routes = []
+    for pair in value.split(","):
+        if not pair.strip():
+            continue
+        max_tokens, sep, model = pair.partition(":")
+        if not sep or not model.strip():
+            raise ValueError(f"Invalid model route: {pair!r}")
+        routes.append((int(max_tokens), model.strip()))
+    return routes
+
+
+class ModelRouter:
+    def __init__(
+        self,
+        routes: Sequence[Tuple[int, str]] = DEFAULT_ROUTES,
+        fallback_model: Optional[str] = "gpt-4o-mini",
+        multilingual_model: Optional[str] = None,
+        default_language: str = "en",
+        context_tokens: Optional[Dict[str, int]] = None,
+    ):
+        """
+        Pick the model for a transcript from its token count and language.
+
+        Args:
+            routes: (max transcript tokens, model) pairs; the first route whose
+                limit fits the transcript is used, the last one for anything longer
+            fallback_model: Model tried when the routed one is rate limited or
+                returns an invalid recipe
+            multilingual_model: Model used for transcripts not in default_language,
+                if set
+            default_language: Language the routes are tuned for
+            context_tokens: Context window per model, defaults to MODEL_CONTEXT_TOKENS;
+                transcripts that fit the routed model's context are not chunked
+        """
+        if not routes:
+            raise ValueError("At least one model route is required")
+        self.routes = sorted(routes)
+        self.fallback_model = fallback_model
+        self.multilingual_model = multilingual_model
+        self.default_language = default_language
+        self.context_tokens = dict(MODEL_CONTEXT_TOKENS if context_tokens is None else context_tokens)
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def route(self, transcript_tokens: int, language_code: Optional[str] = None) -> List[str]:
+        """
+        Models to try for a transcript, in order.
+
+        Args:
+            transcript_tokens: Tokens of the transcript text
+            language_code: Transcript language, if known
+
+        Returns:
+            List of distinct model names: the routed model, then the fallback
+        """
+        model = next((m for limit, m in self.routes if transcript_tokens <= limit), self.routes[-1][1])
+        language = (language_code or self.default_language).split("-")[0]
+        if self.multilingual_model and language != self.default_language:
+            model = self.multilingual_model
+
+        models = [model]
+        if self.fallback_model and self.fallback_model != model:
+            models.append(self.fallback_model)
+        print(f"Routing transcript of {transcript_tokens} tokens ({language}) to {' -> '.join(models)}")
+        return models
+
+    def record(self, model: str, latency_seconds: float, ok: bool, fallback: bool = False) -> None:
+        """
+        Record one attempt on a model.
+
+        Args:
+            model: Model name
+            latency_seconds: Time the attempt took
+            ok: Whether it produced a valid recipe
+            fallback: Whether the model was used as a fallback
+        """
+        with self._lock:
+            stats = self._stats.setdefault(model, {"requests": 0, "failures": 0, "fallbacks": 0, "latency": 0.0})
+            stats["requests"] += 1
+            stats["failures"] += 0 if ok else 1
+            stats["fallbacks"] += 1 if fallback else 0
+            stats["latency"] += latency_seconds
+        print(f"Model {model} {'succeeded' if ok else 'failed'} in {latency_seconds * 1000:.0f} ms"
+              f"{' (fallback)' if fallback else ''}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Per-model attempt statistics.
+
+        Returns:
+            Dict keyed by model with requests, failures, fallbacks and avg_latency_ms
+        """
+        with self._lock:
+            return {
+                model: {
+                    "requests": int(s["requests"]),
+                    "failures": int(s["failures"]),
+                    "fallbacks": int(s["fallbacks"]),
+                    "avg_latency_ms": round(1000 * s["latency"] / s["requests"], 1) if s["requests"] else 0.0,
+                }
+                for model, s in sorted(self._stats.items())
+            }
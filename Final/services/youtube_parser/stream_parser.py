@@ -0,0 +1,99 @@
+"""
+Incremental parsing of a streamed recipe JSON completion.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+# Top-level arrays whose elements are emitted one by one, and their event names
+STREAMED_ARRAYS = {"ingredients": "ingredient", "steps": "step"}
+
+
+class IncrementalRecipeParser:
+    def __init__(self):
+        """
+        Scan a recipe JSON object as it arrives and report its parts as soon
+        as they are complete: the title, then each ingredient and step.
+
+        Only the characters added since the last feed are scanned, so a whole
+        completion is parsed in linear time. Malformed JSON is not reported
+        here; the full text is validated once the stream ends.
+        """
+        self.text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._expect_key = False
+        self._key: Optional[str] = None
+        self._element_start: Optional[int] = None
+        self.title_sent = False
+
+    def feed(self, delta: str) -> List[Tuple[str, Any]]:
+        """
+        Add streamed text.
+
+        Args:
+            delta: Next piece of the completion
+
+        Returns:
+            List of (event, data) completed by this piece: ("title", str),
+            ("ingredient", dict) or ("step", dict)
+        """
+        self.text += delta
+        events: List[Tuple[str, Any]] = []
+        text = self.text
+        for i in range(self._pos, len(text)):
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._end_string(text, i, events)
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._expect_key = True
+                elif self._depth == 3 and c == "{" and self._key in STREAMED_ARRAYS:
+                    self._element_start = i
+            elif c in "}]":
+                if self._depth == 3 and c == "}" and self._element_start is not None and self._key is not None:
+                    self._emit_element(self._key, text[self._element_start:i + 1], events)
+                    self._element_start = None
+                self._depth -= 1
+            elif self._depth == 1 and c == ",":
+                self._expect_key = True
+        self._pos = len(text)
+        return events
+
+    def _end_string(self, text: str, end: int, events: List[Tuple[str, Any]]) -> None:
+        """Handle a string that closed at index end."""
+        if self._depth != 1:
+            return
+        try:
+            value = json.loads(text[self._string_start:end + 1])
+        except json.JSONDecodeError:
+            return
+        if self._expect_key:
+            self._key = value
+            self._expect_key = False
+        elif self._key == "title" and not self.title_sent:
+            self.title_sent = True
+            events.append(("title", value))
+
+    def _emit_element(self, key: str, element: str, events: List[Tuple[str, Any]]) -> None:
+        """Report a complete ingredient or step object of the array under key."""
+        try:
+            data: Dict[str, Any] = json.loads(element)
+        except json.JSONDecodeError:
+            return
+        events.append((STREAMED_ARRAYS[key], data))
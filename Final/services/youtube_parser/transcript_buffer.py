@@ -0,0 +1,176 @@
+"""
+Compact transcript container: one text buffer plus parallel offset arrays.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterable, Iterator, Optional, Tuple
+
+# Same separator transcript_to_dict has always used between caption snippets
+SEGMENT_SEPARATOR = ". "
+
+
+class TranscriptBuffer:
+    def __init__(
+        self,
+        text: str,
+        offsets: array,
+        starts: array,
+        durations: array,
+        separator: str = SEGMENT_SEPARATOR,
+        lo: int = 0,
+        hi: Optional[int] = None,
+    ):
+        """
+        Caption segments stored as a single string and three arrays.
+
+        Segment i spans text[offsets[i]:offsets[i+1]] (separator included) and
+        is on screen from starts[i] for durations[i] seconds. Slices share the
+        text and arrays and only narrow the [lo, hi) segment range. Use
+        from_snippets to build one.
+
+        Args:
+            text: All segment texts, each followed by the separator
+            offsets: Start of each segment in text, plus the end of the last one
+            starts: Start time of each segment in seconds
+            durations: Duration of each segment in seconds
+            separator: Separator appended to every segment
+            lo: First segment of this view
+            hi: Segment after the last one of this view, defaults to all
+        """
+        self._text = text
+        self._offsets = offsets
+        self._starts = starts
+        self._durations = durations
+        self.separator = separator
+        self.lo = lo
+        self.hi = len(starts) if hi is None else hi
+
+    @classmethod
+    def from_snippets(cls, snippets: Iterable[Any], separator: str = SEGMENT_SEPARATOR) -> "TranscriptBuffer":
+        """
+        Build a buffer in one pass over caption snippets.
+
+        Args:
+            snippets: Objects with text, start and duration attributes
+                (e.g. FetchedTranscriptSnippet)
+            separator: Separator appended to every segment
+
+        Returns:
+            TranscriptBuffer
+        """
+        parts = []
+        offsets = array("q", [0])
+        starts = array("d")
+        durations = array("d")
+        position = 0
+        for snippet in snippets:
+            parts.append(snippet.text)
+            parts.append(separator)
+            position += len(snippet.text) + len(separator)
+            offsets.append(position)
+            starts.append(snippet.start)
+            durations.append(snippet.duration)
+        return cls("".join(parts), offsets, starts, durations, separator)
+
+    def __len__(self) -> int:
+        return self.hi - self.lo
+
+    def __iter__(self) -> Iterator[Tuple[str, float, float]]:
+        for index in range(len(self)):
+            yield self.segment(index)
+
+    @property
+    def text(self) -> str:
+        """
+        Prompt text of the view: segments joined and terminated by the separator.
+        """
+        if self.lo == 0 and self.hi == len(self._starts):
+            return self._text
+        return self._text[self._offsets[self.lo]:self._offsets[self.hi]]
+
+    @property
+    def start(self) -> float:
+        """Start time of the first segment, in seconds."""
+        return self._starts[self.lo] if len(self) else 0.0
+
+    @property
+    def end(self) -> float:
+        """End time of the last segment, in seconds."""
+        if not len(self):
+            return 0.0
+        return self._starts[self.hi - 1] + self._durations[self.hi - 1]
+
+    def segment(self, index: int) -> Tuple[str, float, float]:
+        """
+        One segment of the view.
+
+        Args:
+            index: Segment index within the view
+
+        Returns:
+            Tuple of text (without separator), start and duration
+
+        Raises:
+            IndexError: If index is out of range
+        """
+        if not 0 <= index < len(self):
+            raise IndexError("segment index out of range")
+        i = self.lo + index
+        text = self._text[self._offsets[i]:self._offsets[i + 1] - len(self.separator)]
+        return text, self._starts[i], self._durations[i]
+
+    def slice(self, start_time: float, end_time: float) -> "TranscriptBuffer":
+        """
+        Segments starting in [start_time, end_time), without copying the data.
+
+        Args:
+            start_time: Range start in seconds
+            end_time: Range end in seconds
+
+        Returns:
+            TranscriptBuffer sharing this buffer's storage
+        """
+        lo = self._segment_after(start_time, inclusive=False)
+        hi = max(lo, self._segment_after(end_time, inclusive=False))
+        return TranscriptBuffer(
+            self._text, self._offsets, self._starts, self._durations, self.separator, lo, hi
+        )
+
+    def time_at(self, char_offset: int) -> float:
+        """
+        Timestamp of the segment containing a character of the view's text.
+
+        Args:
+            char_offset: Offset in text
+
+        Returns:
+            Start time of that segment, in seconds
+
+        Raises:
+            IndexError: If the offset is outside the text
+        """
+        absolute = self._offsets[self.lo] + char_offset if len(self) else 0
+        if not len(self) or not self._offsets[self.lo] <= absolute < self._offsets[self.hi]:
+            raise IndexError("character offset out of range")
+        index = bisect_right(self._offsets, absolute, self.lo, self.hi + 1) - 1
+        return self._starts[index]
+
+    def segment_at(self, time: float) -> Optional[int]:
+        """
+        Index of the segment on screen at a given time.
+
+        Args:
+            time: Time in seconds
+
+        Returns:
+            Index within the view of the last segment starting at or before
+            time, or None if time precedes the view
+        """
+        index = self._segment_after(time, inclusive=True) - 1
+        return index - self.lo if index >= self.lo else None
+
+    def _segment_after(self, time: float, inclusive: bool) -> int:
+        """Absolute index of the first segment starting after time, or at or after it if not inclusive."""
+        search = bisect_right if inclusive else bisect_left
+        return search(self._starts, time, self.lo, self.hi)
@@ -0,0 +1,270 @@
+"""
+Persistent transcript cache backed by the service's SQLite database.
+"""
+
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class TranscriptCache:
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        ttl_seconds: float = 30 * 24 * 3600,
+        max_bytes: int = 100 * 1024 * 1024,
+        negative_ttl_seconds: float = 7 * 24 * 3600,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Cache of processed transcripts keyed by (video_id, language).
+
+        Args:
+            conn: SQLite connection (opened with check_same_thread=False)
+            ttl_seconds: How long a cached transcript stays valid
+            max_bytes: Maximum total size of the compressed transcripts; the least
+                recently used entries are evicted above it
+            negative_ttl_seconds: How long a "no transcript" result is remembered
+            clock: Time source, in seconds
+        """
+        self.conn = conn
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.negative_hits = 0
+        # Access times of hits, written with the next put rather than committed on every hit
+        self._accessed: Dict[Tuple[str, str], float] = {}
+        # The connection is shared by the scraper's worker threads
+        self._lock = threading.Lock()
+
+        with self._lock:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS transcript_cache (
+                    video_id TEXT NOT NULL,
+                    language TEXT NOT NULL,
+                    language_code TEXT,
+                    is_generated INTEGER,
+                    snippets BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (video_id, language)
+                );
+                """
+            )
+            # Videos known to have no usable transcript
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS transcript_cache_misses (
+                    video_id TEXT NOT NULL,
+                    language TEXT NOT NULL,
+                    reason TEXT,
+                    recorded_at REAL NOT NULL,
+                    PRIMARY KEY (video_id, language)
+                );
+                """
+            )
+            self.conn.commit()
+
+    def get(self, video_id: str, language: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached transcript.
+
+        Args:
+            video_id: YouTube video ID
+            language: Requested transcript language
+
+        Returns:
+            Dict with video_id, is_generated, language_code and snippets,
+            or None on a miss or if the entry expired
+        """
+        now = self.clock()
+        with self._lock:
+            row = self.conn.execute(
+                """
+                SELECT language_code, is_generated, snippets, fetched_at
+                FROM transcript_cache
+                WHERE video_id = ? AND language = ?;
+                """,
+                (video_id, language),
+            ).fetchone()
+
+            if row is None or now - row[3] > self.ttl_seconds:
+                if row is not None:
+                    self.conn.execute(
+                        "DELETE FROM transcript_cache WHERE video_id = ? AND language = ?;",
+                        (video_id, language),
+                    )
+                    self.conn.commit()
+                self.misses += 1
+                return None
+
+            self._accessed[(video_id, language)] = now
+            self.hits += 1
+
+        return {
+            "video_id": video_id,
+            "is_generated": bool(row[1]),
+            "language_code": row[0],
+            "snippets": zlib.decompress(row[2]).decode("utf-8"),
+        }
+
+    def put(self, transcript_dict: Dict[str, Any], language: str) -> None:
+        """
+        Store a transcript dict as produced by YouTubeScraper.transcript_to_dict.
+
+        Args:
+            transcript_dict: Transcript data (video_id, is_generated, language_code, snippets)
+            language: Requested transcript language
+        """
+        now = self.clock()
+        snippets = zlib.compress(transcript_dict["snippets"].encode("utf-8"))
+        with self._lock:
+            self.conn.execute(
+                """
+                INSERT OR REPLACE INTO transcript_cache (
+                    video_id, language, language_code, is_generated,
+                    snippets, size, fetched_at, accessed_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?);
+                """,
+                (
+                    transcript_dict["video_id"],
+                    language,
+                    transcript_dict.get("language_code"),
+                    int(bool(transcript_dict.get("is_generated"))),
+                    snippets,
+                    len(snippets),
+                    now,
+                    now,
+                ),
+            )
+            self._write_accessed()
+            self._evict(now)
+            self.conn.commit()
+
+    def get_miss(self, video_id: str, language: str) -> Optional[str]:
+        """
+        Check whether a video is known to have no usable transcript.
+
+        Args:
+            video_id: YouTube video ID
+            language: Requested transcript language
+
+        Returns:
+            The recorded reason, or None if unknown or expired
+        """
+        now = self.clock()
+        with self._lock:
+            row = self.conn.execute(
+                """
+                SELECT reason, recorded_at
+                FROM transcript_cache_misses
+                WHERE video_id = ? AND language = ?;
+                """,
+                (video_id, language),
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.negative_ttl_seconds:
+                self.conn.execute(
+                    "DELETE FROM transcript_cache_misses WHERE video_id = ? AND language = ?;",
+                    (video_id, language),
+                )
+                self.conn.commit()
+                return None
+            self.negative_hits += 1
+        return row[0]
+
+    def put_miss(self, video_id: str, language: str, reason: str) -> None:
+        """
+        Remember that a video has no usable transcript.
+
+        Args:
+            video_id: YouTube video ID
+            language: Requested transcript language
+            reason: Why no transcript is available (e.g. the error class name)
+        """
+        now = self.clock()
+        with self._lock:
+            self.conn.execute(
+                """
+                INSERT OR REPLACE INTO transcript_cache_misses (video_id, language, reason, recorded_at)
+                VALUES (?, ?, ?, ?);
+                """,
+                (video_id, language, reason, now),
+            )
+            self.conn.execute(
+                "DELETE FROM transcript_cache_misses WHERE recorded_at < ?;",
+                (now - self.negative_ttl_seconds,),
+            )
+            self.conn.commit()
+
+    def _write_accessed(self) -> None:
+        """Write the access times of the hits since the last put; eviction orders by them."""
+        self.conn.executemany(
+            "UPDATE transcript_cache SET accessed_at = ? WHERE video_id = ? AND language = ?;",
+            [(accessed_at, video_id, language) for (video_id, language), accessed_at in self._accessed.items()],
+        )
+        self._accessed.clear()
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then least recently used ones until under max_bytes."""
+        cur = self.conn.execute(
+            "DELETE FROM transcript_cache WHERE fetched_at < ?;",
+            (now - self.ttl_seconds,),
+        )
+        self.evictions += max(cur.rowcount, 0)
+
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM transcript_cache;").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self.conn.execute(
+            "SELECT video_id, language, size FROM transcript_cache ORDER BY accessed_at ASC;"
+        ).fetchall()
+        stale = []
+        for video_id, language, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((video_id, language))
+            total -= size
+        self.conn.executemany(
+            "DELETE FROM transcript_cache WHERE video_id = ? AND language = ?;",
+            stale,
+        )
+        self.evictions += len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Cache statistics.
+
+        Returns:
+            Dict with hits, misses, hit_rate, evictions, entries, bytes,
+            negative_hits and negative_entries
+        """
+        with self._lock:
+            entries, size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM transcript_cache;"
+            ).fetchone()
+            negative_entries = self.conn.execute(
+                "SELECT COUNT(*) FROM transcript_cache_misses;"
+            ).fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+            "negative_hits": self.negative_hits,
+            "negative_entries": negative_entries,
+        }
@@ -1,5 +1,5 @@
 from pydantic import BaseModel # type: ignore
-from typing import List, Dict
+from typing import Any, List, Dict
 
 class FetchedTranscriptSnippet(BaseModel):
     text: str 
@@ -30,3 +30,29 @@ class Recipe(BaseModel):
     cook_time: str | None = None
     nutritional_info: Dict[str, float] | None = None
 
+class VideoFilter(BaseModel):
+    require_captions: bool = False  # uploaded captions only; auto-generated ones are not flagged
+    min_duration_seconds: int | None = None
+    max_duration_minutes: int | None = None
+
+class TranscriptPayload(BaseModel):
+    video_id: str
+    title: str = ""
+    text: str = ""
+    language_code: str | None = None
+    is_generated: bool | None = None
+    duplicate_of: str | None = None  # video whose transcript this one nearly duplicates
+
+    @classmethod
+    def from_video_dict(cls, video: Dict[str, Any]) -> "TranscriptPayload":
+        """Build a payload from a YouTubeScraper.process_videos entry."""
+        if not video.get("video_id"):
+            raise ValueError("Transcript data missing video_id")
+        return cls(
+            video_id=video["video_id"],
+            title=video.get("title") or "",
+            text=video.get("snippets") or "",
+            language_code=video.get("language_code"),
+            is_generated=video.get("is_generated"),
+            duplicate_of=video.get("duplicate_of"),
+        )
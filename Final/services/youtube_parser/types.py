@@ -3,20 +3,30 @@ Type definitions for YouTube parser service.
 """
 
 from pydantic import BaseModel # type: ignore
+from typing import List, Optional
+from .type import VideoFilter
 
 class ScrapeRequest(BaseModel):
     """Request model for scraping a YouTube channel."""
     handle: str
     language: str = "en"
     quantity: int = 200
+    video_filter: Optional[VideoFilter] = None
 
 class QueryRequest(BaseModel):
     """Request model for searching and scraping YouTube videos."""
     query: str
     language: str = "en"
     quantity: int = 50
+    video_filter: Optional[VideoFilter] = None
 
 class VideoRequest(BaseModel):
     """Request model for scraping a specific YouTube video."""
     id: str
-    language: str = "en" 
\ No newline at end of file
+    language: str = "en" 
+
+class VideoBatchRequest(BaseModel):
+    """Request model for scraping several YouTube videos by ID."""
+    ids: List[str]
+    language: str = "en"
+    video_filter: Optional[VideoFilter] = None
@@ -0,0 +1,195 @@
+"""
+OpenAI token usage, latency and cost telemetry.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+# USD per million tokens (input, output)
+# https://openai.com/api/pricing
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+
+
+def completion_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """
+    Cost of a completion in USD.
+
+    Args:
+        model: OpenAI model name
+        prompt_tokens: Input tokens
+        completion_tokens: Output tokens
+
+    Returns:
+        float: Cost; 0 for models without a known price
+    """
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+
+class UsageTracker:
+    def __init__(
+        self,
+        conn: Optional[sqlite3.Connection] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Record the usage of every OpenAI completion.
+
+        Each completion is kept in memory for the rolling per-minute totals and,
+        with a connection, persisted in the recipe_generation_usage table next
+        to recipe_generations for the per-day totals.
+
+        Args:
+            conn: SQLite connection (opened with check_same_thread=False), or
+                None to keep everything in memory
+            clock: Time source, in seconds since the epoch
+        """
+        self.conn = conn
+        self.clock = clock
+        self._recent: Deque[Tuple[float, int, int]] = deque()
+        self._days: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+        if self.conn is not None:
+            with self._lock:
+                self.conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS recipe_generation_usage (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        video_id TEXT,
+                        model TEXT NOT NULL,
+                        prompt_tokens INTEGER NOT NULL,
+                        completion_tokens INTEGER NOT NULL,
+                        latency_ms REAL NOT NULL,
+                        cost_usd REAL NOT NULL,
+                        day TEXT NOT NULL,
+                        created_at REAL NOT NULL
+                    );
+                    """
+                )
+                self.conn.execute(
+                    "CREATE INDEX IF NOT EXISTS recipe_generation_usage_day ON recipe_generation_usage (day);"
+                )
+                self.conn.commit()
+
+    def _day(self, now: float) -> str:
+        """UTC date of a timestamp."""
+        return datetime.fromtimestamp(now, timezone.utc).date().isoformat()
+
+    def record(
+        self,
+        video_id: Optional[str],
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        latency_seconds: float,
+    ) -> None:
+        """
+        Record one completion.
+
+        Args:
+            video_id: Video the completion was for
+            model: OpenAI model name
+            prompt_tokens: Input tokens
+            completion_tokens: Output tokens
+            latency_seconds: Time from request to full response
+        """
+        now = self.clock()
+        day = self._day(now)
+        cost = completion_cost(model, prompt_tokens, completion_tokens)
+        with self._lock:
+            self._recent.append((now, prompt_tokens, completion_tokens))
+            totals = self._days.setdefault(
+                day, {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0, "latency_ms": 0.0}
+            )
+            totals["requests"] += 1
+            totals["prompt_tokens"] += prompt_tokens
+            totals["completion_tokens"] += completion_tokens
+            totals["cost_usd"] += cost
+            totals["latency_ms"] += latency_seconds * 1000
+            if self.conn is not None:
+                self.conn.execute(
+                    """
+                    INSERT INTO recipe_generation_usage (
+                        video_id, model, prompt_tokens, completion_tokens,
+                        latency_ms, cost_usd, day, created_at
+                    )
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?);
+                    """,
+                    (video_id, model, prompt_tokens, completion_tokens, latency_seconds * 1000, cost, day, now),
+                )
+                self.conn.commit()
+
+    def last_minute(self) -> Dict[str, int]:
+        """
+        Rolling totals over the last 60 seconds.
+
+        Returns:
+            Dict with requests, prompt_tokens, completion_tokens and total_tokens
+        """
+        cutoff = self.clock() - 60
+        with self._lock:
+            while self._recent and self._recent[0][0] < cutoff:
+                self._recent.popleft()
+            prompt = sum(entry[1] for entry in self._recent)
+            completion = sum(entry[2] for entry in self._recent)
+            requests = len(self._recent)
+        return {
+            "requests": requests,
+            "prompt_tokens": prompt,
+            "completion_tokens": completion,
+            "total_tokens": prompt + completion,
+        }
+
+    def today(self) -> Dict[str, Any]:
+        """
+        Totals since midnight UTC, including earlier runs when persisted.
+
+        Returns:
+            Dict with requests, prompt_tokens, completion_tokens, total_tokens,
+            cost_usd and avg_latency_ms (None before the first completion)
+        """
+        day = self._day(self.clock())
+        with self._lock:
+            if self.conn is not None:
+                row = self.conn.execute(
+                    """
+                    SELECT COUNT(*), COALESCE(SUM(prompt_tokens), 0), COALESCE(SUM(completion_tokens), 0),
+                           COALESCE(SUM(cost_usd), 0), AVG(latency_ms)
+                    FROM recipe_generation_usage WHERE day = ?;
+                    """,
+                    (day,),
+                ).fetchone()
+                requests, prompt, completion, cost, latency = row
+            else:
+                totals = self._days.get(day, {})
+                requests = int(totals.get("requests", 0))
+                prompt = int(totals.get("prompt_tokens", 0))
+                completion = int(totals.get("completion_tokens", 0))
+                cost = totals.get("cost_usd", 0.0)
+                latency = totals["latency_ms"] / requests if requests else None
+        return {
+            "requests": requests,
+            "prompt_tokens": prompt,
+            "completion_tokens": completion,
+            "total_tokens": prompt + completion,
+            "cost_usd": round(cost, 6),
+            "avg_latency_ms": round(latency, 1) if latency is not None else None,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Usage for the /limits endpoint.
+
+        Returns:
+            Dict with last_minute and today totals
+        """
+        return {"last_minute": self.last_minute(), "today": self.today()}
@@ -3,51 +3,212 @@ YouTube video scraping and transcript processing functionality.
 """
 
 import requests # type: ignore
-from .type import FetchedTranscript
-from youtube_transcript_api import YouTubeTranscriptApi # type: ignore
-from typing import List, Tuple, Dict, Any, Optional
-import time
-from xml.etree.ElementTree import ParseError
+from .type import FetchedTranscript, TranscriptPayload, VideoFilter
+from .http_pool import HttpPool
+from .transcript_cache import TranscriptCache
+from .dedup import DuplicateIndex
+from .transcript_buffer import TranscriptBuffer
+from .quota import QuotaTracker, QuotaExceededError
+from .retry import RetryPolicy, RetryableHTTPError, parse_retry_after
+from youtube_transcript_api import ( # type: ignore
+    YouTubeTranscriptApi,
+    TranscriptsDisabled,
+    NoTranscriptFound,
+    VideoUnavailable,
+    VideoUnplayable,
+    InvalidVideoId,
+    AgeRestricted,
+    Transcript,
+    TranscriptList,
+)
+from typing import List, Tuple, Dict, Any, Optional, Iterator, Union, Sequence
+from concurrent.futures import ThreadPoolExecutor
+import re
 
+# YouTube Data API caps maxResults at 50 per page
+MAX_PAGE_SIZE = 50
+
+# Placeholder titles of playlist entries whose video is gone
+UNAVAILABLE_VIDEO_TITLES = ("Deleted video", "Private video")
+
+# Transcript preference chain: manual captions in the requested language, then
+# auto-generated ones, then a translation, then whatever the video has
+TRANSCRIPT_PREFERENCES = ("manual", "generated", "translated", "any")
+
+# Data API statuses worth retrying
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Transcript errors that will not go away by retrying
+NON_RETRYABLE_ERRORS = (
+    TranscriptsDisabled,
+    NoTranscriptFound,
+    VideoUnavailable,
+    VideoUnplayable,
+    InvalidVideoId,
+    AgeRestricted,
+)
+
+
+# ISO 8601 durations as returned in contentDetails.duration, e.g. 'PT1H2M3S'
+DURATION_PATTERN = re.compile(
+    r"P(?:(?P<days>\d+)D)?(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$"
+)
+
+
+def parse_duration(duration: str) -> int:
+    """
+    Convert an ISO 8601 video duration to seconds.
+
+    Args:
+        duration: Duration string such as 'PT4M13S'
+
+    Returns:
+        Duration in seconds (0 for live streams reported as 'P0D')
+
+    Raises:
+        ValueError: If the duration cannot be parsed
+    """
+    match = DURATION_PATTERN.match(duration)
+    if not match:
+        raise ValueError(f"Invalid duration: {duration}")
+    parts = {name: int(value or 0) for name, value in match.groupdict().items()}
+    return parts["days"] * 86400 + parts["hours"] * 3600 + parts["minutes"] * 60 + parts["seconds"]
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Whether a transcript fetch error may succeed on a later attempt.
+    """
+    return not isinstance(error, NON_RETRYABLE_ERRORS)
+
+
+def is_retryable_http(error: Exception) -> bool:
+    """
+    Whether a YouTube Data API call error may succeed on a later attempt.
+    """
+    return isinstance(error, (RetryableHTTPError, requests.ConnectionError, requests.Timeout))
 
 
 class YouTubeScraper:
-    def __init__(self, api_key:str, language:str = "en", max_results:int=50): 
+    def __init__(self, api_key:str, language:str = "en", max_results:int=50, max_workers:int=8, http: Optional[HttpPool] = None, cache: Optional[TranscriptCache] = None, quota: Optional[QuotaTracker] = None, retry: Optional[RetryPolicy] = None, transcript_preferences: Sequence[str] = TRANSCRIPT_PREFERENCES, dedup: Optional[DuplicateIndex] = None): 
         self.api_key = api_key
         self.language = language
+        unknown = [p for p in transcript_preferences if p not in TRANSCRIPT_PREFERENCES]
+        if unknown:
+            raise ValueError(f"Invalid transcript preferences: {unknown}")
+        self.transcript_preferences = tuple(transcript_preferences)
         self.max_results = max_results
+        # Number of transcripts fetched in parallel by process_videos (1 = serial)
+        self.max_workers = max(1, max_workers)
+        # Shared keep-alive pool; without one every call opens a new connection
+        self.http = http
+        # Persistent transcript cache consulted before going to YouTube
+        self.cache = cache
+        # Daily YouTube Data API quota accounting
+        self.quota = quota
+        # One retry policy (backoff, circuit breaker, retry budget) for every network call
+        self.retry = retry or RetryPolicy()
+        # Near-duplicate index marking re-uploads of already scraped transcripts
+        self.dedup = dedup
+        # channel_id -> uploads playlist ID, filled when resolving channels
+        self._uploads_playlists: Dict[str, Optional[str]] = {}
+
+    def _get(self, url: str, params: Dict[str, Any], timeout: Any = None) -> requests.Response:
+        """
+        Send a GET request through the shared pool if one was injected,
+        charging its quota cost first. Connection errors, 429 and 5xx
+        responses are retried according to the retry policy.
+
+        Args:
+            url: Request URL
+            params: Query parameters
+            timeout: Optional requests timeout
+
+        Returns:
+            requests.Response
+
+        Raises:
+            QuotaExceededError: If the call does not fit in today's quota
+            CircuitOpenError: If the endpoint is failing and its circuit is open
+        """
+        endpoint = url.rsplit('/', 1)[-1]
+
+        def attempt() -> requests.Response:
+            # Every attempt counts against the quota, including failed ones
+            if self.quota is not None:
+                self.quota.charge(endpoint)
+            if self.http is not None:
+                response = self.http.get(url, params=params, timeout=timeout)
+            else:
+                response = requests.get(url, params=params, timeout=timeout)
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                raise RetryableHTTPError(response.status_code, parse_retry_after(response.headers.get("Retry-After")))
+            return response
 
-    def get_transcript(self, video_id: str, max_retries: int = 3, delay: float = 0.5) -> FetchedTranscript:
+        return self.retry.call(endpoint, attempt, retryable=is_retryable_http)
+
+    def get_transcript(self, video_id: str) -> FetchedTranscript:
         """
-        Fetch transcript for a given video ID with retry mechanism.
+        Fetch the best available transcript for a given video ID.
+        Lists the video's transcripts once and picks one following
+        transcript_preferences. Makes a single attempt; process_videos
+        retries through the retry policy.
         
         Args:
             video_id: YouTube video ID
-            max_retries: Maximum number of retry attempts
-            delay: Delay between retries in seconds
 
         Returns:
             FetchedTranscript object
             
         Raises:
-            Exception: If transcript cannot be fetched after all retries
+            NoTranscriptFound: If no transcript matches the preferences
+            Exception: If transcript cannot be fetched
         """
-        ytt_api = YouTubeTranscriptApi()
-        last_exception = None
-        
-        for attempt in range(max_retries):
-            try:
-                ytt_transcript = ytt_api.fetch(video_id, languages=[self.language])
-                return ytt_transcript
-            except ParseError as e:
-                last_exception = e
-                if attempt < max_retries - 1:
-                    time.sleep(delay)
-                continue
-            except Exception as e:
-                raise e
-                
-        raise last_exception or Exception(f"Failed to fetch transcript for video {video_id}")
+        # The pool hands each worker thread its own session over the shared connections
+        ytt_api = YouTubeTranscriptApi(http_client=self.http.session) if self.http else YouTubeTranscriptApi()
+        transcript_list = ytt_api.list(video_id)
+        return self.select_transcript(transcript_list).fetch()
+
+    def select_transcript(self, transcript_list: TranscriptList) -> Transcript:
+        """
+        Pick a transcript following the preference chain.
+
+        Args:
+            transcript_list: Transcripts available for the video
+
+        Returns:
+            The chosen Transcript, translated to self.language if needed
+
+        Raises:
+            NoTranscriptFound: If no transcript matches the preferences
+        """
+        transcripts = list(transcript_list)
+        # Exact language code first, then regional variants (e.g. 'en-GB' for 'en')
+        base_language = self.language.split("-")[0]
+        ranked = sorted(
+            transcripts,
+            key=lambda t: (t.is_generated, t.language_code != self.language),
+        )
+        same_language = [t for t in ranked if t.language_code.split("-")[0] == base_language]
+
+        for preference in self.transcript_preferences:
+            if preference == "manual":
+                chosen = next((t for t in same_language if not t.is_generated), None)
+            elif preference == "generated":
+                chosen = next((t for t in same_language if t.is_generated), None)
+            elif preference == "translated":
+                chosen = next(
+                    (t for t in ranked if any(lang.language_code == self.language for lang in t.translation_languages)),
+                    None,
+                )
+                if chosen is not None:
+                    chosen = chosen.translate(self.language)
+            else:
+                chosen = next(iter(ranked), None)
+            if chosen is not None:
+                return chosen
+
+        raise NoTranscriptFound(transcript_list.video_id, [self.language], transcript_list)
 
     def transcript_to_dict(self, transcript: FetchedTranscript, title: str) -> Dict[str, Any]:
         """
@@ -60,9 +221,8 @@ class YouTubeScraper:
         Returns:
             Dictionary containing transcript data
         """
-        snippets = ""
-        for snippet in transcript.snippets:
-            snippets += (snippet.text + ". ")
+        # Joined in one pass; repeated += was quadratic on long videos
+        snippets = TranscriptBuffer.from_snippets(transcript.snippets).text
 
         transcript_dict = {
             "title": title,
@@ -74,6 +234,71 @@ class YouTubeScraper:
 
         return transcript_dict
 
+    def _paginate(self, url: str, params: Dict[str, Any], label: str, timeout: Any = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Page through a YouTube Data API list endpoint using nextPageToken.
+
+        Requests at most 50 items per page (the API maximum) and stops once
+        max_results items have been yielded or there are no more pages. If the
+        quota cannot cover another page, the listing is cut short instead.
+
+        Args:
+            url: Endpoint URL
+            params: Query parameters, without maxResults/pageToken
+            label: Short endpoint name used in error messages
+            timeout: Optional requests timeout
+
+        Yields:
+            The raw 'items' list of each page
+        """
+        remaining = self.max_results
+        page_token: Optional[str] = None
+        endpoint = url.rsplit('/', 1)[-1]
+        while remaining > 0:
+            if page_token and self.quota is not None and not self.quota.can_afford(endpoint):
+                print(f"Stopping {label} listing early: not enough YouTube quota left for another page")
+                return
+            page_params = dict(params, maxResults=min(MAX_PAGE_SIZE, remaining))
+            if page_token:
+                page_params['pageToken'] = page_token
+            response = self._get(url, page_params, timeout)
+            data = response.json()
+
+            # Surface YouTube API errors explicitly so the caller sees what's wrong
+            if "error" in data:
+                message = data["error"].get("message", "Unknown YouTube API error")
+                raise RuntimeError(f"YouTube API error ({label}): {message}")
+
+            items = data.get('items', [])[:remaining]
+            if not items:
+                return
+            yield items
+
+            remaining -= len(items)
+            page_token = data.get('nextPageToken')
+            if not page_token:
+                return
+
+    def iter_videos_by_query(self, query: str) -> Iterator[List[Tuple[str, str]]]:
+        """
+        Lazily page through YouTube search results.
+
+        Args:
+            query: Search query string
+
+        Yields:
+            One list of (video_id, title) tuples per result page
+        """
+        url = 'https://www.googleapis.com/youtube/v3/search'
+        params: Dict[str, Any] = {
+            'part': 'snippet',
+            'q': query,
+            'type': 'video',
+            'key': self.api_key
+        }
+        for items in self._paginate(url, params, "search", timeout=(10, 60)):  # (connect timeout, read timeout)
+            yield [(item['id']['videoId'], item['snippet']['title']) for item in items]
+
     def fetch_videos_by_query(self, query: str) -> List[Tuple[str, str]]:
         """
         Fetch video IDs and titles from YouTube search.
@@ -84,57 +309,131 @@ class YouTubeScraper:
         Returns:
             List of tuples containing (video_id, title)
         """
+        return [video for page in self.iter_videos_by_query(query) for video in page]
+
+    def iter_channel_videos_by_id(self, channel_id: str) -> Iterator[List[Tuple[str, str]]]:
+        """
+        Lazily page through the videos of a specific YouTube channel, newest first.
+
+        Uses the channel's uploads playlist (playlistItems.list, 1 quota unit
+        per page) and only falls back to search.list (100 units per page)
+        when the playlist cannot be resolved or read.
+
+        Args:
+            channel_id: YouTube channel ID
+
+        Yields:
+            One list of (video_id, title) tuples per result page
+        """
+        playlist_id = self.get_uploads_playlist_id(channel_id)
+        if playlist_id is not None:
+            pages = self.iter_playlist_videos(playlist_id)
+            try:
+                first_page = next(pages, None)
+            except QuotaExceededError:
+                raise
+            except RuntimeError as e:
+                print(f"Uploads playlist unavailable for channel {channel_id}: {str(e)}. Falling back to search...")
+            else:
+                if first_page is not None:
+                    yield first_page
+                    yield from pages
+                return
+
+        yield from self._iter_channel_search(channel_id)
+
+    def _iter_channel_search(self, channel_id: str) -> Iterator[List[Tuple[str, str]]]:
+        """
+        Page through a channel's videos with search.list.
+
+        Args:
+            channel_id: YouTube channel ID
+
+        Yields:
+            One list of (video_id, title) tuples per result page
+        """
         url = 'https://www.googleapis.com/youtube/v3/search'
         params: Dict[str, Any] = {
             'part': 'snippet',
-            'q': query,
+            'channelId': channel_id,
             'type': 'video',
-            'maxResults': self.max_results,
+            'order': 'date',
             'key': self.api_key
         }
-        response = requests.get(url, params=params, timeout=(10, 60))  # (connect timeout, read timeout)
-        data = response.json()
+        for items in self._paginate(url, params, "channel videos"):
+            yield [(item['id']['videoId'], item['snippet']['title']) for item in items]
 
-        # Surface YouTube API errors explicitly so the caller sees what's wrong
-        if "error" in data:
-            message = data["error"].get("message", "Unknown YouTube API error")
-            raise RuntimeError(f"YouTube API error (search): {message}")
+    def iter_playlist_videos(self, playlist_id: str) -> Iterator[List[Tuple[str, str]]]:
+        """
+        Lazily page through the videos of a playlist.
 
-        return [
-            (item['id']['videoId'], item['snippet']['title'])
-            for item in data.get('items', [])
-        ]
+        Args:
+            playlist_id: YouTube playlist ID
 
-    def fetch_channel_videos_by_id(self, channel_id: str) -> List[Tuple[str, str]]:
+        Yields:
+            One list of (video_id, title) tuples per result page
         """
-        Fetch video IDs and titles from a specific YouTube channel.
+        url = 'https://www.googleapis.com/youtube/v3/playlistItems'
+        params: Dict[str, Any] = {
+            'part': 'snippet',
+            'playlistId': playlist_id,
+            'key': self.api_key
+        }
+        for items in self._paginate(url, params, "playlist items"):
+            yield [
+                (item['snippet']['resourceId']['videoId'], item['snippet']['title'])
+                for item in items
+                # Deleted and private uploads stay in the playlist but have no transcript
+                if item['snippet'].get('title') not in UNAVAILABLE_VIDEO_TITLES
+            ]
+
+    def get_uploads_playlist_id(self, channel_id: str) -> Optional[str]:
+        """
+        Resolve the ID of a channel's uploads playlist.
 
         Args:
             channel_id: YouTube channel ID
-        
+
         Returns:
-            List of tuples containing (video_id, title)
+            Uploads playlist ID, or None if the channel has none
         """
-        url = 'https://www.googleapis.com/youtube/v3/search'
+        if channel_id in self._uploads_playlists:
+            return self._uploads_playlists[channel_id]
+
+        url = 'https://www.googleapis.com/youtube/v3/channels'
         params: Dict[str, Any] = {
-            'part': 'snippet',
-            'channelId': channel_id,
-            'type': 'video',
-            'order': 'date',
-            'maxResults': self.max_results,
+            'part': 'contentDetails',
+            'id': channel_id,
             'key': self.api_key
         }
-        response = requests.get(url, params=params)
+        response = self._get(url, params)
         data = response.json()
 
         if "error" in data:
-            message = data["error"].get("message", "Unknown YouTube API error")
-            raise RuntimeError(f"YouTube API error (channel videos): {message}")
+            print(f"Could not resolve uploads playlist for channel {channel_id}: "
+                  f"{data['error'].get('message', 'Unknown YouTube API error')}")
+            return None
 
-        return [
-            (item['id']['videoId'], item['snippet']['title'])
-            for item in data.get('items', [])
-        ]
+        items = data.get('items', [])
+        playlist_id = self._uploads_playlist_of(items[0]) if items else None
+        self._uploads_playlists[channel_id] = playlist_id
+        return playlist_id
+
+    def _uploads_playlist_of(self, channel: Dict[str, Any]) -> Optional[str]:
+        """Extract the uploads playlist ID from a channels.list item."""
+        return channel.get('contentDetails', {}).get('relatedPlaylists', {}).get('uploads')
+
+    def fetch_channel_videos_by_id(self, channel_id: str) -> List[Tuple[str, str]]:
+        """
+        Fetch video IDs and titles from a specific YouTube channel.
+
+        Args:
+            channel_id: YouTube channel ID
+        
+        Returns:
+            List of tuples containing (video_id, title)
+        """
+        return [video for page in self.iter_channel_videos_by_id(channel_id) for video in page]
 
     def get_channel_id_by_handle(self, handle: str) -> str:
         """
@@ -148,18 +447,22 @@ class YouTubeScraper:
         """
         url = 'https://www.googleapis.com/youtube/v3/channels'
         params: Dict[str, Any] = {
-            'part': 'id',
+            'part': 'id,contentDetails',  # same quota cost; saves a lookup for the uploads playlist
             'forHandle': handle.lstrip('@'),
             'key': self.api_key
         }
-        response = requests.get(url, params=params)
+        response = self._get(url, params)
         data = response.json()
 
         items = data.get('items', [])
         if not items:
             raise ValueError(f"Channel not found for handle: {handle}")
-        
-        return items[0]['id']
+
+        channel_id = items[0]['id']
+        playlist_id = self._uploads_playlist_of(items[0])
+        if playlist_id is not None:
+            self._uploads_playlists[channel_id] = playlist_id
+        return channel_id
 
     def fetch_video_by_id(self, video_id: str) -> List[Tuple[str, str]]:
         """
@@ -171,7 +474,7 @@ class YouTubeScraper:
             'id': video_id,
             'key': self.api_key
         }
-        response = requests.get(url, params=params)
+        response = self._get(url, params)
         data = response.json()
 
         if "error" in data:
@@ -181,55 +484,275 @@ class YouTubeScraper:
         items = data.get('items', [])
         return [(item['id'], item['snippet']['title']) for item in items]
 
-    def process_videos(self, type: str = "id", arg: Optional[str] = None) -> List[Dict[str, Any]]:
+    def fetch_videos_by_ids(self, video_ids: List[str], part: str = "snippet") -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch metadata for many videos, packing up to 50 IDs into each videos.list call.
+
+        Args:
+            video_ids: YouTube video IDs
+            part: Comma-separated resource parts to request (e.g. 'snippet,contentDetails')
+
+        Returns:
+            Dict mapping video ID to its videos.list item; unknown IDs are left out
+        """
+        videos: Dict[str, Dict[str, Any]] = {}
+        for items in self._iter_video_batches(video_ids, part):
+            for item in items:
+                videos[item['id']] = item
+        return videos
+
+    def iter_videos_by_ids(self, video_ids: List[str]) -> Iterator[List[Tuple[str, str]]]:
+        """
+        Lazily look up the titles of many videos, 50 per request.
+
+        Args:
+            video_ids: YouTube video IDs
+
+        Yields:
+            One list of (video_id, title) tuples per batch, in the order given
+        """
+        for items in self._iter_video_batches(video_ids, "snippet"):
+            titles = {item['id']: item['snippet']['title'] for item in items}
+            yield [(video_id, titles[video_id]) for video_id in dict.fromkeys(video_ids) if video_id in titles]
+
+    def _iter_video_batches(self, video_ids: List[str], part: str) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Call videos.list for up to 50 unique IDs at a time.
+
+        Args:
+            video_ids: YouTube video IDs
+            part: Comma-separated resource parts to request
+
+        Yields:
+            The raw 'items' list of each call
+        """
+        unique_ids = list(dict.fromkeys(video_ids))
+        url = 'https://www.googleapis.com/youtube/v3/videos'
+        for i in range(0, len(unique_ids), MAX_PAGE_SIZE):
+            params: Dict[str, Any] = {
+                'part': part,
+                'id': ','.join(unique_ids[i:i + MAX_PAGE_SIZE]),
+                'maxResults': MAX_PAGE_SIZE,
+                'key': self.api_key
+            }
+            response = self._get(url, params)
+            data = response.json()
+
+            if "error" in data:
+                message = data["error"].get("message", "Unknown YouTube API error")
+                raise RuntimeError(f"YouTube API error (videos batch): {message}")
+
+            yield data.get('items', [])
+
+    def process_videos(
+        self,
+        type: str = "id",
+        arg: Optional[Union[str, List[str]]] = None,
+        video_filter: Optional[VideoFilter] = None,
+    ) -> List[Dict[str, Any]]:
         """
         Process videos by fetching them and their transcripts.
-        Retries 3 times if there is an error per video. 
+        Failed fetches are retried by the retry policy. Transcripts are
+        fetched on up to max_workers threads while later result pages are
+        still being listed; the result order matches the listing order.
 
         Args:
-            type: Type of search to perform
-            arg: Argument for the search
+            type: Type of search to perform ('id', 'ids', 'query' or 'channel_id')
+            arg: Argument for the search; for 'ids', a list or comma-separated
+                string of video IDs
+            video_filter: Optional caption/duration rules; videos failing them are
+                dropped before their transcript is fetched
         Returns:
-            List of dicts containing video and transcript data
+            List of dicts containing video and transcript data; with a
+            duplicate index, near-duplicates of an indexed transcript carry
+            the original's video ID under 'duplicate_of'
         """
         if arg is None:
             raise ValueError("arg parameter cannot be None")
 
-        if type == "id":
-            videos = self.fetch_video_by_id(arg)
+        if type == "ids":
+            video_ids = arg.split(",") if isinstance(arg, str) else arg
+            pages: Iterator[List[Tuple[str, str]]] = self.iter_videos_by_ids(video_ids)
+        elif not isinstance(arg, str):
+            raise ValueError(f"arg must be a string for type: {type}")
+        elif type == "id":
+            pages = iter([self.fetch_video_by_id(arg)])
         elif type == "query": 
-            videos = self.fetch_videos_by_query(arg)
+            pages = self.iter_videos_by_query(arg)
         elif type == 'channel_id': 
-            videos = self.fetch_channel_videos_by_id(arg)
+            pages = self.iter_channel_videos_by_id(arg)
         else:
             raise ValueError(f"Invalid type: {type}")
+
+        if video_filter is not None:
+            pages = self._filter_pages(pages, video_filter)
         
-        results = []
-        for video_id, title in videos:
-            success = False
-            for attempt in range(4):
-                try:
-                    transcript = self.get_transcript(video_id)
-                    video_dict = self.transcript_to_dict(transcript, title)
-                    results.append(video_dict)
-                    success = True
-                    break 
-                except Exception as e:
-                    if attempt < 3:
-                        print(f"Error processing video {video_id} (attempt {attempt+1}): {str(e)}. Retrying...")
-                    else:
-                        print(f"Failed to process video {video_id} after 4 attempts: {str(e)}")
-            
-            if not success:
-                # If all attempts failed, add a placeholder dict with error information
-                results.append({
-                    "title": title,
-                    "video_id": video_id,
-                    "error": "Failed to fetch transcript",
-                    "snippets": ""
-                })
-                
+        if self.max_workers == 1:
+            fetched = [self._fetch_video(video_id, title) for page in pages for video_id, title in page]
+        else:
+            # Schedule each page as soon as it arrives so transcript fetching overlaps
+            # with loading the next page; futures are collected in listing order
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [
+                    executor.submit(self._fetch_video, video_id, title)
+                    for page in pages
+                    for video_id, title in page
+                ]
+                fetched = [future.result() for future in futures]
+        results = [video for video, _ in fetched]
+
+        if self.dedup is not None:
+            self._mark_duplicates(fetched)
+
+        retry_stats = self.retry.stats()
+        if retry_stats["retries"]:
+            print(f"Retried {retry_stats['retries']} times, {retry_stats['retry_seconds']}s spent waiting")
         return results
 
+    def _fetch_video(self, video_id: str, title: str) -> Tuple[Dict[str, Any], Optional[Tuple[int, ...]]]:
+        """
+        Worker task of process_videos: the video's transcript and, with a
+        duplicate index, its MinHash signature, computed here on the worker pool.
+        """
+        video = self._process_video(video_id, title)
+        if self.dedup is None or "error" in video or not video.get("snippets"):
+            return video, None
+        return video, self.dedup.signature_for(video_id, video["snippets"])
 
+    def _mark_duplicates(self, fetched: List[Tuple[Dict[str, Any], Optional[Tuple[int, ...]]]]) -> None:
+        """
+        Look up each fetched transcript in the duplicate index, in listing order,
+        so a re-upload is linked to the first copy scraped.
+        """
+        assert self.dedup is not None
+        for video, signature in fetched:
+            if signature is None:
+                continue
+            duplicate = self.dedup.find_or_add(video["video_id"], video["snippets"], signature)
+            if duplicate is not None:
+                video["duplicate_of"] = duplicate[0]
+                print(f"Video {video['video_id']} is a near-duplicate of {duplicate[0]} (similarity {duplicate[1]:.2f})")
+
+    def _filter_pages(self, pages: Iterator[List[Tuple[str, str]]], video_filter: VideoFilter) -> Iterator[List[Tuple[str, str]]]:
+        """
+        Drop videos that fail the filter rules, one contentDetails lookup per page.
+
+        Args:
+            pages: Pages of (video_id, title) tuples
+            video_filter: Caption and duration rules
 
+        Yields:
+            The pages with failing videos removed
+        """
+        for page in pages:
+            details = self.fetch_videos_by_ids([video_id for video_id, _ in page], part="contentDetails")
+            kept = [
+                (video_id, title)
+                for video_id, title in page
+                if video_id in details and self._passes_filter(details[video_id].get('contentDetails', {}), video_filter)
+            ]
+            if len(kept) < len(page):
+                print(f"Skipping {len(page) - len(kept)} of {len(page)} videos that do not match the video filter")
+            yield kept
+
+    def _passes_filter(self, content_details: Dict[str, Any], video_filter: VideoFilter) -> bool:
+        """
+        Check a video's contentDetails against the filter rules.
+
+        Args:
+            content_details: contentDetails part of a videos.list item
+            video_filter: Caption and duration rules
+
+        Returns:
+            bool: Whether the video should be processed
+        """
+        if video_filter.require_captions and content_details.get('caption') != 'true':
+            return False
+
+        try:
+            duration = parse_duration(content_details.get('duration', ''))
+        except ValueError:
+            # Unknown duration: only keep the video if no duration rule applies
+            return video_filter.min_duration_seconds is None and video_filter.max_duration_minutes is None
+
+        if video_filter.min_duration_seconds is not None and duration < video_filter.min_duration_seconds:
+            return False
+        if video_filter.max_duration_minutes is not None and duration > video_filter.max_duration_minutes * 60:
+            return False
+        return True
+
+    def process_transcripts(
+        self,
+        type: str,
+        arg: Optional[Union[str, List[str]]] = None,
+        video_filter: Optional[VideoFilter] = None,
+    ) -> List[TranscriptPayload]:
+        """
+        Like process_videos, but returns typed payloads for RecipeGenerator.
+        Videos without a transcript are left out.
+
+        Args:
+            type: Type of processing ('id', 'ids', 'query', or 'channel_id')
+            arg: Argument for the processing type
+            video_filter: Optional caption/duration rules
+
+        Returns:
+            List of TranscriptPayload, in the order of process_videos
+        """
+        return [
+            TranscriptPayload.from_video_dict(video)
+            for video in self.process_videos(type, arg, video_filter)
+            if "error" not in video
+        ]
+
+    def _process_video(self, video_id: str, title: str) -> Dict[str, Any]:
+        """
+        Fetch and convert the transcript of a single video, using the
+        transcript cache when available. Retryable errors are retried by the
+        retry policy; the others fail at once and are negatively cached.
+
+        Args:
+            video_id: YouTube video ID
+            title: Video title
+
+        Returns:
+            Dict containing video and transcript data, or an error placeholder
+        """
+        if self.cache is not None:
+            cached = self.cache.get(video_id, self.language)
+            if cached is not None:
+                return {"title": title, **cached}
+            reason = self.cache.get_miss(video_id, self.language)
+            if reason is not None:
+                return self._error_placeholder(video_id, title, f"No transcript available: {reason}")
+
+        try:
+            transcript = self.retry.call("transcript", lambda: self.get_transcript(video_id), retryable=is_retryable)
+        except Exception as e:
+            if not is_retryable(e):
+                # Transcripts disabled, video gone, etc.: fail fast and remember it
+                reason = type(e).__name__
+                print(f"No transcript for video {video_id}: {reason}")
+                if self.cache is not None:
+                    self.cache.put_miss(video_id, self.language, reason)
+                return self._error_placeholder(video_id, title, f"No transcript available: {reason}")
+
+            # If all attempts failed, return a placeholder dict with error information
+            print(f"Failed to process video {video_id}: {str(e)}")
+            return self._error_placeholder(video_id, title, "Failed to fetch transcript")
+
+        video_dict = self.transcript_to_dict(transcript, title)
+        if self.cache is not None:
+            self.cache.put(video_dict, self.language)
+        return video_dict
+
+    def _error_placeholder(self, video_id: str, title: str, error: str) -> Dict[str, Any]:
+        """
+        Build the result entry for a video whose transcript could not be fetched.
+        """
+        return {
+            "title": title,
+            "video_id": video_id,
+            "error": error,
+            "snippets": ""
+        }